@@ -1,4 +1,4 @@
 #!/usr/bin/env bash
 set -euo pipefail
-python src/ingest.py --data_dir data --persist_dir db
+python src/ingest.py
 chainlit run src/app.py -w
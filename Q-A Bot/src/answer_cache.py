@@ -0,0 +1,136 @@
+import re, time, threading
+from collections import OrderedDict
+
+import numpy as np
+
+from vectors_quiz import unit_rows  # repository root, put on sys.path by qa_resources
+
+# Numbers / versions / standard names must match exactly between a question and
+# a cached one: "TLS 1.2" and "TLS 1.3" embed almost identically.
+_EXACT_TERM_RE = re.compile(r"[a-z]*\d[\w.\-]*")
+
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+# Question phrasing that does not change what is asked
+_STOPWORDS = frozenset("""
+a an and are as at be by can could do does explain define describe difference
+for from give how i in is it me of on or please s should tell that the their
+there these this those to use used was what when where which who why will with
+work works would you your
+""".split())
+
+
+def _exact_terms(question):
+    return frozenset(t.strip(".") for t in _EXACT_TERM_RE.findall(question.lower()))
+
+
+def _content_words(question):
+    """Non-stopword tokens, plural "s" stripped: "symmetric" / "asymmetric" or
+    "stateful" / "stateless" embed close together but must not share an answer."""
+    words = set()
+    for w in _WORD_RE.findall(question.lower()):
+        if w in _STOPWORDS:
+            continue
+        if len(w) > 3 and w.endswith("s") and not w.endswith("ss"):
+            w = w[:-1]
+        words.add(w)
+    return frozenset(words)
+
+
+def _match_key(question):
+    return _exact_terms(question), _content_words(question)
+
+
+class SemanticAnswerCache:
+    """
+    In-memory cache of answered questions keyed by question embedding.
+
+    `lookup(question, vector)` returns a prior (answer, citations) whose
+    question has cosine similarity >= `threshold` and the same content words
+    and numbers / version terms, so near-identical questions ("what is the CIA triad",
+    "explain CIA triad") skip retrieval and the LLM. Entries expire after
+    `ttl` seconds, the least recently used one is evicted when full, and
+    `clear()` is called after a re-ingest.
+    """
+
+    def __init__(self, threshold=0.9, maxsize=512, ttl=24 * 3600):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._matrix = None                 # (maxsize, dim) unit question vectors
+        self._used = np.zeros(maxsize, dtype=bool)
+        self._entries = OrderedDict()       # slot -> entry, least recently used first
+
+    def lookup(self, question, vector):
+        vec = unit_rows(vector)
+        now = time.monotonic()
+        with self._lock:
+            if self._entries and self._matrix is not None and self._matrix.shape[1] == vec.shape[0]:
+                sims = self._matrix @ vec
+                sims[~self._used] = -np.inf
+                terms = _match_key(question)
+                for slot in np.argsort(-sims)[:4]:
+                    slot = int(slot)
+                    if sims[slot] < self.threshold:
+                        break
+                    entry = self._entries[slot]
+                    if entry["expires"] <= now:
+                        self._drop(slot)
+                        continue
+                    if entry["terms"] != terms:
+                        continue
+                    self._entries.move_to_end(slot)
+                    self.hits += 1
+                    return {**entry, "similarity": float(sims[slot])}
+            self.misses += 1
+            return None
+
+    def put(self, question, vector, answer, cites):
+        if self.maxsize <= 0 or not answer:
+            return
+        vec = unit_rows(vector)
+        with self._lock:
+            if self._matrix is None or self._matrix.shape[1] != vec.shape[0]:
+                self._matrix = np.zeros((self.maxsize, vec.shape[0]), dtype=np.float32)
+                self._used[:] = False
+                self._entries.clear()
+            if len(self._entries) >= self.maxsize:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+            slot = int(np.argmin(self._used))
+            self._matrix[slot] = vec
+            self._used[slot] = True
+            self._entries[slot] = {
+                "question": question,
+                "answer": answer,
+                "cites": list(cites),
+                "terms": _match_key(question),
+                "expires": time.monotonic() + self.ttl if self.ttl > 0 else float("inf"),
+            }
+
+    def _drop(self, slot):
+        self._entries.pop(slot, None)
+        self._used[slot] = False
+
+    def clear(self, *_):
+        with self._lock:
+            self._entries.clear()
+            self._used[:] = False
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
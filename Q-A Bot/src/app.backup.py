@@ -1,42 +1,13 @@
 import os, json, time, asyncio
 import chainlit as cl
 from pathlib import Path
-from langchain_community.vectorstores import Chroma
-from langchain_community.document_loaders import PyPDFLoader, UnstructuredPowerPointLoader, DirectoryLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_community.llms import Ollama
-# Optional: llama-cpp fallback
-try:
-    from langchain_community.llms import LlamaCpp
-except Exception:
-    LlamaCpp = None
-
-PERSIST_DIR = os.environ.get("PERSIST_DIR", "db")
-TOP_K = int(os.environ.get("TOP_K", "4"))
-
-def get_embeddings():
-    # Local sentence-transformers
-    return HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-
-def get_llm():
-    # Local-first LLM
-    provider = os.environ.get("LLM_PROVIDER", "ollama")
-    if provider == "ollama":
-        return Ollama(model=os.environ.get("LLM_MODEL", "llama3"))
-    if provider == "llama-cpp" and LlamaCpp is not None:
-        return LlamaCpp(model_path=os.environ.get("LLAMA_CPP_MODEL", "models/llama-7b.gguf"))
-    # As a last resort (still local), fall back to simple template echo
-    class Dummy:
-        def __call__(self, prompt):
-            return "LLM unavailable. Retrieved context:\n" + prompt[:1200]
-    return Dummy()
-
-def get_retriever():
-    embeddings = get_embeddings()
-    vs = Chroma(persist_directory=PERSIST_DIR, embedding_function=embeddings)
-    return vs.as_retriever(search_kwargs={"k": TOP_K})
+
+# Long-lived embedder / vector store / LLM clients, shared by all sessions
+from qa_resources import (
+    get_llm, get_answer_cache, is_fallback_llm, embed_question, retrieve_by_vector, warm_up, health, format_health,
+)
+from llm_cache import invoke_cached, stream_cached  # repo root is on sys.path via qa_resources
 
 ANSWER_PROMPT = ChatPromptTemplate.from_template(
     """You are a strict, citation-first Network Security tutor.
@@ -51,7 +22,10 @@ Context:
 Answer with a concise explanation followed by a "Citations:" list.
 """)
 
-def synthesize_answer(llm, question, docs):
+# Stream answer tokens to the UI as the LLM writes them (0 = one message at the end)
+STREAM_ANSWERS = os.environ.get("STREAM_ANSWERS", "1") != "0"
+
+def build_answer_prompt(question, docs):
     context_parts = []
     cites = []
     for i, d in enumerate(docs):
@@ -61,22 +35,110 @@ def synthesize_answer(llm, question, docs):
         context_parts.append(d.page_content)
         cites.append(f"{fn}:{page}")
     context = "\n\n---\n\n".join(context_parts)
-    prompt = ANSWER_PROMPT.format(question=question, context=context)
-    result = llm(prompt.to_string()) if hasattr(llm, "__call__") else llm.invoke(prompt.to_string())  # support both
+    prompt = ANSWER_PROMPT.format_prompt(question=question, context=context)
+    return prompt.to_string(), list(dict.fromkeys(cites))
+
+def usable_answer(text):
+    """Only non-blank answers go into the LLM response cache."""
+    return bool(text and text.strip())
+
+def synthesize_answer(llm, question, docs):
+    prompt, cites = build_answer_prompt(question, docs)
+    result = invoke_cached(llm, prompt, usable_answer) if hasattr(llm, "invoke") else llm(prompt)  # support both
     if isinstance(result, dict) and "content" in result:
         text = result["content"]
     else:
-        text = str(result)
+        text = getattr(result, "content", None) or str(result)
     # Append citations if not present
     if "Citations:" not in text:
-        text += "\n\nCitations: " + ", ".join(list(dict.fromkeys(cites)))
+        text += "\n\nCitations: " + ", ".join(cites)
     return text
 
+async def astream_tokens(llm, prompt):
+    """
+    Yield the LLM's output tokens as they arrive. The blocking stream runs in
+    a worker thread, so other sessions' questions keep being served meanwhile.
+    """
+    if not hasattr(llm, "stream"):
+        result = await asyncio.to_thread(llm, prompt)
+        yield str(result)
+        return
+    loop = asyncio.get_running_loop()
+    tokens = asyncio.Queue()
+    done = object()
+
+    def pump():
+        try:
+            for chunk in stream_cached(llm, prompt, usable_answer):
+                text = chunk if isinstance(chunk, str) else getattr(chunk, "content", str(chunk))
+                loop.call_soon_threadsafe(tokens.put_nowait, text)
+        finally:
+            loop.call_soon_threadsafe(tokens.put_nowait, done)
+
+    fut = loop.run_in_executor(None, pump)
+    while True:
+        token = await tokens.get()
+        if token is done:
+            break
+        yield token
+    await fut  # re-raise LLM errors
+
+async def stream_answer(llm, question, docs):
+    """
+    Send the citations right away, then stream the answer into a second
+    message. Returns (answer, citations), or None if the LLM failed.
+    """
+    prompt, cites = build_answer_prompt(question, docs)
+    if cites:
+        await cl.Message(content="Citations: " + ", ".join(cites)).send()
+    msg = cl.Message(content="")
+    failed = False
+    try:
+        async for token in astream_tokens(llm, prompt):
+            await msg.stream_token(token)
+    except Exception as e:
+        failed = True
+        await msg.stream_token(f"\n\n[LLM error: {type(e).__name__}: {e}]")
+    await msg.send()
+    return None if failed else (msg.content, cites)
+
+async def send_cached_answer(hit):
+    if hit["cites"]:
+        await cl.Message(content="Citations: " + ", ".join(hit["cites"])).send()
+    note = f"\n\n_(Answer reused from the similar question: \"{hit['question']}\")_"
+    await cl.Message(content=hit["answer"] + note).send()
+
+@cl.on_chat_start
+async def start():
+    # First session of the process loads the models; later ones reuse them.
+    await asyncio.to_thread(warm_up)
+    info = await asyncio.to_thread(health)
+    if not info["ok"]:
+        await cl.Message(content="Setup problem: " + info["problem"] + "\n(Type /health for details.)").send()
+
 @cl.on_message
 async def main(message: cl.Message):
     question = message.content.strip()
-    retriever = get_retriever()
-    docs = retriever.get_relevant_documents(question)
+    if question == "/health":
+        await cl.Message(content=format_health(await asyncio.to_thread(health))).send()
+        return
+    # Near-identical question answered before: no retrieval, no LLM.
+    cache = get_answer_cache()
+    vector = await asyncio.to_thread(embed_question, question)
+    hit = cache.lookup(question, vector)
+    if hit is not None:
+        await send_cached_answer(hit)
+        return
+    docs = await asyncio.to_thread(retrieve_by_vector, vector)
     llm = get_llm()
-    answer = synthesize_answer(llm, question, docs)
+    # The fallback's "LLM unavailable" text must not outlive the outage.
+    cacheable = not is_fallback_llm(llm)
+    if STREAM_ANSWERS:
+        result = await stream_answer(llm, question, docs)
+        if result is not None and cacheable:
+            cache.put(question, vector, *result)
+        return
+    answer = await asyncio.to_thread(synthesize_answer, llm, question, docs)
+    if cacheable:
+        cache.put(question, vector, answer, [])
     await cl.Message(content=answer).send()
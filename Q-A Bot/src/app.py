@@ -1,27 +1,34 @@
-import os, traceback
+import asyncio, traceback
 import chainlit as cl
 from pathlib import Path
 
-from langchain_chroma import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
+# Long-lived embedder / vector store clients, shared by all sessions and
+# reopened automatically after a re-ingest (see qa_resources.py)
+from qa_resources import get_answer_cache, embed_question, retrieve_by_vector, warm_up, health, format_health
 
-PERSIST_DIR = os.environ.get("PERSIST_DIR", "db")
-TOP_K = int(os.environ.get("TOP_K", "4"))
-
-def get_retriever():
-    vs = Chroma(
-        persist_directory=PERSIST_DIR,
-        embedding_function=HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2"),
-    )
-    return vs.as_retriever(search_kwargs={"k": TOP_K})
+@cl.on_chat_start
+async def start():
+    # First session of the process loads the models; later ones reuse them.
+    await asyncio.to_thread(warm_up, ["embeddings", "vectorstore"])
+    info = await asyncio.to_thread(health, False)
+    if not info["ok"]:
+        await cl.Message(content="Setup problem: " + info["problem"] + "\n(Type /health for details.)").send()
 
 @cl.on_message
 async def main(message: cl.Message):
     try:
         q = message.content.strip()
-        retriever = get_retriever()
-        # LC 0.2+ uses .invoke(query)
-        docs = retriever.invoke(q)
+        if q == "/health":
+            await cl.Message(content=format_health(await asyncio.to_thread(health, False))).send()
+            return
+        # Near-identical question answered before: reuse it, skip retrieval.
+        cache = get_answer_cache()
+        vector = await asyncio.to_thread(embed_question, q)
+        hit = cache.lookup(q, vector)
+        if hit is not None:
+            await cl.Message(content=hit["answer"]).send()
+            return
+        docs = await asyncio.to_thread(retrieve_by_vector, vector)
 
         parts = []
         cites = []
@@ -39,6 +46,7 @@ async def main(message: cl.Message):
             return
 
         answer = "Here’s what I found locally:\n\n" + "\n\n".join(parts[:3]) + "\n\nCitations: " + ", ".join(dict.fromkeys(cites))[:1000]
+        cache.put(q, vector, answer, [])
         await cl.Message(content=answer).send()
 
     except Exception as e:
@@ -1,43 +1,46 @@
-import os, argparse
+import os, sys, argparse
 from pathlib import Path
-from langchain_community.document_loaders import DirectoryLoader, PyPDFLoader, UnstructuredPowerPointLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import HuggingFaceEmbeddings
 
-def load_docs(data_dir: str):
-    data_path = Path(data_dir)
-    docs = []
-    # PDFs
-    for pdf in list(data_path.glob("**/*.pdf")):
-        loader = PyPDFLoader(str(pdf))
-        docs.extend(loader.load())
-    # PPTX
-    for ppt in list(data_path.glob("**/*.pptx")):
-        loader = UnstructuredPowerPointLoader(str(ppt))
-        docs.extend(loader.load())
-    return docs
+# The Q-A Bot and the Quiz Agent share one corpus: this runs the same
+# incremental ingest as ../../ingest_quiz.py into the shared vector DB
+# (see corpus_store.py); the bot reads its PDF/PPTX view of it.
+REPO_ROOT = Path(__file__).resolve().parents[2]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+import ingest_pipeline
+import ingest_quiz
+from corpus_store import CORPUS_DATA_DIR, CORPUS_DIR
 
 def main():
-    ap = argparse.ArgumentParser()
-    ap.add_argument("--data_dir", default="data")
-    ap.add_argument("--persist_dir", default="db")
-    ap.add_argument("--chunk_size", type=int, default=1000)
-    ap.add_argument("--chunk_overlap", type=int, default=100)
+    ap = argparse.ArgumentParser(description="Build/update the shared vector DB used by the Q-A Bot and the Quiz Agent.")
+    ap.add_argument("--data_dir", default=CORPUS_DATA_DIR, help="course files (shared with the Quiz Agent)")
+    ap.add_argument("--persist_dir", default=os.environ.get("PERSIST_DIR", CORPUS_DIR))
+    ap.add_argument("--rebuild", action="store_true", help="re-embed every file")
+    ap.add_argument("--workers", type=int, default=0, help="parser processes, 0 = one per spare core")
+    ap.add_argument("--batch_size", type=int, default=ingest_pipeline.DEFAULT_BATCH_SIZE, help="chunks embedded per batch")
+    # Chunking is shared with the Quiz Agent (config_quiz.py); a different
+    # value rebuilds the shared collection for both apps.
+    ap.add_argument("--chunk_size", type=int, default=None, help="default: CHUNK_SIZE in config_quiz.py")
+    ap.add_argument("--chunk_overlap", type=int, default=None, help="default: CHUNK_OVERLAP in config_quiz.py")
     ap.add_argument("--max_docs", type=int, default=0, help="0 = all")
     args = ap.parse_args()
 
-    docs = load_docs(args.data_dir)
-    if args.max_docs and len(docs) > args.max_docs:
-        docs = docs[:args.max_docs]
-
-    splitter = RecursiveCharacterTextSplitter(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap)
-    chunks = splitter.split_documents(docs)
-
-    embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-    vs = Chroma.from_documents(chunks, embedding=embeddings, persist_directory=args.persist_dir)
-    vs.persist()
-    print(f"Ingested {len(chunks)} chunks into {args.persist_dir}")
+    argv = [
+        "--data-dir", args.data_dir,
+        "--db-dir", args.persist_dir,
+        "--workers", str(args.workers),
+        "--batch-size", str(args.batch_size),
+    ]
+    if args.chunk_size is not None:
+        argv += ["--chunk-size", str(args.chunk_size)]
+    if args.chunk_overlap is not None:
+        argv += ["--chunk-overlap", str(args.chunk_overlap)]
+    if args.max_docs:
+        argv += ["--max-docs", str(args.max_docs)]
+    if args.rebuild:
+        argv.append("--rebuild")
+    ingest_quiz.main(argv)
 
 if __name__ == "__main__":
     main()
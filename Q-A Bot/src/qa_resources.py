@@ -0,0 +1,184 @@
+import os, sys, time, json, urllib.request
+from pathlib import Path
+
+# Shared helpers live at the repository root (resource_registry.py, embedding_cache.py, llm_cache.py, corpus_store.py)
+REPO_ROOT = Path(__file__).resolve().parents[2]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from resource_registry import ResourceRegistry, read_ingest_stamp
+from embedding_cache import cached_embeddings
+from llm_cache import cached_llm
+from corpus_store import CORPUS_DIR, COLLECTION_NAME, EMBEDDING_CACHE_FILE, LLM_CACHE_FILE, open_corpus, view_filter, view_count
+from answer_cache import SemanticAnswerCache
+
+# The shared corpus written by ingest.py / ingest_quiz.py; the bot only sees
+# its view of it (PDF and PPTX chunks).
+PERSIST_DIR = os.environ.get("PERSIST_DIR", CORPUS_DIR)
+COLLECTION = COLLECTION_NAME
+VIEW_FILTER = view_filter("qa")
+TOP_K = int(os.environ.get("TOP_K", "4"))
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+EMBEDDING_CACHE_PATH = os.environ.get("EMBEDDING_CACHE_PATH", EMBEDDING_CACHE_FILE)
+OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
+# '' disables the cache; policy: auto | always | variants | off
+LLM_CACHE_PATH = os.environ.get("LLM_CACHE_PATH", LLM_CACHE_FILE)
+LLM_CACHE_POLICY = os.environ.get("LLM_CACHE_POLICY", "auto")
+LLM_CACHE_VARIANTS = int(os.environ.get("LLM_CACHE_VARIANTS", "1"))
+# Semantic answer cache: reuse the answer of a near-identical earlier question
+ANSWER_CACHE_THRESHOLD = float(os.environ.get("ANSWER_CACHE_THRESHOLD", "0.9"))
+ANSWER_CACHE_SIZE = int(os.environ.get("ANSWER_CACHE_SIZE", "512"))  # 0 disables it
+ANSWER_CACHE_TTL = float(os.environ.get("ANSWER_CACHE_TTL", str(24 * 3600)))
+
+# One embedder, one Chroma handle and one LLM client per process, shared by
+# every chat session. The vector store is reopened automatically when
+# ingest.py writes a new stamp to PERSIST_DIR (hot reload).
+_registry = ResourceRegistry(watch_dir=PERSIST_DIR, check_interval=2.0)
+
+
+def _build_embeddings():
+    try:
+        from langchain_huggingface import HuggingFaceEmbeddings
+    except ImportError:
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+    return cached_embeddings(HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL), EMBEDDING_MODEL, EMBEDDING_CACHE_PATH)
+
+
+def _build_vectorstore():
+    return open_corpus(get_embeddings(), PERSIST_DIR, COLLECTION)
+
+
+def _build_llm():
+    # Local-first LLM
+    provider = os.environ.get("LLM_PROVIDER", "ollama")
+    if provider == "ollama":
+        from langchain_community.llms import Ollama
+        model = os.environ.get("LLM_MODEL", "llama3")
+        return cached_llm(Ollama(model=model, base_url=OLLAMA_HOST), model, LLM_CACHE_PATH, LLM_CACHE_POLICY, LLM_CACHE_VARIANTS)
+    if provider == "llama-cpp":
+        try:
+            from langchain_community.llms import LlamaCpp
+        except Exception:
+            LlamaCpp = None
+        if LlamaCpp is not None:
+            model_path = os.environ.get("LLAMA_CPP_MODEL", "models/llama-7b.gguf")
+            return cached_llm(LlamaCpp(model_path=model_path), model_path, LLM_CACHE_PATH, LLM_CACHE_POLICY, LLM_CACHE_VARIANTS)
+    # As a last resort (still local), fall back to simple template echo
+    class Dummy:
+        fallback = True  # its output is an outage notice, never cached
+
+        def __call__(self, prompt):
+            return "LLM unavailable. Retrieved context:\n" + prompt[:1200]
+    return Dummy()
+
+
+def _build_answer_cache():
+    cache = SemanticAnswerCache(ANSWER_CACHE_THRESHOLD, ANSWER_CACHE_SIZE, ANSWER_CACHE_TTL)
+    # Answers were built from the old material; drop them after a re-ingest.
+    _registry.add_listener(cache.clear)
+    return cache
+
+
+_registry.register("embeddings", _build_embeddings)
+_registry.register("vectorstore", _build_vectorstore, reload_on_ingest=True)
+_registry.register("llm", _build_llm)
+_registry.register("answer_cache", _build_answer_cache)
+
+
+def get_embeddings():
+    return _registry.get("embeddings")
+
+
+def get_vectorstore():
+    return _registry.get("vectorstore")
+
+
+def get_retriever(k=TOP_K):
+    return get_vectorstore().as_retriever(search_kwargs={"k": k, "filter": VIEW_FILTER})
+
+
+def get_llm():
+    return _registry.get("llm")
+
+
+def get_answer_cache():
+    return _registry.get("answer_cache")
+
+
+def is_fallback_llm(llm):
+    """True for the echo stand-in used when no real LLM could be loaded."""
+    return getattr(llm, "fallback", False)
+
+
+def embed_question(question):
+    return get_embeddings().embed_query(question)
+
+
+def retrieve_by_vector(vector, k=TOP_K):
+    """Top-k chunks for an already embedded question (no second embedding call)."""
+    return get_vectorstore().similarity_search_by_vector(vector, k=k, filter=VIEW_FILTER)
+
+
+def warm_up(names=None):
+    """Load the embedder and open the vector store (and LLM client) once per process."""
+    _registry.warm_up(names)
+
+
+def on_reload(cb):
+    """Call cb(generation) whenever db/ was re-ingested and the store reopened."""
+    _registry.add_listener(cb)
+
+
+def current_generation():
+    _registry.check_for_reingest()
+    return _registry.generation
+
+
+def _ollama_reachable():
+    try:
+        with urllib.request.urlopen(OLLAMA_HOST.rstrip("/") + "/api/tags", timeout=2) as resp:
+            models = [m.get("name", "") for m in json.load(resp).get("models", [])]
+        return True, models
+    except Exception as e:
+        return False, str(e)
+
+
+def health(check_llm=True):
+    """Status of the shared clients, for on_chat_start and the /health command."""
+    info = {
+        "persist_dir": PERSIST_DIR,
+        "collection": COLLECTION,
+        "ingested": read_ingest_stamp(PERSIST_DIR) is not None,
+        "generation": current_generation(),
+        "embeddings_loaded": _registry.is_loaded("embeddings"),
+        "vectorstore_loaded": _registry.is_loaded("vectorstore"),
+        "ok": True,
+    }
+    try:
+        start = time.perf_counter()
+        vs = get_vectorstore()
+        info["chunks"] = view_count(vs, "qa")
+        info["vectorstore_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        if not info["chunks"]:
+            info["ok"] = False
+            info["problem"] = "vector store is empty; run ingest.py"
+    except Exception as e:
+        info["ok"] = False
+        info["problem"] = f"vector store unavailable: {type(e).__name__}: {e}"
+    if _registry.is_loaded("answer_cache"):
+        info["answer_cache"] = get_answer_cache().stats()
+    if check_llm and os.environ.get("LLM_PROVIDER", "ollama") == "ollama":
+        reachable, detail = _ollama_reachable()
+        info["llm_reachable"] = reachable
+        if not reachable:
+            info["ok"] = False
+            info.setdefault("problem", f"Ollama not reachable at {OLLAMA_HOST}: {detail}")
+    return info
+
+
+def format_health(info):
+    lines = [f"{'OK' if info['ok'] else 'PROBLEM'}: {info.get('problem', 'all clients ready')}"]
+    for key in ("persist_dir", "collection", "chunks", "generation", "embeddings_loaded", "vectorstore_loaded", "vectorstore_ms", "llm_reachable", "answer_cache"):
+        if key in info:
+            lines.append(f"- {key}: {info[key]}")
+    return "\n".join(lines)
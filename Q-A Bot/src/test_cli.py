@@ -1,14 +1,9 @@
 import sys
-from langchain_chroma import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
+from qa_resources import embed_question, retrieve_by_vector
 
 def main(q):
-    vs = Chroma(
-        persist_directory="db",
-        embedding_function=HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2"),
-    )
-    # New retriever API prefers .invoke(...) or use vectorstore.similarity_search
-    docs = vs.similarity_search(q, k=4)
+    # Same shared vector DB and PDF/PPTX view as the chat app
+    docs = retrieve_by_vector(embed_question(q), k=4)
     print(f"Retrieved {len(docs)} docs:")
     for d in docs:
         meta = d.metadata or {}
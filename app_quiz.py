@@ -1,14 +1,111 @@
 # app_quiz.py
 # Chainlit UI for Network Security Quiz Agent (QUIZ ONLY, separate from Q&A)
 
+import asyncio
+import threading
+from typing import Optional
+
 import chainlit as cl
 
+from config_quiz import WARM_UP_ON_START, QUIZ_POOL_ENABLED, STREAM_QUIZ_GENERATION
 from quiz_core import (
-    generate_random_quiz,
-    generate_topic_quiz,
-    grade_quiz,
+    Question,
+    Quiz,
+    agenerate_random_quiz,
+    agenerate_topic_quiz,
+    agrade_quiz,
+    astream_quiz_questions,
 )
-from run_quiz import save_report
+from report_quiz import save_report
+from retrieval_quiz import warm_up
+
+# Every quiz in the app: 2 MCQ, 2 TF, 1 open-ended
+QUIZ_MIX = (2, 2, 1)
+
+if QUIZ_POOL_ENABLED:
+    # Serve pre-generated quizzes from pool/ and refill it in the background.
+    from pool_quiz import get_quiz_pool
+
+    get_quiz_pool()
+
+if WARM_UP_ON_START:
+    # Load the embedder and open Chroma while Chainlit boots, so the first
+    # quiz does not pay for it.
+    threading.Thread(target=warm_up, name="quiz-warm-up", daemon=True).start()
+
+
+class LiveQuiz:
+    """
+    A quiz whose questions may still be arriving from the LLM. With
+    streaming generation the student answers Q1 while later questions are
+    being written; `question(i)` waits only if question i isn't there yet.
+    """
+
+    def __init__(self, quiz: Quiz, stream=None):
+        self.quiz = quiz
+        self.error: Optional[Exception] = None
+        self._changed = asyncio.Event()
+        self._task = asyncio.create_task(self._consume(stream)) if stream else None
+
+    async def _consume(self, stream) -> None:
+        try:
+            async for q in stream:
+                self.quiz.questions.append(q)
+                self._changed.set()
+        except Exception as e:
+            self.error = e
+            print(f"Quiz generation failed: {e}")
+        finally:
+            self._changed.set()
+
+    def _pending(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def question(self, index: int) -> Optional[Question]:
+        while index >= len(self.quiz.questions) and self._pending():
+            self._changed.clear()
+            if index < len(self.quiz.questions) or not self._pending():
+                break
+            await self._changed.wait()
+        if index < len(self.quiz.questions):
+            return self.quiz.questions[index]
+        return None
+
+
+async def start_quiz(topic: Optional[str]) -> LiveQuiz:
+    """Pooled quiz if one is ready, otherwise generate (streaming by default)."""
+    if QUIZ_POOL_ENABLED:
+        quiz = await asyncio.to_thread(get_quiz_pool().take, topic, QUIZ_MIX)
+        if quiz is not None:
+            return LiveQuiz(quiz)
+
+    if STREAM_QUIZ_GENERATION:
+        return LiveQuiz(Quiz(questions=[]), astream_quiz_questions(topic, *QUIZ_MIX))
+
+    if topic:
+        quiz = await agenerate_topic_quiz(topic, *QUIZ_MIX)
+    else:
+        quiz = await agenerate_random_quiz(*QUIZ_MIX)
+    return LiveQuiz(quiz)
+
+
+async def begin_asking(live: LiveQuiz) -> None:
+    first = await live.question(0)
+    if first is None:
+        cl.user_session.set("state", "choose_mode")
+        await cl.Message(
+            " Sorry, I couldn't generate a quiz this time. Reply `1` or `2` to try again."
+        ).send()
+        return
+
+    cl.user_session.set("live_quiz", live)
+    cl.user_session.set("quiz", live.quiz)
+    cl.user_session.set("answers", {})
+    cl.user_session.set("index", 0)
+    cl.user_session.set("state", "asking")
+
+    await cl.Message(" Quiz ready! Let's begin.").send()
+    await cl.Message(format_question(first)).send()
 
 
 def format_question(q) -> str:
@@ -24,6 +121,7 @@ def format_question(q) -> str:
 async def start_chat():
     cl.user_session.set("state", "choose_mode")
     cl.user_session.set("quiz", None)
+    cl.user_session.set("live_quiz", None)
     cl.user_session.set("answers", {})
     cl.user_session.set("index", 0)
 
@@ -62,36 +160,20 @@ async def handle_message(msg: cl.Message):
             return
 
         await cl.Message(" Generating **Random Quiz** from local materials...").send()
-        quiz = generate_random_quiz(2, 2, 1)
-        cl.user_session.set("quiz", quiz)
-        cl.user_session.set("answers", {})
-        cl.user_session.set("index", 0)
-        cl.user_session.set("state", "asking")
-
-        await cl.Message(" Quiz ready! Let's begin.").send()
-        first = quiz.questions[0]
-        await cl.Message(format_question(first)).send()
+        await begin_asking(await start_quiz(None))
         return
 
     # ---------- TOPIC SELECTION ----------
     if state == "choose_topic":
         topic = content
         await cl.Message(f" Generating **Topic Quiz** on `{topic}`...").send()
-
-        quiz = generate_topic_quiz(topic, 2, 2, 1)
-        cl.user_session.set("quiz", quiz)
-        cl.user_session.set("answers", {})
-        cl.user_session.set("index", 0)
-        cl.user_session.set("state", "asking")
-
-        await cl.Message(" Quiz ready! Let's begin.").send()
-        first = quiz.questions[0]
-        await cl.Message(format_question(first)).send()
+        await begin_asking(await start_quiz(topic))
         return
 
     # ---------- ASKING QUESTIONS ----------
     if state == "asking":
-        quiz = cl.user_session.get("quiz")
+        live = cl.user_session.get("live_quiz")
+        quiz = live.quiz
         answers = cl.user_session.get("answers")
         index = cl.user_session.get("index", 0)
 
@@ -102,14 +184,14 @@ async def handle_message(msg: cl.Message):
         index += 1
         cl.user_session.set("index", index)
 
-        if index < len(quiz.questions):
-            next_q = quiz.questions[index]
+        next_q = await live.question(index)
+        if next_q is not None:
             await cl.Message(format_question(next_q)).send()
             return
 
         # ---------- GRADING ----------
         await cl.Message(" Grading your quiz...").send()
-        grade_info = grade_quiz(quiz, answers)
+        grade_info = await agrade_quiz(quiz, answers)
 
         await send_results(grade_info)
 
@@ -0,0 +1,293 @@
+# batch_generate_quiz.py
+# Non-interactive batch quiz generation (quiz banks for a whole course)
+#
+# Takes a list of topics (and/or a number of random quizzes), runs retrieval
+# + LLM generation for each job with a bounded number of quizzes in flight
+# against the local Ollama, and streams every finished quiz to the output:
+#
+#   *.jsonl  one {"job", "topic", "mix", "quiz_id", "created", "quiz"} line per quiz
+#   *.qz     binary quiz store (store_quiz.py)
+#
+# Finished jobs are recorded in <out>.jobs.jsonl, so an interrupted or
+# partly failed run picks up where it stopped when started again with the
+# same arguments (failed jobs are retried).
+#
+#   python batch_generate_quiz.py --topics "TLS,firewalls,VPN" --count 50 --out banks/netsec.jsonl
+#   python batch_generate_quiz.py --topics-file course_topics.txt --random 200 --out banks/netsec.qz
+#
+# A topics file has one topic per line, optionally followed by a tab and a
+# per-topic count; lines starting with # are ignored.
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Set, Tuple
+
+import quiz_core
+from config_quiz import DEFAULT_NUM_MCQ, DEFAULT_NUM_TF, DEFAULT_NUM_OPEN, GENERATION_CONCURRENCY
+from quiz_core import Quiz, generate_random_quiz, generate_topic_quiz, quiz_to_dict
+from store_quiz import QuizStore, encode_quiz, quiz_id_for
+
+Mix = Tuple[int, int, int]
+# (job key, topic or None for a random quiz)
+Job = Tuple[str, Optional[str]]
+
+
+# ============ JOBS ============
+
+def read_topics_file(path: str, default_count: int) -> List[Tuple[str, int]]:
+    topics: List[Tuple[str, int]] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            topic, _, count = line.partition("\t")
+            topics.append((topic.strip(), int(count) if count.strip() else default_count))
+    return topics
+
+
+def plan_jobs(topics: List[Tuple[str, int]], num_random: int, mix: Mix) -> List[Job]:
+    """Deterministic job keys, so a re-run can tell which quizzes already exist."""
+    mix_part = "-".join(str(n) for n in mix)
+    jobs: List[Job] = []
+    for topic, count in topics:
+        jobs.extend((f"topic:{topic}#{i}@{mix_part}", topic) for i in range(count))
+    jobs.extend((f"random#{i}@{mix_part}", None) for i in range(num_random))
+    return jobs
+
+
+def jobs_log_path(out: str) -> str:
+    return out + ".jobs.jsonl"
+
+
+def load_done_jobs(out: str) -> Set[str]:
+    done: Set[str] = set()
+    try:
+        with open(jobs_log_path(out), "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn last line after a crash
+                if entry.get("quiz_id"):
+                    done.add(entry["job"])
+    except FileNotFoundError:
+        pass
+    return done
+
+
+# ============ OUTPUT ============
+
+class QuizSink:
+    """Appends finished quizzes to a JSONL file or a binary quiz store."""
+
+    def __init__(self, out: str):
+        os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+        self.store: Optional[QuizStore] = None
+        self.file = None
+        if out.endswith(".qz"):
+            self.store = QuizStore(out)
+        else:
+            _drop_torn_line(out)
+            self.file = open(out, "a", encoding="utf-8")
+        _drop_torn_line(jobs_log_path(out))
+        self.log = open(jobs_log_path(out), "a", encoding="utf-8")
+
+    def write(self, job: Job, mix: Mix, quiz: Quiz, seconds: float) -> str:
+        key, topic = job
+        created = time.time()
+        if self.store is not None:
+            quiz_id = self.store.put(quiz, created)
+        else:
+            quiz_id = quiz_id_for(encode_quiz(quiz))
+            line = {
+                "job": key,
+                "topic": topic,
+                "mix": list(mix),
+                "quiz_id": quiz_id,
+                "created": created,
+                "quiz": quiz_to_dict(quiz),
+            }
+            self.file.write(json.dumps(line, ensure_ascii=False) + "\n")
+            self.file.flush()
+        self._log({"job": key, "quiz_id": quiz_id, "seconds": round(seconds, 2)})
+        return quiz_id
+
+    def failed(self, job: Job, error: str) -> None:
+        self._log({"job": job[0], "error": error})
+
+    def _log(self, entry: Dict) -> None:
+        self.log.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.log.flush()
+
+    def close(self) -> None:
+        if self.store is not None:
+            self.store.close()
+        if self.file is not None:
+            self.file.close()
+        self.log.close()
+
+
+def _drop_torn_line(path: str) -> None:
+    """Cut a partly written last line (crash mid-write) before appending."""
+    try:
+        with open(path, "rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+    except FileNotFoundError:
+        pass
+
+
+# ============ GENERATION ============
+
+def _generate(job: Job, mix: Mix, retries: int) -> Tuple[Quiz, float]:
+    _, topic = job
+    start = time.perf_counter()
+    error = ""
+    for _ in range(retries + 1):
+        try:
+            if topic is None:
+                quiz = generate_random_quiz(*mix)
+            else:
+                quiz = generate_topic_quiz(topic, *mix)
+            if quiz.questions:
+                return quiz, time.perf_counter() - start
+            error = "no valid questions in LLM output"
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+    raise RuntimeError(error)
+
+
+def run_batch(jobs: List[Job], mix: Mix, out: str, workers: int, retries: int) -> Dict[str, float]:
+    sink = QuizSink(out)
+    total = len(jobs)
+    done = failed = questions = 0
+    busy_seconds = 0.0
+    start = time.perf_counter()
+    pending = iter(jobs)
+    in_flight: Dict[Future, Job] = {}
+
+    def submit_next(pool: ThreadPoolExecutor) -> None:
+        job = next(pending, None)
+        if job is not None:
+            in_flight[pool.submit(_generate, job, mix, retries)] = job
+
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch-gen")
+    try:
+        # Keep only `workers` quizzes in flight: bounded load on Ollama, and
+        # Ctrl-C leaves at most that many unfinished jobs.
+        for _ in range(workers):
+            submit_next(pool)
+        while in_flight:
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                job = in_flight.pop(fut)
+                try:
+                    quiz, seconds = fut.result()
+                except Exception as e:
+                    failed += 1
+                    sink.failed(job, str(e))
+                    print(f"[{done + failed}/{total}] {job[0]} FAILED: {e}")
+                else:
+                    sink.write(job, mix, quiz, seconds)
+                    done += 1
+                    questions += len(quiz.questions)
+                    busy_seconds += seconds
+                    elapsed = time.perf_counter() - start
+                    rate = done / elapsed * 60
+                    remaining = total - done - failed
+                    eta = remaining / (done / elapsed) if done else 0.0
+                    print(
+                        f"[{done + failed}/{total}] {job[0]}: {len(quiz.questions)} questions "
+                        f"in {seconds:.1f}s | {rate:.1f} quizzes/min, ETA {eta / 60:.1f} min"
+                    )
+                submit_next(pool)
+    except KeyboardInterrupt:
+        print("\nInterrupted; finished quizzes are saved. Re-run the same command to resume.")
+        for fut in in_flight:
+            fut.cancel()
+    finally:
+        pool.shutdown(wait=False)
+        sink.close()
+
+    elapsed = time.perf_counter() - start
+    return {
+        "quizzes": done,
+        "failed": failed,
+        "questions": questions,
+        "seconds": elapsed,
+        "quizzes_per_min": done / elapsed * 60 if elapsed else 0.0,
+        "mean_quiz_seconds": busy_seconds / done if done else 0.0,
+    }
+
+
+# ============ MAIN ============
+
+def _parse_mix(text: str) -> Mix:
+    parts = [int(p) for p in text.split(",")]
+    if len(parts) != 3 or min(parts) < 0 or sum(parts) == 0:
+        raise argparse.ArgumentTypeError("expected MCQ,TF,OPEN counts, e.g. 2,2,1")
+    return parts[0], parts[1], parts[2]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Generate quiz banks offline (non-interactive).")
+    ap.add_argument("--topics", default="", help="Comma-separated topics.")
+    ap.add_argument("--topics-file", help="One topic per line (optionally: topic<TAB>count).")
+    ap.add_argument("--count", type=int, default=10, help="Quizzes per topic.")
+    ap.add_argument("--random", type=int, default=0, help="Random (whole-corpus) quizzes.")
+    ap.add_argument(
+        "--mix",
+        type=_parse_mix,
+        default=(DEFAULT_NUM_MCQ, DEFAULT_NUM_TF, DEFAULT_NUM_OPEN),
+        help="Questions per quiz as MCQ,TF,OPEN.",
+    )
+    ap.add_argument("--out", default="banks/quizzes.jsonl", help="*.jsonl or *.qz (binary quiz store).")
+    ap.add_argument("--workers", type=int, default=GENERATION_CONCURRENCY, help="Quizzes generated at once.")
+    ap.add_argument("--retries", type=int, default=1, help="Extra attempts per quiz within a run.")
+    ap.add_argument(
+        "--use-llm-cache",
+        action="store_true",
+        help="Allow cached LLM responses (off by default: a bank wants distinct quizzes).",
+    )
+    args = ap.parse_args(argv)
+
+    topics = [(t.strip(), args.count) for t in args.topics.split(",") if t.strip()]
+    if args.topics_file:
+        topics += read_topics_file(args.topics_file, args.count)
+    jobs = plan_jobs(topics, args.random, args.mix)
+    if not jobs:
+        ap.error("nothing to do: give --topics, --topics-file and/or --random")
+
+    already = load_done_jobs(args.out)
+    todo = [job for job in jobs if job[0] not in already]
+    print(
+        f"{len(jobs)} quizzes planned, {len(jobs) - len(todo)} already in {args.out}, "
+        f"{len(todo)} to generate with {args.workers} worker(s)."
+    )
+    if not todo:
+        return
+
+    quiz_core.ECHO_RAW_LLM_RESPONSE = False
+    if not args.use_llm_cache:
+        quiz_core.LLM_CACHE_POLICY = "off"
+    stats = run_batch(todo, args.mix, args.out, max(1, args.workers), max(0, args.retries))
+
+    print(
+        f"\nDone: {stats['quizzes']} quizzes ({stats['questions']} questions), "
+        f"{stats['failed']} failed, in {stats['seconds']:.0f}s: "
+        f"{stats['quizzes_per_min']:.1f} quizzes/min, {stats['mean_quiz_seconds']:.1f}s per quiz."
+    )
+    cache = quiz_core.llm_cache_stats()
+    if cache:
+        print(f"LLM cache: {cache['hits']} hits, {cache['misses']} misses, {cache['saved_seconds']}s saved.")
+    if stats["failed"]:
+        print("Re-run the same command to retry the failed quizzes.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+# batch_grade_quiz.py
+# Vectorized grading of many submissions against one quiz (whole-class regrades)
+#
+# Scores are identical to quiz_core.grade_quiz. The answer key (normalized
+# MCQ/TF answers, token sets of the model answers) is built once per quiz.
+# Each question column is factorized: every distinct answer string gets an
+# integer code and is graded once, then scores/outcomes for all N submissions
+# are gathered with NumPy fancy indexing. A class of thousands mostly gives
+# the same few MCQ/TF answers, so the Python work scales with the number of
+# distinct answers rather than with N. Results stay columnar
+# (N submissions x Q questions) instead of one dict per answer.
+#
+# With mode="semantic" (default: OPEN_GRADING_MODE) the distinct open answers
+# of all columns are embedded in one batch and scored by cosine similarity
+# (see semantic_grade_quiz.py), matching grade_quiz in that mode.
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config_quiz import OPEN_GRADING_MODE
+from quiz_core import Question, Quiz
+
+# Outcome codes stored in BatchGrades.outcome
+NO_ANSWER = 0
+CORRECT = 1
+INCORRECT = 2
+OPEN_CLOSE = 3       # similarity >= 0.9, full credit
+OPEN_PARTIAL = 4     # similarity >= 0.5, half credit
+OPEN_FAR = 5         # similarity < 0.5
+SEMANTIC_CLOSE = 6   # cosine >= SEMANTIC_FULL_THRESHOLD
+SEMANTIC_PARTIAL = 7
+SEMANTIC_FAR = 8
+
+OPEN_FULL_THRESHOLD = 0.9
+OPEN_PARTIAL_THRESHOLD = 0.5
+
+
+def _tokens(text: str) -> List[str]:
+    return text.replace(",", " ").split()
+
+
+# ============ ANSWER KEY ============
+
+class AnswerKey:
+    """
+    Everything grading needs from a quiz, precomputed once:
+    the normalized MCQ/TF answer and the model-answer token set of each
+    question. Reuse one key for every batch graded against the same quiz.
+    """
+
+    def __init__(self, quiz: Quiz):
+        self.quiz = quiz
+        self.questions: List[Question] = list(quiz.questions)
+        self.question_ids: List[int] = [q.id for q in self.questions]
+        self.qtypes: List[str] = [q.qtype for q in self.questions]
+
+        # Per question: normalized answer (mcq/tf) or frozenset of tokens (open)
+        self.expected: List[Any] = []
+        for q in self.questions:
+            correct = (q.correct_answer or "").strip()
+            if q.qtype == "mcq":
+                self.expected.append(correct.strip().lower().replace(".", ""))
+            elif q.qtype == "tf":
+                self.expected.append(correct.lower())
+            else:
+                self.expected.append(frozenset(_tokens(correct.lower())))
+
+    def __len__(self) -> int:
+        return len(self.questions)
+
+    def grade_answer(self, j: int, answer: str) -> Tuple[float, int, float]:
+        """(score, outcome code, similarity) for one stripped answer to question j."""
+        qtype = self.qtypes[j]
+        expected = self.expected[j]
+
+        if qtype == "mcq":
+            given = answer.lower().replace(".", "")
+            if given == expected:
+                return 1.0, CORRECT, np.nan
+            return 0.0, (INCORRECT if given else NO_ANSWER), np.nan
+
+        if qtype == "tf":
+            given = answer.lower()
+            if (given in ("true", "t") and expected == "true") or (
+                given in ("false", "f") and expected == "false"
+            ):
+                return 1.0, CORRECT, np.nan
+            return 0.0, (INCORRECT if given else NO_ANSWER), np.nan
+
+        given = answer.lower()
+        if not given:
+            return 0.0, NO_ANSWER, np.nan
+        similarity = len(expected.intersection(_tokens(given))) / len(expected) if expected else 0.0
+        if similarity >= OPEN_FULL_THRESHOLD:
+            return 1.0, OPEN_CLOSE, similarity
+        if similarity >= OPEN_PARTIAL_THRESHOLD:
+            return 0.5, OPEN_PARTIAL, similarity
+        return 0.0, OPEN_FAR, similarity
+
+    def is_open(self, j: int) -> bool:
+        return self.qtypes[j] not in ("mcq", "tf")
+
+
+# ============ RESULTS ============
+
+@dataclass
+class BatchGrades:
+    """
+    Columnar grading results for N submissions x Q questions.
+
+    scores, outcome and similarity are (N, Q) arrays in quiz question order
+    (similarity is NaN for MCQ/TF and blank answers); total_score and
+    percentage are (N,). Answers are stored factorized: answer_codes[i, j]
+    indexes into distinct_answers[j]. Use `result(i)` to get submission i in
+    the grade_quiz dict format.
+    """
+
+    key: AnswerKey
+    answer_codes: np.ndarray             # (N, Q) int32
+    distinct_answers: List[List[str]]    # per question, stripped answers
+    scores: np.ndarray                   # (N, Q) float32
+    outcome: np.ndarray                  # (N, Q) int8, see outcome codes above
+    similarity: np.ndarray               # (N, Q) float64
+    total_score: np.ndarray              # (N,)
+    max_score: float
+    percentage: np.ndarray               # (N,)
+
+    def __len__(self) -> int:
+        return self.scores.shape[0]
+
+    def answer(self, i: int, j: int) -> str:
+        return self.distinct_answers[j][self.answer_codes[i, j]]
+
+    def question_means(self) -> Dict[int, float]:
+        """Average score per question id (item difficulty across the class)."""
+        if not len(self):
+            return {}
+        means = self.scores.mean(axis=0)
+        return {qid: float(m) for qid, m in zip(self.key.question_ids, means)}
+
+    def _comment(self, code: int, similarity: float) -> str:
+        if code == NO_ANSWER:
+            return "No answer given."
+        if code == CORRECT:
+            return "Correct."
+        if code == INCORRECT:
+            return "Incorrect."
+        if code == OPEN_CLOSE:
+            return f"Very close to model answer (similarity {similarity:.2f})."
+        if code == OPEN_PARTIAL:
+            return f"Partially correct (similarity {similarity:.2f})."
+        if code in (SEMANTIC_CLOSE, SEMANTIC_PARTIAL, SEMANTIC_FAR):
+            from semantic_grade_quiz import score_similarity
+            return score_similarity(similarity)[1]
+        return f"Not very close to model answer (similarity {similarity:.2f})."
+
+    def result(self, i: int) -> Dict[str, Any]:
+        """Submission i in the same shape grade_quiz returns (for save_report)."""
+        results = []
+        for j, q in enumerate(self.key.questions):
+            results.append(
+                {
+                    "question": q,
+                    "user_answer": self.answer(i, j),
+                    "score": float(self.scores[i, j]),
+                    "max_score": 1.0,
+                    "comment": self._comment(int(self.outcome[i, j]), float(self.similarity[i, j])),
+                }
+            )
+        return {
+            "total_score": float(self.total_score[i]),
+            "max_score": self.max_score,
+            "percentage": float(self.percentage[i]),
+            "results": results,
+        }
+
+
+# ============ GRADING ============
+
+def _factorize(values: List[str]) -> Tuple[np.ndarray, List[str]]:
+    """Integer code per value plus the distinct values, in first-seen order."""
+    index: Dict[str, Any] = dict.fromkeys(values)
+    for code, value in enumerate(index):
+        index[value] = code
+    codes = np.fromiter(map(index.__getitem__, values), dtype=np.int32, count=len(values))
+    return codes, list(index)
+
+
+def _semantic_grades(
+    key: AnswerKey,
+    distinct_answers: List[List[str]],
+) -> Dict[Tuple[int, str], Tuple[float, int, float]]:
+    """Grade the distinct non-blank open answers of every column in one embedding batch."""
+    from semantic_grade_quiz import answer_similarities, score_similarity
+
+    pairs = [
+        (key.question_ids[j], a)
+        for j, answers in enumerate(distinct_answers)
+        if key.is_open(j)
+        for a in answers
+        if a
+    ]
+    grades: Dict[Tuple[int, str], Tuple[float, int, float]] = {}
+    for pair, sim in zip(pairs, answer_similarities(key.quiz, pairs)):
+        sim = float(sim)
+        score, _ = score_similarity(sim)
+        code = SEMANTIC_CLOSE if score == 1.0 else SEMANTIC_PARTIAL if score == 0.5 else SEMANTIC_FAR
+        grades[pair] = (score, code, sim)
+    return grades
+
+
+def grade_submissions(
+    quiz: Quiz,
+    submissions: Sequence[Dict[int, str]],
+    key: Optional[AnswerKey] = None,
+    mode: str = OPEN_GRADING_MODE,
+) -> BatchGrades:
+    """
+    Grade every {question_id: answer} dict in `submissions` against `quiz`.
+    Pass a prebuilt `key` when grading several batches for the same quiz.
+    `mode` selects open-ended scoring: "overlap" or "semantic".
+    """
+    if key is None:
+        key = AnswerKey(quiz)
+    n, q = len(submissions), len(key)
+
+    answer_codes = np.zeros((n, q), dtype=np.int32)
+    distinct_answers: List[List[str]] = []
+    for j, qid in enumerate(key.question_ids):
+        raw_codes, raw_values = _factorize([sub.get(qid) or "" for sub in submissions])
+
+        # Stripping can merge raw values (" B" / "B"); re-factorize the stripped ones.
+        stripped_codes, answers = _factorize([v.strip() for v in raw_values])
+        answer_codes[:, j] = stripped_codes[raw_codes] if n else raw_codes
+        distinct_answers.append(answers)
+
+    semantic: Dict[Tuple[int, str], Tuple[float, int, float]] = {}
+    if mode == "semantic":
+        try:
+            semantic = _semantic_grades(key, distinct_answers)
+        except Exception as e:
+            print(f"Semantic grading unavailable, falling back to token overlap: {e}")
+
+    scores = np.zeros((n, q), dtype=np.float32)
+    outcome = np.zeros((n, q), dtype=np.int8)
+    similarity = np.full((n, q), np.nan, dtype=np.float64)
+    for j, answers in enumerate(distinct_answers):
+        if not answers:
+            continue
+        qid = key.question_ids[j]
+        graded = [semantic.get((qid, a)) or key.grade_answer(j, a) for a in answers]
+        codes = answer_codes[:, j]
+        scores[:, j] = np.array([g[0] for g in graded], dtype=np.float32)[codes]
+        outcome[:, j] = np.array([g[1] for g in graded], dtype=np.int8)[codes]
+        similarity[:, j] = np.array([g[2] for g in graded], dtype=np.float64)[codes]
+
+    total = scores.sum(axis=1, dtype=np.float64)
+    max_score = float(q)
+    percentage = total / max_score * 100.0 if max_score > 0 else np.zeros(n)
+
+    return BatchGrades(
+        key=key,
+        answer_codes=answer_codes,
+        distinct_answers=distinct_answers,
+        scores=scores,
+        outcome=outcome,
+        similarity=similarity,
+        total_score=total,
+        max_score=max_score,
+        percentage=percentage,
+    )
@@ -0,0 +1,113 @@
+# bench_grading.py
+# Benchmark: per-submission grade_quiz loop vs. batch_grade_quiz.grade_submissions
+#
+# Builds a synthetic quiz and N random class submissions (right, wrong,
+# blank and paraphrased answers), checks that both graders agree on every
+# score and comment, and reports throughput in submissions per second.
+#
+# --mode semantic embeds open answers with the local MiniLM model
+# (first run also fills the embedding cache).
+#
+#   python bench_grading.py [--submissions 5000] [--repeat 3] [--mode overlap|semantic]
+
+import argparse
+import random
+import time
+from typing import Dict, List
+
+import quiz_core
+from batch_grade_quiz import AnswerKey, grade_submissions
+from config_quiz import OPEN_GRADING_MODE
+from quiz_core import Question, Quiz, grade_quiz
+
+_OPEN_ANSWERS = [
+    "Confidentiality, integrity and availability of information systems",
+    "A stateful firewall tracks connection state and filters packets accordingly",
+    "IPsec ESP provides confidentiality, data origin authentication and integrity",
+    "TLS 1.3 removes static RSA key exchange and mandates forward secrecy",
+]
+
+
+def synthetic_quiz(num_mcq: int = 4, num_tf: int = 4, num_open: int = 2) -> Quiz:
+    rnd = random.Random(0)
+    questions: List[Question] = []
+    for i in range(num_mcq):
+        questions.append(Question(
+            id=len(questions) + 1, qtype="mcq", question_text=f"MCQ {i}",
+            options=["A. one", "B. two", "C. three", "D. four"],
+            correct_answer=rnd.choice("ABCD"), explanation="", sources=["lecture1.pdf_page3"],
+        ))
+    for i in range(num_tf):
+        questions.append(Question(
+            id=len(questions) + 1, qtype="tf", question_text=f"TF {i}", options=None,
+            correct_answer=rnd.choice(["True", "False"]), explanation="", sources=["lecture2.pdf_page1"],
+        ))
+    for i in range(num_open):
+        questions.append(Question(
+            id=len(questions) + 1, qtype="open", question_text=f"Open {i}", options=None,
+            correct_answer=_OPEN_ANSWERS[i % len(_OPEN_ANSWERS)], explanation="", sources=["notes.pdf"],
+        ))
+    return Quiz(questions=questions)
+
+
+def synthetic_submissions(quiz: Quiz, n: int, seed: int = 1) -> List[Dict[int, str]]:
+    rnd = random.Random(seed)
+    subs: List[Dict[int, str]] = []
+    for _ in range(n):
+        answers: Dict[int, str] = {}
+        for q in quiz.questions:
+            roll = rnd.random()
+            if roll < 0.1:
+                continue
+            if q.qtype == "mcq":
+                answers[q.id] = rnd.choice(["A", "b.", " C ", "d", q.correct_answer + "."])
+            elif q.qtype == "tf":
+                answers[q.id] = rnd.choice(["True", "false", "T", "f", "maybe", ""])
+            else:
+                words = q.correct_answer.split()
+                kept = [w for w in words if rnd.random() < roll] + rnd.sample(["the", "packet", "key", "data"], 2)
+                rnd.shuffle(kept)
+                answers[q.id] = " ".join(kept)
+        subs.append(answers)
+    return subs
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--submissions", type=int, default=5000)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--mode", choices=["overlap", "semantic"], default=OPEN_GRADING_MODE)
+    args = ap.parse_args()
+    quiz_core.OPEN_GRADING_MODE = args.mode  # grade_quiz reads the module setting
+
+    quiz = synthetic_quiz()
+    subs = synthetic_submissions(quiz, args.submissions)
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        loop_results = [grade_quiz(quiz, s) for s in subs]
+    loop_s = (time.perf_counter() - start) / args.repeat
+
+    key = AnswerKey(quiz)
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        batch = grade_submissions(quiz, subs, key=key, mode=args.mode)
+    batch_s = (time.perf_counter() - start) / args.repeat
+
+    mismatches = 0
+    for i, expected in enumerate(loop_results):
+        got = batch.result(i)
+        if got["total_score"] != expected["total_score"] or [
+            (r["score"], r["comment"], r["user_answer"]) for r in got["results"]
+        ] != [(r["score"], r["comment"], r["user_answer"]) for r in expected["results"]]:
+            mismatches += 1
+
+    n = len(subs)
+    print(f"Quiz: {len(quiz.questions)} questions, {n} submissions, open grading: {args.mode}")
+    print(f"grade_quiz loop:    {loop_s * 1e3:9.1f} ms  {n / loop_s:12,.0f} submissions/s")
+    print(f"grade_submissions:  {batch_s * 1e3:9.1f} ms  {n / batch_s:12,.0f} submissions/s")
+    print(f"Speedup: {loop_s / batch_s:.1f}x, mismatches: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# bench_parse_quiz.py
+# Benchmark: legacy quadratic JSON scan vs. the linear extractor in jsonscan_quiz.py
+#
+# Uses recorded raw LLM outputs from RAW_LLM_LOG_DIR (set it in config_quiz.py
+# and generate a few quizzes to record them), plus synthetic worst cases:
+# chatty preambles with many braces before the real payload, and a
+# truncated response.
+#
+#   python bench_parse_quiz.py [--dir logs/raw_llm] [--repeat 20]
+
+import argparse
+import glob
+import json
+import os
+import time
+from typing import Any, Callable, List, Tuple
+
+from config_quiz import RAW_LLM_LOG_DIR
+from jsonscan_quiz import extract_json
+
+
+def legacy_extract(text: str) -> Any:
+    """The original _parse_quiz_json scan: raw_decode(s[i:]) at every brace."""
+    decoder = json.JSONDecoder()
+    s = text.strip()
+    for i in range(len(s)):
+        if s[i] not in ("{", "["):
+            continue
+        try:
+            obj, _ = decoder.raw_decode(s[i:])
+            return obj
+        except json.JSONDecodeError:
+            continue
+    raise ValueError("No valid JSON found in LLM response")
+
+
+def _question(i: int) -> dict:
+    return {
+        "id": i,
+        "qtype": "mcq",
+        "question": f"Which X.800 service covers case {i}?",
+        "options": ["A. Authentication", "B. Access control", "C. Confidentiality", "D. Integrity"],
+        "answer": "C",
+        "explanation": "Per the lecture slides {see slide 12}.",
+    }
+
+
+def synthetic_samples() -> List[Tuple[str, str]]:
+    payload = json.dumps({"questions": [_question(i) for i in range(1, 11)]}, indent=2)
+    chatty = "Sure! Recall sets like {a, b} and lists like [x, y]. " * 400
+    unclosed = "Note: {this brace never closes " * 200
+    truncated = payload[: int(len(payload) * 0.8)]
+    return [
+        ("clean", payload),
+        ("chatty-preamble", chatty + "\n```json\n" + payload + "\n```"),
+        ("unclosed-braces", unclosed + payload),
+        ("truncated", "Here you go:\n" + truncated),
+    ]
+
+
+def recorded_samples(directory: str) -> List[Tuple[str, str]]:
+    samples = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.txt"))):
+        with open(path, "r", encoding="utf-8") as f:
+            samples.append((os.path.basename(path), f.read()))
+    return samples
+
+
+def _count_questions(obj: Any) -> int:
+    if isinstance(obj, dict):
+        questions = obj.get("questions")
+        return len(questions) if isinstance(questions, list) else 1
+    if isinstance(obj, list):
+        return sum(1 for x in obj if isinstance(x, dict))
+    return 0
+
+
+def _time(fn: Callable[[str], Any], text: str, repeat: int) -> Tuple[float, str]:
+    result = None
+    start = time.perf_counter()
+    for _ in range(repeat):
+        try:
+            result = fn(text)
+        except ValueError:
+            result = None
+    elapsed = (time.perf_counter() - start) / repeat
+    return elapsed, f"{_count_questions(result)}q" if result is not None else "no-json"
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--dir", default=RAW_LLM_LOG_DIR, help="Directory of recorded raw outputs (*.txt)")
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    samples = synthetic_samples()
+    if args.dir and os.path.isdir(args.dir):
+        samples += recorded_samples(args.dir)
+
+    print(f"{'sample':<28}{'chars':>9}{'legacy ms':>12}{'linear ms':>12}{'speedup':>9}  questions found")
+    total_legacy = total_linear = 0.0
+    for name, text in samples:
+        legacy, legacy_status = _time(legacy_extract, text, args.repeat)
+        linear, linear_status = _time(extract_json, text, args.repeat)
+        total_legacy += legacy
+        total_linear += linear
+        print(
+            f"{name[:27]:<28}{len(text):>9}{legacy * 1e3:>12.3f}{linear * 1e3:>12.3f}"
+            f"{legacy / linear if linear else 0:>8.1f}x  {legacy_status} -> {linear_status}"
+        )
+
+    print(f"\nTotal: legacy {total_legacy * 1e3:.2f} ms, linear {total_linear * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
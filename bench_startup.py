@@ -0,0 +1,146 @@
+# bench_startup.py
+# Benchmark: startup cost of the quiz entry points (python -X importtime)
+#
+# For each entry module, runs `python -X importtime -c "import <module>"` in
+# a fresh interpreter and reports the total import time, the slowest
+# imports, and whether a heavy dependency (LangChain, Chroma, the embedding
+# model stack, numpy) was loaded at startup. Those must only load on first
+# use (see quiz_core.py / retrieval_quiz.py).
+#
+# Then measures time-to-first-prompt of run_quiz.py: process start until
+# "Enter 1 or 2:" is written. It fails (exit code 1) above
+# STARTUP_BUDGET_SECONDS or when a heavy module is imported at startup.
+#
+#   python bench_startup.py [--runs 5] [--budget 0.5]
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import List, Optional, Tuple
+
+from config_quiz import STARTUP_BUDGET_SECONDS
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Entry points: the CLI, and what the Chainlit worker imports besides chainlit
+TARGETS = [
+    ("report_quiz", "import report_quiz"),
+    ("quiz_core", "import quiz_core"),
+    ("run_quiz", "import run_quiz"),
+    ("app_quiz deps", "import quiz_core, pool_quiz, report_quiz, retrieval_quiz"),
+]
+
+HEAVY_MODULES = (
+    "langchain_community",
+    "langchain_core",
+    "langchain_chroma",
+    "chromadb",
+    "sentence_transformers",
+    "torch",
+    "numpy",
+    "faiss",
+)
+
+PROMPT = b"Enter 1 or 2:"
+
+# (self us, cumulative us, nesting depth, module)
+ImportRow = Tuple[int, int, int, str]
+
+
+def import_profile(statement: str) -> List[ImportRow]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=HERE,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed")
+    rows: List[ImportRow] = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(self_us), int(cumulative_us), depth, name.strip()))
+    return rows
+
+
+def heavy_modules(rows: List[ImportRow]) -> List[str]:
+    loaded = {name.split(".")[0] for _, _, _, name in rows}
+    return [m for m in HEAVY_MODULES if m in loaded]
+
+
+def time_to_prompt(timeout: float = 60.0) -> Optional[float]:
+    """Seconds from spawning `python run_quiz.py` until it asks for the quiz mode."""
+    env = dict(os.environ, PYTHONUNBUFFERED="1")
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "run_quiz.py"],
+        cwd=HERE,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        env=env,
+    )
+    seen = b""
+    try:
+        while PROMPT not in seen:
+            chunk = os.read(proc.stdout.fileno(), 4096)
+            if not chunk or time.perf_counter() - start > timeout:
+                return None
+            seen += chunk
+        return time.perf_counter() - start
+    finally:
+        proc.kill()
+        proc.wait()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--runs", type=int, default=5, help="Time-to-first-prompt runs (median is reported)")
+    ap.add_argument("--budget", type=float, default=STARTUP_BUDGET_SECONDS, help="Time-to-first-prompt budget (s)")
+    ap.add_argument("--top", type=int, default=5, help="Slowest imports listed per target")
+    args = ap.parse_args()
+
+    ok = True
+    print(f"{'target':<16}{'import ms':>11}  heavy modules at startup")
+    slowest = {}
+    for label, statement in TARGETS:
+        try:
+            rows = import_profile(statement)
+        except RuntimeError as e:
+            print(f"{label:<16}{'-':>11}  failed: {e}")
+            ok = False
+            continue
+        total = sum(cum for _, cum, depth, _ in rows if depth == 0)
+        heavy = heavy_modules(rows)
+        ok = ok and not heavy
+        print(f"{label:<16}{total / 1e3:>11.1f}  {', '.join(heavy) or 'none'}")
+        slowest[label] = sorted(rows, key=lambda r: r[1], reverse=True)[: args.top]
+
+    for label, rows in slowest.items():
+        print(f"\nSlowest imports ({label}):")
+        for _, cum, _, name in rows:
+            print(f"  {cum / 1e3:>8.1f} ms  {name}")
+
+    times = [t for t in (time_to_prompt() for _ in range(args.runs)) if t is not None]
+    if not times:
+        print("\nrun_quiz.py never showed its prompt.")
+        sys.exit(1)
+    median = statistics.median(times)
+    within = median <= args.budget
+    ok = ok and within
+    print(
+        f"\nTime to first prompt (run_quiz.py): median {median * 1e3:.0f} ms over {len(times)} runs "
+        f"(min {min(times) * 1e3:.0f} ms), budget {args.budget * 1e3:.0f} ms: {'OK' if within else 'OVER BUDGET'}"
+    )
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
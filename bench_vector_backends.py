@@ -0,0 +1,120 @@
+# bench_vector_backends.py
+# Benchmark: recall@k and query latency of Chroma vs. FAISS index types on our corpus
+#
+# Exports every chunk embedding from the Quiz Agent's Chroma DB, takes exact
+# (brute-force) top-k as ground truth, and measures each backend on the same
+# query vectors, so only search time is compared (query embedding excluded).
+# Queries are typical quiz topics plus the opening words of sampled chunks.
+#
+#   python bench_vector_backends.py [--queries 200] [--k 5]
+
+import argparse
+import random
+import time
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+from bm25_quiz import content_key
+from config_quiz import FAISS_HNSW_M, FAISS_PQ_M, QUIZ_POOL_PREFILL_TOPICS
+from faiss_quiz import _import_faiss, build_index, export_chroma
+from ingest_quiz import _open_vectorstore
+from vectors_quiz import unit_rows
+
+TOPIC_QUERIES = [
+    "network security overview",
+    "security services and mechanisms",
+    "active and passive attacks",
+    "OSI security architecture X.800",
+    "CIA triad confidentiality integrity availability",
+    "IPsec ESP",
+    "TLS 1.3 handshake",
+]
+
+
+def _query_texts(texts: List[str], n: int) -> List[str]:
+    rnd = random.Random(0)
+    queries = TOPIC_QUERIES + list(QUIZ_POOL_PREFILL_TOPICS)
+    sampled = rnd.sample(texts, min(len(texts), max(0, n - len(queries))))
+    queries += [" ".join(t.split()[:12]) for t in sampled]
+    return queries[:n]
+
+
+def _measure(search: Callable[[np.ndarray], List[str]], queries: np.ndarray, truth: List[set]) -> Tuple[float, float, float]:
+    latencies = []
+    hits = 0
+    total = 0
+    for q, expected in zip(queries, truth):
+        start = time.perf_counter()
+        got = search(q)
+        latencies.append(time.perf_counter() - start)
+        hits += len(expected.intersection(got))
+        total += len(expected)
+    lat = np.array(latencies) * 1e3
+    return hits / max(total, 1), float(np.percentile(lat, 50)), float(np.percentile(lat, 95))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=5)
+    args = ap.parse_args()
+    faiss = _import_faiss()
+
+    vectordb = _open_vectorstore()
+    print("Exporting chunks from Chroma...")
+    ids, texts, _, vectors = export_chroma(vectordb)
+    if not ids:
+        print("The Chroma collection is empty; run ingest_quiz.py first.")
+        return
+    vectors = unit_rows(vectors)
+    keys = [content_key(t) for t in texts]
+    n, d = vectors.shape
+
+    query_texts = _query_texts(texts, args.queries)
+    queries = unit_rows([vectordb.embeddings.embed_query(t) for t in query_texts])
+    exact = np.argsort(-(queries @ vectors.T), axis=1)[:, : args.k]
+    truth = [{keys[i] for i in row} for row in exact]
+    print(f"Corpus: {n} chunks, dim {d}; {len(queries)} queries; recall@{args.k} vs exact search\n")
+
+    def faiss_search(index) -> Callable[[np.ndarray], List[str]]:
+        def search(q: np.ndarray) -> List[str]:
+            _, rows = index.search(q[None, :], args.k)
+            return [keys[i] for i in rows[0] if i >= 0]
+        return search
+
+    def chroma_search(q: np.ndarray) -> List[str]:
+        docs = vectordb.similarity_search_by_vector(q.tolist(), k=args.k)
+        return [content_key(doc.page_content) for doc in docs]
+
+    rows: List[Tuple[str, float, float, float, str]] = []
+    recall, p50, p95 = _measure(chroma_search, queries, truth)
+    rows.append(("chroma (default HNSW)", recall, p50, p95, "-"))
+
+    configs: List[Tuple[str, Dict, Dict]] = [("faiss flat (exact)", {"index_type": "flat"}, {})]
+    for ef in (16, 64, 128):
+        configs.append((f"faiss hnsw M={FAISS_HNSW_M} ef={ef}", {"index_type": "hnsw"}, {"efSearch": ef}))
+    for nprobe in (4, 8, 32):
+        configs.append((f"faiss ivfpq m={FAISS_PQ_M} nprobe={nprobe}", {"index_type": "ivfpq"}, {"nprobe": nprobe}))
+
+    built: Dict[str, object] = {}
+    for name, build_params, search_params in configs:
+        key = build_params["index_type"]
+        if key not in built:
+            built[key] = build_index(vectors, **build_params)
+        index = built[key]
+        if "efSearch" in search_params and hasattr(index, "hnsw"):
+            index.hnsw.efSearch = search_params["efSearch"]
+        if "nprobe" in search_params and hasattr(index, "nprobe"):
+            index.nprobe = search_params["nprobe"]
+        size = f"{len(faiss.serialize_index(index)) / 1e6:.1f} MB"
+        recall, p50, p95 = _measure(faiss_search(index), queries, truth)
+        rows.append((f"{name} [{type(index).__name__}]", recall, p50, p95, size))
+
+    print(f"{'backend':<52}{'recall':>8}{'p50 ms':>9}{'p95 ms':>9}{'index':>10}")
+    for name, recall, p50, p95, size in rows:
+        print(f"{name:<52}{recall:>8.3f}{p50:>9.3f}{p95:>9.3f}{size:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+# bm25_quiz.py
+# Persistent BM25 inverted index over the Quiz Agent's chunks
+#
+# Dense search alone often misses exact terms in network security material
+# ("X.800", "IPsec ESP", "TLS 1.3"). ingest_quiz.py keeps a BM25 index next
+# to the Chroma collection (db/bm25_index.npz), updated incrementally by
+# chunk ID, and retrieval_quiz.py fuses its scores with the dense ones.
+#
+# On disk the index is stored per document (CSR: chunk -> term counts), which
+# makes adding/removing chunks cheap at ingest time. At query time it is
+# transposed once into per-term postings, so scoring a query only touches the
+# postings of its terms (NumPy, no per-document Python loop).
+
+import hashlib
+import os
+import re
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from vectors_quiz import load_npz, save_npz
+
+BM25_INDEX_FILE = "bm25_index.npz"
+INDEX_VERSION = 1
+
+K1 = 1.5
+B = 0.75
+
+# Keeps dotted/hyphenated terms together ("x.800", "tls 1.3", "802.1x") and
+# also indexes their parts, so "X.800" matches both "X.800" and "X 800".
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[.\-/][a-z0-9]+)*")
+_PART_RE = re.compile(r"[.\-/]")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from how in is it of on or that the this to what "
+    "which who why with does do can explain describe define".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    tokens: List[str] = []
+    for m in _TOKEN_RE.finditer((text or "").lower()):
+        tok = m.group()
+        if tok in _STOPWORDS:
+            continue
+        tokens.append(tok)
+        if _PART_RE.search(tok):
+            tokens.extend(p for p in _PART_RE.split(tok) if p and p not in _STOPWORDS)
+    return tokens
+
+
+def content_key(text: str) -> str:
+    """Short content hash, used to match BM25 hits with dense search results."""
+    return hashlib.sha1((text or "").encode("utf-8")).hexdigest()[:16]
+
+
+def bm25_index_path(db_dir: str) -> str:
+    return os.path.join(db_dir, BM25_INDEX_FILE)
+
+
+# ============ INGEST-TIME BUILDER ============
+
+class BM25Builder:
+    """
+    Mutable form of the index used by ingest, kept in the on-disk CSR layout
+    (chunk -> term counts). Loading keeps the saved arrays as they are; only
+    added chunks are tokenized, and removed ones are dropped when saving, so
+    an ingest costs time in proportion to the chunks it changes (plus one
+    array copy per save), not a re-tokenization of the corpus.
+    """
+
+    def __init__(self):
+        self._ids: List[str] = []           # chunk ID of every row, live or not
+        self._keys: List[str] = []
+        self._row: Dict[str, int] = {}      # live chunk ID -> row
+        self._vocab: Dict[str, int] = {}
+        # Saved rows (as loaded), then the rows added since.
+        self._base_indptr = np.zeros(1, dtype=np.int64)
+        self._base_term_ids = np.zeros(0, dtype=np.int32)
+        self._base_tfs = np.zeros(0, dtype=np.int32)
+        self._base_lens = np.zeros(0, dtype=np.int32)
+        self._indptr = array("q", [0])
+        self._term_ids = array("i")
+        self._tfs = array("i")
+        self._lens = array("i")
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Builder":
+        builder = cls()
+        arrays = load_npz(path, INDEX_VERSION)
+        if arrays is None:
+            return builder
+        builder._ids = arrays["doc_ids"].tolist()
+        builder._keys = arrays["doc_keys"].tolist()
+        builder._row = {cid: i for i, cid in enumerate(builder._ids)}
+        builder._vocab = {t: i for i, t in enumerate(arrays["terms"].tolist())}
+        builder._base_indptr = arrays["indptr"].astype(np.int64)
+        builder._base_term_ids = arrays["term_ids"]
+        builder._base_tfs = arrays["tfs"]
+        builder._base_lens = arrays["doc_lens"]
+        return builder
+
+    def __len__(self) -> int:
+        return len(self._row)
+
+    def __contains__(self, cid: str) -> bool:
+        return cid in self._row
+
+    def ids(self) -> List[str]:
+        return list(self._row)
+
+    def add(self, ids: List[str], texts: List[str]) -> None:
+        vocab = self._vocab
+        for cid, text in zip(ids, texts):
+            counts = Counter(tokenize(text))
+            self._row[cid] = len(self._ids)
+            self._ids.append(cid)
+            self._keys.append(content_key(text))
+            for term, tf in counts.items():
+                self._term_ids.append(vocab.setdefault(term, len(vocab)))
+                self._tfs.append(tf)
+            self._indptr.append(len(self._term_ids))
+            self._lens.append(sum(counts.values()))
+
+    def remove(self, ids: Iterable[str]) -> int:
+        removed = 0
+        for cid in ids:
+            if self._row.pop(cid, None) is not None:
+                removed += 1
+        return removed
+
+    def save(self, path: str) -> None:
+        live = np.zeros(len(self._ids), dtype=bool)
+        live[list(self._row.values())] = True
+        base_rows = len(self._base_lens)
+        new_indptr = np.frombuffer(self._indptr, dtype=np.int64)
+
+        # Entries of the live rows, in row order: saved rows first, then added ones.
+        keep_base = np.repeat(live[:base_rows], np.diff(self._base_indptr))
+        keep_new = np.repeat(live[base_rows:], np.diff(new_indptr))
+        term_ids = np.concatenate([self._base_term_ids[keep_base], np.frombuffer(self._term_ids, dtype=np.int32)[keep_new]])
+        tfs = np.concatenate([self._base_tfs[keep_base], np.frombuffer(self._tfs, dtype=np.int32)[keep_new]])
+        lens = np.concatenate([self._base_lens, np.frombuffer(self._lens, dtype=np.int32)])[live]
+        sizes = np.concatenate([np.diff(self._base_indptr), np.diff(new_indptr)])[live]
+
+        # Drop terms no live chunk uses any more.
+        used = np.bincount(term_ids, minlength=len(self._vocab)) > 0
+        remap = (np.cumsum(used) - 1).astype(np.int32)
+        rows = np.flatnonzero(live)
+
+        save_npz(path, {
+            "version": np.array(INDEX_VERSION),
+            "doc_ids": np.array([self._ids[r] for r in rows], dtype=str),
+            "doc_keys": np.array([self._keys[r] for r in rows], dtype=str),
+            "doc_lens": lens,
+            "terms": np.array(list(self._vocab), dtype=str)[used],
+            "indptr": np.concatenate([[0], np.cumsum(sizes)]).astype(np.int64),
+            "term_ids": remap[term_ids],
+            "tfs": tfs,
+        })
+
+
+# ============ QUERY-TIME INDEX ============
+
+class BM25Index:
+    """Read-only BM25 index with per-term postings for fast scoring."""
+
+    def __init__(self, arrays: Optional[Dict[str, np.ndarray]] = None):
+        if arrays is None:
+            self.doc_ids: List[str] = []
+            self.doc_keys: List[str] = []
+            self._terms: Dict[str, int] = {}
+            return
+
+        self.doc_ids = arrays["doc_ids"].tolist()
+        self.doc_keys = arrays["doc_keys"].tolist()
+        self._key_to_doc = {key: i for i, key in enumerate(self.doc_keys)}
+        self._doc_lens = arrays["doc_lens"].astype(np.float32)
+        self._avgdl = float(self._doc_lens.mean()) if len(self._doc_lens) else 1.0
+        self._terms = {t: i for i, t in enumerate(arrays["terms"].tolist())}
+
+        # CSR (doc -> terms) to postings (term -> docs).
+        indptr = arrays["indptr"]
+        term_ids = arrays["term_ids"]
+        doc_of_entry = np.repeat(np.arange(len(self.doc_ids), dtype=np.int32), np.diff(indptr))
+        order = np.argsort(term_ids, kind="stable")
+        self._post_docs = doc_of_entry[order]
+        self._post_tfs = arrays["tfs"][order].astype(np.float32)
+        df = np.bincount(term_ids, minlength=len(self._terms))
+        self._post_ptr = np.concatenate([[0], np.cumsum(df)])
+
+        n = len(self.doc_ids)
+        self._idf = np.log(1.0 + (n - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        """Load the index, or an empty one if it hasn't been built yet."""
+        return cls(load_npz(path, INDEX_VERSION))
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every document for `query`."""
+        scores = np.zeros(len(self.doc_ids), dtype=np.float32)
+        for term in set(tokenize(query)):
+            t = self._terms.get(term)
+            if t is None:
+                continue
+            start, end = self._post_ptr[t], self._post_ptr[t + 1]
+            docs = self._post_docs[start:end]
+            tf = self._post_tfs[start:end]
+            norm = K1 * (1.0 - B + B * self._doc_lens[docs] / self._avgdl)
+            scores[docs] += self._idf[t] * tf * (K1 + 1.0) / (tf + norm)
+        return scores
+
+    def top(self, scores: np.ndarray, k: int) -> List[int]:
+        """Indices of the k best-scoring documents with a positive score."""
+        k = min(k, int(np.count_nonzero(scores)))
+        if k <= 0:
+            return []
+        best = np.argpartition(-scores, k - 1)[:k]
+        return best[np.argsort(-scores[best], kind="stable")].tolist()
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[str, float]]:
+        scores = self.scores(query)
+        return [(self.doc_ids[i], float(scores[i])) for i in self.top(scores, k)]
+
+    def doc_for_key(self, key: str) -> Optional[int]:
+        return self._key_to_doc.get(key) if self.doc_ids else None
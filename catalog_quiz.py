@@ -0,0 +1,331 @@
+# catalog_quiz.py
+# Topic catalog of the Quiz Agent's chunks, for random quizzes
+#
+# At ingest, chunk embeddings are clustered into topics (spherical k-means,
+# NumPy only) and every chunk's topic, source file and page are saved to
+# db/topic_catalog.npz. A random quiz then picks topics and chunks straight
+# from the catalog and fetches those chunks by ID: no query embedding and no
+# similarity search at request time, and every part of the corpus can come up
+# (not just the neighbourhoods of a few fixed queries).
+#
+# Later ingests update the catalog in place: new chunks join the nearest
+# saved topic centroid and removed ones are dropped. The corpus is only
+# re-clustered once TOPIC_CATALOG_RECLUSTER_FRACTION of it has changed.
+
+import os
+import random
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from bm25_quiz import tokenize
+from config_quiz import RANDOM_QUIZ_TOPICS, TOPIC_CATALOG_CLUSTERS, TOPIC_CATALOG_RECLUSTER_FRACTION
+from corpus_store import iter_store
+from vectors_quiz import load_npz, save_npz, unit_rows
+
+TOPIC_CATALOG_FILE = "topic_catalog.npz"
+CATALOG_VERSION = 2
+
+KMEANS_ITERATIONS = 25
+KMEANS_SAMPLE = 20_000          # embeddings k-means is fitted on; the rest join the nearest topic
+LABEL_TERMS = 3
+
+
+def topic_catalog_path(db_dir: str) -> str:
+    return os.path.join(db_dir, TOPIC_CATALOG_FILE)
+
+
+# ============ CLUSTERING ============
+
+def default_num_topics(n_chunks: int) -> int:
+    return int(min(64, max(2, round(np.sqrt(n_chunks / 2)))))
+
+
+def kmeans(
+    vectors: np.ndarray, k: int, iterations: int = KMEANS_ITERATIONS, seed: int = 0
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Spherical k-means over unit rows (k-means++ seeding, cosine similarity).
+    Returns the topic of every row and the (unit) topic centroids.
+    """
+    n = vectors.shape[0]
+    k = max(1, min(k, n))
+    rng = np.random.default_rng(seed)
+
+    # Greedy k-means++: of a few D^2-weighted candidates per step, keep the
+    # one that reduces the total distance most.
+    trials = 2 + int(np.log(k))
+    centroids = np.empty((k, vectors.shape[1]), dtype=np.float32)
+    centroids[0] = vectors[rng.integers(n)]
+    closest = np.maximum(1.0 - vectors @ centroids[0], 0.0) ** 2
+    for c in range(1, k):
+        total = float(closest.sum())
+        if total <= 0:
+            centroids[c] = vectors[rng.integers(n)]
+            continue
+        candidates = rng.choice(n, size=trials, p=closest / total)
+        dists = np.maximum(1.0 - vectors @ vectors[candidates].T, 0.0) ** 2
+        options = np.minimum(closest[:, None], dists)
+        best = int(np.argmin(options.sum(axis=0)))
+        centroids[c] = vectors[candidates[best]]
+        closest = options[:, best]
+
+    assign = np.full(n, -1, dtype=np.int32)
+    for _ in range(iterations):
+        new_assign = np.argmax(vectors @ centroids.T, axis=1).astype(np.int32)
+        if np.array_equal(new_assign, assign):
+            break
+        assign = new_assign
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, vectors)
+        empty = np.bincount(assign, minlength=k) == 0
+        # Re-seed empty topics with the rows that fit their topic worst.
+        if empty.any():
+            fit = np.einsum("ij,ij->i", vectors, centroids[assign])
+            sums[empty] = vectors[np.argsort(fit)[: int(empty.sum())]]
+        centroids = unit_rows(sums)
+    return assign, centroids
+
+
+class _TopicTerms:
+    """Term counts per topic, for labels: a few terms frequent in a topic and rare elsewhere."""
+
+    def __init__(self, k: int):
+        self.doc_freq: Counter = Counter()
+        self.topic_terms: List[Counter] = [Counter() for _ in range(k)]
+        self.n = 0
+
+    def add(self, texts: Sequence[str], topics: np.ndarray) -> None:
+        for text, t in zip(texts, topics):
+            terms = tokenize(text or "")
+            self.doc_freq.update(set(terms))
+            self.topic_terms[t].update(terms)
+            self.n += 1
+
+    def labels(self) -> List[str]:
+        n = max(self.n, 1)
+        labels = []
+        for counts in self.topic_terms:
+            ranked = sorted(counts.items(), key=lambda kv: kv[1] * np.log(n / self.doc_freq[kv[0]]), reverse=True)
+            labels.append(", ".join(term for term, _ in ranked[:LABEL_TERMS]))
+        return labels
+
+
+# ============ BUILD ============
+
+def _nearest_topics(vectors, centroids: np.ndarray) -> np.ndarray:
+    return np.argmax(unit_rows(vectors) @ centroids.T, axis=1).astype(np.int32)
+
+
+def _sources_and_pages(metas: Sequence[Optional[Dict]], sources: Dict[str, int]) -> Tuple[np.ndarray, np.ndarray]:
+    metas = [m or {} for m in metas]
+    source_ids = np.array([sources.setdefault(str(m.get("source") or ""), len(sources)) for m in metas], dtype=np.int32)
+    pages = np.array([m["page"] if isinstance(m.get("page"), int) else -1 for m in metas], dtype=np.int32)
+    return source_ids, pages
+
+
+def _catalog_arrays(
+    ids: List[str],
+    topics: List[np.ndarray],
+    sources: Dict[str, int],
+    source_ids: List[np.ndarray],
+    pages: List[np.ndarray],
+    labels: Sequence[str],
+    centroids: np.ndarray,
+    clustered: int,
+    changed: int,
+) -> Dict[str, np.ndarray]:
+    def column(parts: List[np.ndarray]) -> np.ndarray:
+        return np.concatenate(parts).astype(np.int32) if parts else np.zeros(0, dtype=np.int32)
+
+    return {
+        "version": np.array(CATALOG_VERSION),
+        "chunk_ids": np.array(ids, dtype=str),
+        "topics": column(topics),
+        "sources": np.array(list(sources), dtype=str),
+        "source_ids": column(source_ids),
+        "pages": column(pages),
+        "labels": np.array(list(labels), dtype=str),
+        "centroids": centroids.astype(np.float32),
+        "clustered": np.array(clustered),   # chunks when the topics were clustered
+        "changed": np.array(changed),       # chunks added / removed since then
+    }
+
+
+def build_catalog_from_store(vectordb, path: str, num_topics: int = TOPIC_CATALOG_CLUSTERS) -> "TopicCatalog":
+    """
+    Cluster every chunk in Chroma and save the catalog to `path`. The store
+    is read page by page, twice: k-means is fitted on a uniform random
+    sample of at most KMEANS_SAMPLE embeddings, then every chunk joins its
+    nearest topic, so memory is bounded by the sample, not the corpus.
+    """
+    rng = np.random.default_rng(0)
+    sample: Optional[np.ndarray] = None
+    keys = np.zeros(0)
+    n = 0
+    for page in iter_store(vectordb, ["embeddings"]):
+        vectors = unit_rows(page["embeddings"])
+        n += len(vectors)
+        # Keep the rows with the smallest random keys: a uniform sample.
+        sample = vectors if sample is None else np.concatenate([sample, vectors])
+        keys = np.concatenate([keys, rng.random(len(vectors))])
+        if len(keys) > KMEANS_SAMPLE:
+            best = np.argpartition(keys, KMEANS_SAMPLE)[:KMEANS_SAMPLE]
+            sample, keys = sample[best], keys[best]
+
+    if sample is None:
+        centroids = np.zeros((0, 0), dtype=np.float32)
+    else:
+        _, centroids = kmeans(sample, num_topics or default_num_topics(n))
+    del sample
+
+    ids: List[str] = []
+    topics: List[np.ndarray] = []
+    sources: Dict[str, int] = {}
+    source_ids: List[np.ndarray] = []
+    pages: List[np.ndarray] = []
+    terms = _TopicTerms(len(centroids))
+    for page in iter_store(vectordb, ["embeddings", "documents", "metadatas"]):
+        page_topics = _nearest_topics(page["embeddings"], centroids)
+        ids.extend(page["ids"])
+        topics.append(page_topics)
+        page_sources, page_pages = _sources_and_pages(page["metadatas"], sources)
+        source_ids.append(page_sources)
+        pages.append(page_pages)
+        terms.add(page["documents"], page_topics)
+
+    arrays = _catalog_arrays(ids, topics, sources, source_ids, pages, terms.labels(), centroids, len(ids), 0)
+    save_npz(path, arrays)
+    return TopicCatalog(arrays)
+
+
+def update_catalog_from_store(
+    vectordb,
+    path: str,
+    chunk_ids: Set[str],
+    num_topics: int = TOPIC_CATALOG_CLUSTERS,
+) -> "TopicCatalog":
+    """
+    Bring the catalog at `path` in line with `chunk_ids` (the chunks now in
+    the store): removed chunks are dropped and new ones join their nearest
+    topic, reading only the new chunks from Chroma. The whole store is
+    re-clustered instead when there is no catalog yet, or more than
+    TOPIC_CATALOG_RECLUSTER_FRACTION of it changed since it was clustered.
+    """
+    arrays = load_npz(path, CATALOG_VERSION)
+    if arrays is None:
+        return build_catalog_from_store(vectordb, path, num_topics)
+
+    old_ids = arrays["chunk_ids"].tolist()
+    keep = np.fromiter((cid in chunk_ids for cid in old_ids), dtype=bool, count=len(old_ids))
+    known = set(old_ids)
+    added = sorted(cid for cid in chunk_ids if cid not in known)
+    if not added and keep.all():
+        return TopicCatalog(arrays)
+
+    centroids = arrays["centroids"]
+    clustered = int(arrays["clustered"])
+    changed = int(arrays["changed"]) + len(added) + int(len(keep) - keep.sum())
+    if (
+        not len(centroids)
+        or (num_topics and num_topics != len(centroids))
+        or changed > TOPIC_CATALOG_RECLUSTER_FRACTION * clustered
+    ):
+        return build_catalog_from_store(vectordb, path, num_topics)
+
+    ids = [cid for cid, kept in zip(old_ids, keep) if kept]
+    topics = [arrays["topics"][keep]]
+    sources = {source: i for i, source in enumerate(arrays["sources"].tolist())}
+    source_ids = [arrays["source_ids"][keep]]
+    pages = [arrays["pages"][keep]]
+    for page in iter_store(vectordb, ["embeddings", "metadatas"], ids=added):
+        ids.extend(page["ids"])
+        topics.append(_nearest_topics(page["embeddings"], centroids))
+        page_sources, page_pages = _sources_and_pages(page["metadatas"], sources)
+        source_ids.append(page_sources)
+        pages.append(page_pages)
+
+    arrays = _catalog_arrays(
+        ids, topics, sources, source_ids, pages, arrays["labels"].tolist(), centroids, clustered, changed
+    )
+    save_npz(path, arrays)
+    return TopicCatalog(arrays)
+
+
+# ============ SAMPLING ============
+
+class TopicCatalog:
+    """Chunk ID -> topic / source / page, with stratified random sampling."""
+
+    def __init__(self, arrays: Optional[Dict[str, np.ndarray]] = None):
+        if arrays is None:
+            self.chunk_ids: List[str] = []
+            self.labels: List[str] = []
+            self._members: List[np.ndarray] = []
+            return
+        self.chunk_ids = arrays["chunk_ids"].tolist()
+        self.labels = arrays["labels"].tolist()
+        self.sources = arrays["sources"].tolist()
+        self.source_ids = arrays["source_ids"]
+        self.pages = arrays["pages"]
+        topics = arrays["topics"]
+        order = np.argsort(topics, kind="stable")
+        bounds = np.searchsorted(topics[order], np.arange(len(self.labels) + 1))
+        self._members = [order[bounds[t]:bounds[t + 1]] for t in range(len(self.labels))]
+
+    @classmethod
+    def load(cls, path: str) -> "TopicCatalog":
+        """Load the catalog, or an empty one if it hasn't been built yet."""
+        return cls(load_npz(path, CATALOG_VERSION))
+
+    def __len__(self) -> int:
+        return len(self.chunk_ids)
+
+    @property
+    def num_topics(self) -> int:
+        return sum(1 for m in self._members if len(m))
+
+    def topic_sizes(self) -> List[int]:
+        return [len(m) for m in self._members]
+
+    def sample(
+        self,
+        num_docs: int,
+        num_topics: int = RANDOM_QUIZ_TOPICS,
+        rng: Optional[random.Random] = None,
+    ) -> List[str]:
+        """
+        Chunk IDs for a random quiz: `num_topics` topics chosen uniformly
+        (so small topics come up as often as large ones), `num_docs` chunks
+        split between them. Within a topic, chunks are drawn from distinct
+        (file, page) pairs first. Returned in file/page order.
+        """
+        rng = rng or random
+        topics = [t for t, m in enumerate(self._members) if len(m)]
+        if not topics or num_docs <= 0:
+            return []
+        chosen = rng.sample(topics, min(max(1, num_topics), len(topics), num_docs))
+
+        rows: List[int] = []
+        for i, t in enumerate(chosen):
+            share = num_docs // len(chosen) + (1 if i < num_docs % len(chosen) else 0)
+            rows.extend(self._sample_topic(t, share, rng))
+        rows.sort(key=lambda r: (int(self.source_ids[r]), int(self.pages[r]), r))
+        return [self.chunk_ids[r] for r in rows]
+
+    def _sample_topic(self, topic: int, count: int, rng) -> List[int]:
+        members = self._members[topic]
+        # A few times more candidates than needed is plenty to find distinct pages.
+        candidates = [int(members[i]) for i in rng.sample(range(len(members)), min(len(members), 4 * count))]
+        picked: List[int] = []
+        seen_pages = set()
+        for r in candidates:
+            page = (int(self.source_ids[r]), int(self.pages[r]))
+            if page not in seen_pages:
+                seen_pages.add(page)
+                picked.append(r)
+                if len(picked) == count:
+                    return picked
+        taken = set(picked)
+        return picked + [r for r in candidates if r not in taken][: count - len(picked)]
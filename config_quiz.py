@@ -21,3 +21,105 @@ DEFAULT_NUM_TF = 3
 DEFAULT_NUM_OPEN = 2
 
 ENABLE_WEB_CITATIONS = False
+
+# Load the embedder + vector store when the Chainlit app starts
+WARM_UP_ON_START = True
+# How often (seconds) running apps check db/ for a fresh ingest
+INGEST_CHECK_INTERVAL_SECONDS = 2.0
+
+# Parser processes used by ingest (0 = one per spare CPU core)
+INGEST_WORKERS = 0
+# Chunks embedded + upserted per batch (bounds ingest memory)
+INGEST_BATCH_SIZE = 64
+
+# On-disk embedding cache shared by ingest and retrieval ("" disables it).
+# Relative cache paths are taken from the repository root (corpus_store.py).
+EMBEDDING_CACHE_PATH = "cache/embeddings.sqlite3"
+EMBEDDING_CACHE_MAX_ENTRIES = 200_000
+
+# Retrieval result cache for repeated quiz topics (cleared on re-ingest)
+QUERY_CACHE_SIZE = 256
+QUERY_CACHE_TTL_SECONDS = 3600
+
+# LLM response cache keyed by (model, prompt) ("" disables it, see llm_cache.py).
+# Policy: "auto" (always reuse at temperature 0, else variants), "always",
+# "variants" (keep up to LLM_CACHE_VARIANTS answers per prompt, then pick one
+# at random) or "off"
+LLM_MODEL = "llama3"
+LLM_CACHE_PATH = "cache/llm_responses.sqlite3"
+LLM_CACHE_POLICY = "auto"
+LLM_CACHE_VARIANTS = 4              # keep above QUIZ_POOL_SIZE so pooled quizzes differ
+LLM_CACHE_MAX_ENTRIES = 5000
+
+# Pre-generated quiz pool (served instantly, refilled in the background)
+QUIZ_POOL_ENABLED = True
+QUIZ_POOL_DIR = "pool"
+QUIZ_POOL_SIZE = 3                              # quizzes kept per topic + mix
+QUIZ_POOL_MAX_AGE_SECONDS = 7 * 24 * 3600       # older pooled quizzes are dropped
+QUIZ_POOL_MAX_SLOTS = 64                        # topic/mix slots kept (least recently used dropped)
+QUIZ_POOL_PREFILL_TOPICS = ["TLS", "firewalls", "VPN"]  # random quizzes are always pooled
+QUIZ_POOL_PREFILL_MIX = (2, 2, 1)               # (mcq, tf, open) used by app_quiz
+
+# Quizzes generated at once per process; extra requests queue (FIFO)
+GENERATION_CONCURRENCY = 2
+# Show Q1 while the LLM is still writing the remaining questions
+STREAM_QUIZ_GENERATION = True
+# How a quiz is asked of the LLM: "single" (one prompt for all questions),
+# "type" (one sub-prompt per question type) or "question" (one per question).
+# Sub-prompts share the retrieved context and run concurrently, so a long
+# quiz takes about as long as its slowest part; give the Ollama server
+# OLLAMA_NUM_PARALLEL >= SUBPROMPT_CONCURRENCY.
+# Limitation: every sub-prompt carries the full context. The prompt puts it
+# first so Ollama can reuse the evaluated prefix, but that only happens on
+# a server slot that already holds it; otherwise each sub-prompt pays the
+# full prompt evaluation again, and "question" on a CPU-only server can be
+# slower than "single" overall. Measure with prompt evaluation included.
+GENERATION_SPLIT = "single"
+SUBPROMPT_CONCURRENCY = 4           # sub-prompts in flight per process
+
+# Print each raw quiz-generation LLM output (batch_generate_quiz.py turns it off)
+ECHO_RAW_LLM_RESPONSE = True
+# Save raw quiz-generation LLM outputs here (e.g. "logs/raw_llm"); "" = off
+RAW_LLM_LOG_DIR = ""
+
+# Open-ended grading: "overlap" (shared words) or "semantic" (embedding cosine)
+OPEN_GRADING_MODE = "overlap"
+SEMANTIC_FULL_THRESHOLD = 0.80      # cosine >= this: full credit
+SEMANTIC_PARTIAL_THRESHOLD = 0.60   # cosine >= this: half credit
+
+# Retrieval: "dense" (Chroma only) or "hybrid" (Chroma + BM25 index from ingest)
+RETRIEVAL_MODE = "hybrid"
+HYBRID_ALPHA = 0.5          # weight of the dense score; 1 - alpha goes to BM25
+HYBRID_FETCH_K = 20         # candidates taken from each side before fusion
+# Chunks per topic quiz: hybrid search ranks exact-term matches higher,
+# so fewer chunks cover the topic
+TOPIC_CONTEXT_K = 5 if RETRIEVAL_MODE == "hybrid" else 8
+
+# Random quizzes sample chunks from a topic catalog built at ingest
+# (k-means over chunk embeddings, see catalog_quiz.py)
+TOPIC_CATALOG_CLUSTERS = 0          # topics (0 = sqrt(chunks / 2), at most 64)
+TOPIC_CATALOG_RECLUSTER_FRACTION = 0.2  # re-cluster once this share of chunks changed (else new chunks join the nearest topic)
+RANDOM_QUIZ_TOPICS = 2              # topics one random quiz draws from
+
+# Quiz prompt context: drop near-duplicate / overlapping chunks, order them by
+# maximal marginal relevance and stop at a token budget (see context_quiz.py)
+CONTEXT_PACKING = True
+CONTEXT_TOKEN_BUDGET = 1500         # approx. llama3 tokens of retrieved text
+MMR_LAMBDA = 0.7                    # 1.0 = pure relevance, 0.0 = pure diversity
+NEAR_DUPLICATE_THRESHOLD = 0.95     # cosine at which a chunk counts as a duplicate
+
+# Vector backend: "chroma" or "faiss" (build it with: python faiss_quiz.py)
+VECTOR_BACKEND = "chroma"
+FAISS_INDEX_DIR = "faiss"           # inside the corpus directory (db/ or $CORPUS_DIR)
+FAISS_INDEX_TYPE = "hnsw"           # "hnsw", "ivfpq" (large corpora) or "flat" (exact)
+FAISS_HNSW_M = 32                   # graph degree: higher = better recall, more memory
+FAISS_HNSW_EF_CONSTRUCTION = 200
+FAISS_HNSW_EF_SEARCH = 64           # query-time breadth: higher = better recall, slower
+FAISS_IVF_NLIST = 0                 # IVF lists (0 = 4 * sqrt(chunks))
+FAISS_IVF_NPROBE = 8                # lists scanned per query
+FAISS_PQ_M = 16                     # PQ bytes per vector (must divide the embedding dim)
+FAISS_MMAP = True                   # memory-map the index file where the index type allows
+
+# Startup budget: run_quiz.py must show its first prompt within this many
+# seconds, with no LangChain / Chroma / numpy import (see bench_startup.py)
+STARTUP_BUDGET_SECONDS = 0.5
@@ -0,0 +1,143 @@
+# context_quiz.py
+# Pack retrieved chunks into a compact quiz-generation context
+#
+# Chunks are CHUNK_SIZE=1000 characters with 200 characters of overlap, so
+# neighbouring chunks repeat each other and the same slide text often comes
+# back more than once. Before the chunks go into the prompt:
+#   1. near-duplicates (cosine >= NEAR_DUPLICATE_THRESHOLD) are dropped,
+#   2. the rest are ordered by maximal marginal relevance (relevance to the
+#      query traded off against similarity to chunks already chosen),
+#   3. text a chosen chunk shares with another chosen chunk (the splitter
+#      overlap) is cut from the later one,
+#   4. chunks are added until CONTEXT_TOKEN_BUDGET is reached.
+#
+# Chunk vectors come from the shared embedder, whose disk cache already
+# holds every chunk embedded at ingest, so this costs no model calls for
+# ingested text; only the query may need embedding.
+
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from config_quiz import (
+    CONTEXT_TOKEN_BUDGET,
+    MMR_LAMBDA,
+    NEAR_DUPLICATE_THRESHOLD,
+)
+from retrieval_quiz import get_embeddings
+from vectors_quiz import unit_rows
+
+# Rough llama3 tokens per character of English slide text.
+CHARS_PER_TOKEN = 4
+# Shortest shared boundary treated as splitter overlap.
+MIN_OVERLAP_CHARS = 40
+# Don't bother adding a truncated chunk smaller than this.
+MIN_PARTIAL_TOKENS = 64
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def mmr_order(
+    query_vec: np.ndarray,
+    doc_vecs: np.ndarray,
+    lambda_mult: float = MMR_LAMBDA,
+    duplicate_threshold: float = NEAR_DUPLICATE_THRESHOLD,
+) -> List[int]:
+    """
+    Indices of `doc_vecs` (unit rows) in MMR order, skipping any document
+    whose similarity to an already chosen one reaches `duplicate_threshold`.
+    """
+    n = doc_vecs.shape[0]
+    if n == 0:
+        return []
+    relevance = doc_vecs @ query_vec
+    pairwise = doc_vecs @ doc_vecs.T
+
+    chosen: List[int] = []
+    redundancy = np.full(n, -np.inf, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+    while available.any():
+        penalty = np.where(np.isfinite(redundancy), redundancy, 0.0)
+        score = lambda_mult * relevance - (1 - lambda_mult) * penalty
+        score[~available] = -np.inf
+        best = int(np.argmax(score))
+        chosen.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, pairwise[best])
+        available &= redundancy < duplicate_threshold
+    return chosen
+
+
+def trim_overlap(kept: str, text: str, max_overlap: int) -> str:
+    """
+    Remove from `text` the splitter overlap it shares with `kept`: a start
+    that repeats the end of `kept`, or an end that repeats its start.
+    """
+    window = max_overlap + MIN_OVERLAP_CHARS
+
+    probe = text[:MIN_OVERLAP_CHARS]
+    if len(probe) == MIN_OVERLAP_CHARS:
+        pos = kept.find(probe, max(0, len(kept) - window))
+        while pos != -1:
+            if text.startswith(kept[pos:]):
+                text = text[len(kept) - pos:].lstrip()
+                break
+            pos = kept.find(probe, pos + 1)
+
+    probe = kept[:MIN_OVERLAP_CHARS]
+    if len(probe) == MIN_OVERLAP_CHARS:
+        pos = text.find(probe, max(0, len(text) - window))
+        while pos != -1:
+            if kept.startswith(text[pos:]):
+                text = text[:pos].rstrip()
+                break
+            pos = text.find(probe, pos + 1)
+    return text
+
+
+def _truncate_to_tokens(text: str, tokens: int) -> str:
+    cut = text[: tokens * CHARS_PER_TOKEN]
+    space = cut.rfind(" ")
+    return cut[:space] if space > len(cut) // 2 else cut
+
+
+def pack_context(
+    query: str,
+    texts: Sequence[str],
+    max_overlap: int,
+    token_budget: int = CONTEXT_TOKEN_BUDGET,
+) -> List[Tuple[int, str]]:
+    """
+    Choose and trim chunks for the prompt. Returns (index into `texts`,
+    text to use) in prompt order.
+    """
+    candidates = [i for i, t in enumerate(texts) if t.strip()]
+    if not candidates:
+        return []
+
+    embedder = get_embeddings()
+    doc_vecs = unit_rows(embedder.embed_documents([texts[i] for i in candidates]))
+    query_vec = unit_rows([embedder.embed_query(query)])[0]
+    order = [candidates[j] for j in mmr_order(query_vec, doc_vecs)]
+
+    packed: List[Tuple[int, str]] = []
+    used = 0
+    for i in order:
+        text = texts[i]
+        for _, kept in packed:
+            text = trim_overlap(kept, text, max_overlap)
+        if not text.strip():
+            continue
+
+        cost = estimate_tokens(text)
+        if used + cost <= token_budget:
+            packed.append((i, text))
+            used += cost
+            continue
+        remaining = token_budget - used
+        if remaining >= MIN_PARTIAL_TOKENS:
+            packed.append((i, _truncate_to_tokens(text, remaining)))
+        break
+    return packed
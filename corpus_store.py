@@ -0,0 +1,115 @@
+# corpus_store.py
+# One ingested corpus (one Chroma collection) shared by the Quiz Agent and the Q-A Bot
+#
+# ingest_quiz.py parses, splits and embeds the course files once into
+# COLLECTION_NAME under the corpus directory; Q-A Bot/src/ingest.py runs the
+# same ingest. Every chunk is tagged with its file type, and each app reads
+# the collection through a view: a metadata filter on the file types it
+# answers from (the quiz uses PDF/DOCX/PPTX, the Q-A Bot PDF/PPTX).
+#
+# The corpus directory is DB_DIR of the repository root unless CORPUS_DIR is
+# set, so both apps find it whatever directory they are started from. The
+# FAISS index lives inside it, and the embedding / LLM caches are resolved
+# against the repository root the same way.
+
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from config_quiz import COLLECTION_NAME, DATA_DIR, DB_DIR, EMBEDDING_CACHE_PATH, FAISS_INDEX_DIR, LLM_CACHE_PATH
+from ingest_pipeline import DOCX_SUFFIXES, PDF_SUFFIXES, PPTX_SUFFIXES, SUPPORTED_SUFFIXES
+
+REPO_ROOT = Path(__file__).resolve().parent
+
+CORPUS_DIR = os.environ.get("CORPUS_DIR", str(REPO_ROOT / DB_DIR))
+CORPUS_DATA_DIR = os.environ.get("CORPUS_DATA_DIR", str(REPO_ROOT / DATA_DIR))
+CORPUS_FAISS_DIR = os.path.join(CORPUS_DIR, FAISS_INDEX_DIR)
+
+
+def repo_path(path: str) -> str:
+    """A config path made absolute against the repository root ("" stays "", i.e. off)."""
+    return str(REPO_ROOT / path) if path else path
+
+
+EMBEDDING_CACHE_FILE = repo_path(EMBEDDING_CACHE_PATH)
+LLM_CACHE_FILE = repo_path(LLM_CACHE_PATH)
+
+# Chunks read per request when paging through the collection
+STORE_PAGE_SIZE = 1000
+
+# Bump when the chunk metadata changes; ingest_quiz.py then rebuilds once
+# (the embedding cache makes that cheap).
+CORPUS_SCHEMA = 2
+
+# File types (suffixes) each app answers from
+APP_VIEWS: Dict[str, Tuple[str, ...]] = {
+    "quiz": SUPPORTED_SUFFIXES,
+    "qa": PDF_SUFFIXES + PPTX_SUFFIXES,
+}
+
+_CANONICAL_TYPES = {s: s for s in SUPPORTED_SUFFIXES}
+_CANONICAL_TYPES.update({s: ".docx" for s in DOCX_SUFFIXES})
+_CANONICAL_TYPES.update({s: ".pptx" for s in PPTX_SUFFIXES})
+
+
+def file_type(path: Path) -> str:
+    """Chunk metadata value for `path`: ".pdf", ".docx" or ".pptx"."""
+    suffix = Path(path).suffix.lower()
+    return _CANONICAL_TYPES.get(suffix, suffix)
+
+
+def view_filter(app: str) -> Optional[Dict[str, Any]]:
+    """Chroma `where` filter for an app's view, or None if it sees every chunk."""
+    suffixes = APP_VIEWS[app]
+    if set(suffixes) >= set(SUPPORTED_SUFFIXES):
+        return None
+    types = sorted({file_type(Path("x" + s)) for s in suffixes})
+    return {"file_type": {"$in": types}}
+
+
+def open_corpus(embeddings, db_dir: str = CORPUS_DIR, collection: str = COLLECTION_NAME):
+    try:
+        from langchain_chroma import Chroma
+    except ImportError:
+        from langchain_community.vectorstores import Chroma
+
+    os.makedirs(db_dir, exist_ok=True)
+    return Chroma(
+        collection_name=collection,
+        embedding_function=embeddings,
+        persist_directory=db_dir,
+    )
+
+
+def view_count(vectordb, app: str) -> int:
+    """Chunks visible to `app`."""
+    where = view_filter(app)
+    if where is None:
+        return vectordb._collection.count()
+    return len(vectordb._collection.get(where=where, include=[])["ids"])
+
+
+def iter_store(
+    vectordb,
+    include: List[str],
+    ids: Optional[Sequence[str]] = None,
+    page_size: int = STORE_PAGE_SIZE,
+) -> Iterator[Dict[str, Any]]:
+    """
+    `vectordb.get()` results (IDs plus the `include` fields) page by page,
+    for the given chunk IDs or the whole collection, so the caller never
+    holds more than one page of it.
+    """
+    if ids is not None:
+        for i in range(0, len(ids), page_size):
+            page = vectordb.get(ids=list(ids[i:i + page_size]), include=include)
+            if page.get("ids"):
+                yield page
+        return
+    offset = 0
+    while True:
+        page = vectordb.get(include=include, limit=page_size, offset=offset)
+        if not page.get("ids"):
+            return
+        yield page
+        offset += len(page["ids"])
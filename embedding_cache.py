@@ -0,0 +1,155 @@
+# embedding_cache.py
+# Persistent, content-addressed embedding cache shared by both ingest scripts
+# and query-time retrieval.
+#
+# Vectors are stored in SQLite keyed by sha256(model name, kind, text), so
+# re-ingesting after a chunking change or rebuilding a db/ only embeds text
+# that has never been seen before. The table is bounded by an LRU policy
+# (sqlite_lru.py).
+
+import hashlib
+import time
+from array import array
+from typing import Dict, List, Optional, Sequence
+
+from langchain_core.embeddings import Embeddings
+
+from sqlite_lru import SQLiteLRUStore
+
+_SQL_BATCH = 500
+
+
+def _key(model_name: str, kind: str, text: str) -> bytes:
+    h = hashlib.sha256()
+    h.update(model_name.encode("utf-8"))
+    h.update(b"\0" + kind.encode("ascii") + b"\0")
+    h.update(text.encode("utf-8"))
+    return h.digest()
+
+
+def _encode(vec: Sequence[float]) -> bytes:
+    return array("f", vec).tobytes()
+
+
+def _decode(blob: bytes) -> List[float]:
+    vec = array("f")
+    vec.frombytes(blob)
+    return vec.tolist()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps a LangChain `Embeddings` (e.g. HuggingFaceEmbeddings) with an
+    on-disk cache. Misses are embedded in one batch by the wrapped model.
+    `hits` / `misses` (and `stats()`) count cache traffic for this process.
+    """
+
+    def __init__(
+        self,
+        base: Embeddings,
+        model_name: str,
+        path: str,
+        max_entries: int = 200_000,
+    ):
+        self.base = base
+        self.model_name = model_name
+        self.path = path
+
+        self.hits = 0
+        self.misses = 0
+
+        self._db = SQLiteLRUStore(
+            path,
+            "embeddings",
+            "key BLOB PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL",
+            max_entries,
+        )
+
+    # ---- Embeddings API ----
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(texts, "doc", self.base.embed_documents)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text], "query", lambda ts: [self.base.embed_query(ts[0])])[0]
+
+    # ---- cache ----
+
+    def _embed(self, texts: List[str], kind: str, compute) -> List[List[float]]:
+        keys = [_key(self.model_name, kind, t) for t in texts]
+        found = self._lookup(keys)
+
+        missing: Dict[bytes, str] = {}
+        for k, t in zip(keys, texts):
+            if k not in found and k not in missing:
+                missing[k] = t
+
+        with self._db.lock:
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            vectors = compute(list(missing.values()))
+            new_rows = dict(zip(missing.keys(), vectors))
+            self._store(new_rows)
+            found.update(new_rows)
+
+        return [list(found[k]) for k in keys]
+
+    def _lookup(self, keys: List[bytes]) -> Dict[bytes, List[float]]:
+        found: Dict[bytes, List[float]] = {}
+        unique = list(dict.fromkeys(keys))
+        now = time.time()
+        db = self._db
+        with db.lock:
+            for i in range(0, len(unique), _SQL_BATCH):
+                part = unique[i : i + _SQL_BATCH]
+                marks = ",".join("?" * len(part))
+                rows = db.conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({marks})", part
+                ).fetchall()
+                for k, blob in rows:
+                    found[bytes(k)] = _decode(blob)
+            if found:
+                db.conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, k) for k in found],
+                )
+                db.conn.commit()
+        return found
+
+    def _store(self, rows: Dict[bytes, Sequence[float]]) -> None:
+        now = time.time()
+        db = self._db
+        with db.lock:
+            cur = db.conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(k, _encode(v), now) for k, v in rows.items()],
+            )
+            db.inserted(cur.rowcount)
+            db.conn.commit()
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self._db.evictions,
+            "entries": len(self._db),
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
+
+    def close(self) -> None:
+        self._db.close()
+
+
+def cached_embeddings(
+    base: Embeddings,
+    model_name: str,
+    path: Optional[str],
+    max_entries: int = 200_000,
+) -> Embeddings:
+    """Wrap `base` with the on-disk cache, or return it unchanged if `path` is empty."""
+    if not path:
+        return base
+    return CachedEmbeddings(base, model_name, path, max_entries=max_entries)
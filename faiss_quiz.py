@@ -0,0 +1,315 @@
+# faiss_quiz.py
+# FAISS vector backend for the Quiz Agent (VECTOR_BACKEND = "faiss")
+#
+# Chroma stays the system of record: ingest_quiz.py writes chunks and
+# embeddings there. This module exports them into a FAISS index (HNSW,
+# IVF-PQ or exact flat search) plus a small on-disk docstore, which the apps
+# then query instead of Chroma. The index file can be memory-mapped, so
+# several app processes share one copy of it in the page cache.
+#
+# Build (re-run after every ingest):
+#   python faiss_quiz.py [--type hnsw|ivfpq|flat] [--hnsw-m 32] [--nlist 0] [--pq-m 16]
+#
+# Files in CORPUS_FAISS_DIR (FAISS_INDEX_DIR inside the corpus directory):
+#   index.faiss    FAISS index over unit-normalized embeddings (inner product)
+#   chunks.jsonl   one {"id", "text", "metadata"} line per index row
+#   offsets.npy    byte offset of every chunks.jsonl line (memory-mapped)
+#   meta.json      build parameters and the ingest stamp it was built from
+#   .ingest_stamp  touched on every build; running apps reopen the index
+
+import argparse
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config_quiz import (
+    FAISS_INDEX_TYPE,
+    FAISS_HNSW_M,
+    FAISS_HNSW_EF_CONSTRUCTION,
+    FAISS_HNSW_EF_SEARCH,
+    FAISS_IVF_NLIST,
+    FAISS_IVF_NPROBE,
+    FAISS_PQ_M,
+    FAISS_MMAP,
+)
+from corpus_store import CORPUS_DIR, CORPUS_FAISS_DIR, iter_store
+from resource_registry import read_ingest_stamp, write_ingest_stamp
+from vectors_quiz import unit_rows
+
+INDEX_FILE = "index.faiss"
+CHUNKS_FILE = "chunks.jsonl"
+OFFSETS_FILE = "offsets.npy"
+META_FILE = "meta.json"
+
+
+def _import_faiss():
+    try:
+        import faiss
+    except ImportError as e:
+        raise ImportError(
+            "VECTOR_BACKEND='faiss' needs the faiss-cpu package (pip install faiss-cpu)."
+        ) from e
+    return faiss
+
+
+# ============ BUILD ============
+
+def export_chroma(vectordb) -> Tuple[List[str], List[str], List[Dict[str, Any]], np.ndarray]:
+    """Read every chunk (id, text, metadata, embedding) out of a Chroma store, page by page."""
+    ids: List[str] = []
+    texts: List[str] = []
+    metas: List[Dict[str, Any]] = []
+    vectors: List[np.ndarray] = []
+    for page in iter_store(vectordb, ["documents", "metadatas", "embeddings"]):
+        ids.extend(page["ids"])
+        texts.extend(t or "" for t in page["documents"])
+        metas.extend(m or {} for m in page["metadatas"])
+        vectors.append(np.asarray(page["embeddings"], dtype=np.float32))
+    matrix = np.concatenate(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+    return ids, texts, metas, matrix
+
+
+def build_index(
+    vectors: np.ndarray,
+    index_type: str = FAISS_INDEX_TYPE,
+    hnsw_m: int = FAISS_HNSW_M,
+    ef_construction: int = FAISS_HNSW_EF_CONSTRUCTION,
+    nlist: int = FAISS_IVF_NLIST,
+    pq_m: int = FAISS_PQ_M,
+):
+    """
+    Build a FAISS inner-product index over unit vectors.
+
+    hnsw:  graph index, best recall/latency, ~(d*4 + M*8) bytes per vector
+    ivfpq: inverted lists of PQ codes, pq_m bytes per vector, for very large
+           corpora; needs enough vectors to train (falls back to flat)
+    flat:  exact search, the reference for recall
+    """
+    faiss = _import_faiss()
+    n, d = vectors.shape
+    metric = faiss.METRIC_INNER_PRODUCT
+
+    if index_type == "ivfpq":
+        if nlist <= 0:
+            nlist = int(4 * np.sqrt(n))
+        nlist = max(1, min(nlist, n // 39))
+        # k-means wants ~39 training points per centroid; PQ codebooks have 256.
+        if d % pq_m != 0 or n < 39 * max(256, nlist):
+            print(f"Not enough vectors ({n}) or pq_m={pq_m} doesn't divide d={d}; using a flat index.")
+            index_type = "flat"
+        else:
+            quantizer = faiss.IndexFlatIP(d)
+            index = faiss.IndexIVFPQ(quantizer, d, nlist, pq_m, 8, metric)
+            index.train(vectors)
+            index.add(vectors)
+            return index
+
+    if index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(d, hnsw_m, metric)
+        index.hnsw.efConstruction = ef_construction
+        index.add(vectors)
+        return index
+
+    index = faiss.IndexFlatIP(d)
+    index.add(vectors)
+    return index
+
+
+def build_from_chroma(vectordb, out_dir: str = CORPUS_FAISS_DIR, **index_params) -> Dict[str, Any]:
+    """Export Chroma into a FAISS index + docstore under `out_dir`."""
+    faiss = _import_faiss()
+    start = time.perf_counter()
+    ids, texts, metas, vectors = export_chroma(vectordb)
+    if not ids:
+        raise ValueError("The Chroma collection is empty; run ingest_quiz.py first.")
+    vectors = unit_rows(vectors)
+    index = build_index(vectors, **index_params)
+
+    os.makedirs(out_dir, exist_ok=True)
+    offsets = np.zeros(len(ids), dtype=np.int64)
+    with open(os.path.join(out_dir, CHUNKS_FILE + ".tmp"), "wb") as f:
+        for i, (cid, text, meta) in enumerate(zip(ids, texts, metas)):
+            offsets[i] = f.tell()
+            line = json.dumps({"id": cid, "text": text, "metadata": meta}, ensure_ascii=False)
+            f.write(line.encode("utf-8") + b"\n")
+    np.save(os.path.join(out_dir, OFFSETS_FILE + ".tmp.npy"), offsets)
+    faiss.write_index(index, os.path.join(out_dir, INDEX_FILE + ".tmp"))
+
+    os.replace(os.path.join(out_dir, CHUNKS_FILE + ".tmp"), os.path.join(out_dir, CHUNKS_FILE))
+    os.replace(os.path.join(out_dir, OFFSETS_FILE + ".tmp.npy"), os.path.join(out_dir, OFFSETS_FILE))
+    os.replace(os.path.join(out_dir, INDEX_FILE + ".tmp"), os.path.join(out_dir, INDEX_FILE))
+
+    meta = {
+        "index_type": type(index).__name__,
+        "params": index_params,
+        "count": len(ids),
+        "dim": int(vectors.shape[1]),
+        "build_seconds": round(time.perf_counter() - start, 2),
+    }
+    # Record the corpus ingest this index was built from (staleness check),
+    # and stamp the index dir itself: running apps reopen only their vector
+    # store, without the corpus-wide reload that clears pools and caches.
+    meta["ingest_stamp"] = list(read_ingest_stamp(CORPUS_DIR) or ())
+    write_ingest_stamp(out_dir)
+    with open(os.path.join(out_dir, META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=1)
+    return meta
+
+
+# ============ QUERY ============
+
+class _FaissRetriever:
+    def __init__(self, store: "FaissVectorStore", k: int):
+        self.store = store
+        self.k = k
+
+    def invoke(self, query: str):
+        return self.store.similarity_search(query, k=self.k)
+
+    get_relevant_documents = invoke
+
+
+class FaissVectorStore:
+    """
+    Read-only vector store over a built FAISS index, exposing the parts of
+    the LangChain Chroma API the Quiz Agent uses (similarity search with
+    relevance scores, as_retriever, get by IDs).
+    """
+
+    def __init__(
+        self,
+        index_dir: str,
+        embeddings,
+        mmap: bool = FAISS_MMAP,
+        ef_search: int = FAISS_HNSW_EF_SEARCH,
+        nprobe: int = FAISS_IVF_NPROBE,
+    ):
+        faiss = _import_faiss()
+        self.index_dir = index_dir
+        self.embeddings = embeddings
+
+        path = os.path.join(index_dir, INDEX_FILE)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No FAISS index in '{index_dir}'; run python faiss_quiz.py")
+        self.index = None
+        if mmap:
+            try:
+                self.index = faiss.read_index(path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+            except RuntimeError:
+                self.index = None  # index type without mmap support
+        if self.index is None:
+            self.index = faiss.read_index(path)
+        self.set_search_params(ef_search=ef_search, nprobe=nprobe)
+
+        self._offsets = np.load(os.path.join(index_dir, OFFSETS_FILE), mmap_mode="r")
+        self._chunks = open(os.path.join(index_dir, CHUNKS_FILE), "rb")
+        self._lock = threading.Lock()
+        self._rows: Optional[Dict[str, int]] = None
+
+        meta_path = os.path.join(index_dir, META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                built_from = json.load(f).get("ingest_stamp")
+            current = read_ingest_stamp(CORPUS_DIR)
+            if built_from and current and list(current) != built_from:
+                print("FAISS index is older than the last ingest; rebuild it with python faiss_quiz.py")
+
+    def set_search_params(self, ef_search: Optional[int] = None, nprobe: Optional[int] = None) -> None:
+        if ef_search is not None and hasattr(self.index, "hnsw"):
+            self.index.hnsw.efSearch = ef_search
+        if nprobe is not None and hasattr(self.index, "nprobe"):
+            self.index.nprobe = nprobe
+
+    def __len__(self) -> int:
+        return int(self.index.ntotal)
+
+    # ---- docstore ----
+
+    def _record(self, row: int) -> Dict[str, Any]:
+        with self._lock:
+            self._chunks.seek(int(self._offsets[row]))
+            line = self._chunks.readline()
+        return json.loads(line)
+
+    def _document(self, row: int):
+        from langchain_core.documents import Document
+
+        rec = self._record(row)
+        return Document(page_content=rec["text"], metadata=rec["metadata"])
+
+    def _row_index(self) -> Dict[str, int]:
+        if self._rows is None:
+            rows: Dict[str, int] = {}
+            with open(os.path.join(self.index_dir, CHUNKS_FILE), "rb") as f:
+                for i, line in enumerate(f):
+                    rows[json.loads(line)["id"]] = i
+            self._rows = rows
+        return self._rows
+
+    # ---- search ----
+
+    def search_vectors(self, vectors: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Raw FAISS search over query vectors: (cosine scores, rows), -1 rows = no hit."""
+        return self.index.search(unit_rows(vectors), k)
+
+    def similarity_search_with_relevance_scores(self, query: str, k: int = 4, **kwargs):
+        scores, rows = self.search_vectors(np.asarray([self.embeddings.embed_query(query)]), k)
+        return [
+            (self._document(int(row)), float(score))
+            for score, row in zip(scores[0], rows[0])
+            if row >= 0
+        ]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_relevance_scores(query, k)]
+
+    def as_retriever(self, search_kwargs: Optional[Dict[str, Any]] = None) -> _FaissRetriever:
+        return _FaissRetriever(self, (search_kwargs or {}).get("k", 4))
+
+    def get(self, ids: Optional[Sequence[str]] = None, include: Optional[List[str]] = None, **kwargs) -> Dict[str, list]:
+        rows_by_id = self._row_index()
+        found = [(cid, rows_by_id[cid]) for cid in (ids or []) if cid in rows_by_id]
+        records = [self._record(row) for _, row in found]
+        return {
+            "ids": [cid for cid, _ in found],
+            "documents": [r["text"] for r in records],
+            "metadatas": [r["metadata"] for r in records],
+        }
+
+
+# ============ MAIN ============
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Build the Quiz Agent's FAISS index from the Chroma DB.")
+    ap.add_argument("--type", choices=["hnsw", "ivfpq", "flat"], default=FAISS_INDEX_TYPE)
+    ap.add_argument("--hnsw-m", type=int, default=FAISS_HNSW_M, help="HNSW graph degree.")
+    ap.add_argument("--ef-construction", type=int, default=FAISS_HNSW_EF_CONSTRUCTION)
+    ap.add_argument("--nlist", type=int, default=FAISS_IVF_NLIST, help="IVF lists (0 = 4*sqrt(n)).")
+    ap.add_argument("--pq-m", type=int, default=FAISS_PQ_M, help="PQ sub-quantizers (bytes per vector).")
+    ap.add_argument("--out", default=CORPUS_FAISS_DIR)
+    args = ap.parse_args(argv)
+
+    from ingest_quiz import _open_vectorstore
+
+    print("Exporting chunks from Chroma...")
+    meta = build_from_chroma(
+        _open_vectorstore(),
+        out_dir=args.out,
+        index_type=args.type,
+        hnsw_m=args.hnsw_m,
+        ef_construction=args.ef_construction,
+        nlist=args.nlist,
+        pq_m=args.pq_m,
+    )
+    print(
+        f"Done! {meta['index_type']} over {meta['count']} chunks (dim {meta['dim']}) "
+        f"in {meta['build_seconds']}s. Index in '{args.out}/'."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+# ingest_pipeline.py
+# Parallel load -> split -> embed pipeline shared by ingest_quiz.py and Q-A Bot/src/ingest.py
+#
+#   [process pool: parse files] --queue--> [thread: split pages] --queue--> BatchedVectorWriter
+#
+# Parsing (pypdf / docx2txt / unstructured) is CPU-bound, so it runs in a
+# process pool sized to the machine. Parsed pages stream through bounded
+# queues into the splitter and then to the caller, which embeds while later
+# files are still being parsed. At most `workers * 2` files are in flight.
+
+import hashlib
+import json
+import os
+import queue
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+PDF_SUFFIXES = (".pdf",)
+DOCX_SUFFIXES = (".docx", ".doc")
+PPTX_SUFFIXES = (".pptx", ".ppt")
+SUPPORTED_SUFFIXES = PDF_SUFFIXES + DOCX_SUFFIXES + PPTX_SUFFIXES
+
+DEFAULT_QUEUE_SIZE = 8
+DEFAULT_BATCH_SIZE = 64
+
+_DONE = object()
+
+
+# ============ FILES ============
+
+def list_data_files(data_dir: str, suffixes=SUPPORTED_SUFFIXES) -> List[Path]:
+    data_path = Path(data_dir)
+    if not data_path.exists():
+        print(f"Data directory '{data_dir}' does not exist.")
+        return []
+
+    files: List[Path] = []
+    for path in sorted(data_path.glob("**/*")):
+        if path.is_dir():
+            continue
+        if path.suffix.lower() not in suffixes:
+            print(f"Skipping unsupported file type: {path.name}")
+            continue
+        files.append(path)
+    return files
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def chunk_ids_for(key: str, sha256: str, n_chunks: int) -> List[str]:
+    """Deterministic chunk IDs: same file path + content -> same IDs."""
+    prefix = hashlib.sha1(f"{key}\0{sha256}".encode("utf-8")).hexdigest()[:20]
+    return [f"{prefix}-{i:05d}" for i in range(n_chunks)]
+
+
+def load_file(path: str):
+    """Parse one file into LangChain Documents (runs inside a worker process)."""
+    from langchain_community.document_loaders import (
+        PyPDFLoader,
+        Docx2txtLoader,
+        UnstructuredPowerPointLoader,
+    )
+
+    suffix = Path(path).suffix.lower()
+    if suffix in PDF_SUFFIXES:
+        loader = PyPDFLoader(str(path))
+    elif suffix in DOCX_SUFFIXES:
+        loader = Docx2txtLoader(str(path))
+    elif suffix in PPTX_SUFFIXES:
+        loader = UnstructuredPowerPointLoader(str(path))
+    else:
+        raise ValueError(f"Unsupported file type: {path}")
+
+    print(f"Loading {path}...")
+    return loader.load()
+
+
+def default_workers() -> int:
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+# ============ STAGES ============
+
+def _parse_stage(paths: List[Path], workers: int, out_q: "queue.Queue", stop: threading.Event):
+    max_in_flight = workers * 2
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = {}
+            it = iter(paths)
+            exhausted = False
+
+            while pending or not exhausted:
+                while not exhausted and len(pending) < max_in_flight:
+                    path = next(it, None)
+                    if path is None:
+                        exhausted = True
+                        break
+                    pending[pool.submit(load_file, str(path))] = path
+
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    path = pending.pop(fut)
+                    out_q.put((path, fut.result()))
+                    if stop.is_set():
+                        return
+    except BaseException as e:
+        out_q.put(e)
+    finally:
+        out_q.put(_DONE)
+
+
+def _split_stage(
+    in_q: "queue.Queue",
+    out_q: "queue.Queue",
+    chunk_size: int,
+    chunk_overlap: int,
+    max_docs: int,
+    stop: threading.Event,
+):
+    try:
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+        splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+        )
+        n_docs = 0
+        while True:
+            item = in_q.get()
+            if item is _DONE or isinstance(item, BaseException):
+                if item is not _DONE:
+                    out_q.put(item)
+                break
+            if stop.is_set():
+                continue
+
+            path, docs = item
+            if max_docs:
+                docs = docs[: max(0, max_docs - n_docs)]
+            n_docs += len(docs)
+            out_q.put((path, splitter.split_documents(docs)))
+    except BaseException as e:
+        out_q.put(e)
+    finally:
+        out_q.put(_DONE)
+
+
+def _drain(q: "queue.Queue") -> None:
+    try:
+        while True:
+            q.get_nowait()
+    except queue.Empty:
+        pass
+
+
+# ============ PIPELINE ============
+
+def iter_file_chunks(
+    paths: Iterable[Path],
+    chunk_size: int,
+    chunk_overlap: int,
+    workers: Optional[int] = None,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    max_docs: int = 0,
+) -> Iterator[Tuple[Path, List]]:
+    """
+    Yield `(path, chunks)` for every file as soon as it has been parsed
+    and split. Files arrive in completion order, not input order.
+    `max_docs` (0 = all) caps the number of parsed pages passed on.
+    """
+    paths = list(paths)
+    if not paths:
+        return
+    workers = workers or default_workers()
+    workers = min(workers, len(paths))
+
+    parsed_q: "queue.Queue" = queue.Queue(maxsize=queue_size)
+    split_q: "queue.Queue" = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+
+    threads = [
+        threading.Thread(
+            target=_parse_stage,
+            args=(paths, workers, parsed_q, stop),
+            name="ingest-parse",
+            daemon=True,
+        ),
+        threading.Thread(
+            target=_split_stage,
+            args=(parsed_q, split_q, chunk_size, chunk_overlap, max_docs, stop),
+            name="ingest-split",
+            daemon=True,
+        ),
+    ]
+    for t in threads:
+        t.start()
+
+    try:
+        while True:
+            item = split_q.get()
+            if item is _DONE:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        # Unblock the stages if the caller stops early or fails. Both queues
+        # are drained: if the split stage died, nothing else empties
+        # parsed_q and the parse stage would block on it forever.
+        stop.set()
+        while any(t.is_alive() for t in threads):
+            _drain(split_q)
+            _drain(parsed_q)
+            for t in threads:
+                t.join(timeout=0.1)
+
+
+# ============ WRITER ============
+
+class BatchedVectorWriter:
+    """
+    Embeds and upserts chunks into a LangChain vector store in fixed-size
+    batches, so only one batch of texts/vectors is held at a time.
+
+    After every committed batch, per-file progress is written to a JSON
+    checkpoint. If the ingest crashes, the next run with the same settings
+    skips the chunks that were already committed and resumes with the
+    first uncommitted batch. Chunk IDs must be deterministic
+    (see `chunk_ids_for`) for the resume to line up.
+    """
+
+    def __init__(
+        self,
+        vectordb,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        checkpoint_path: Optional[str] = None,
+        settings: Optional[Dict[str, Any]] = None,
+        on_file_done: Optional[Callable[[str, str, List[str]], None]] = None,
+    ):
+        self.vectordb = vectordb
+        self.batch_size = max(1, batch_size)
+        self.checkpoint_path = checkpoint_path
+        self.settings = settings or {}
+        self.on_file_done = on_file_done
+
+        self.files: Dict[str, Dict[str, Any]] = self._load_checkpoint()
+        self._ids: Dict[str, List[str]] = {}
+        self._buffer: List[Tuple[str, str, str, Dict[str, Any]]] = []
+
+        self.committed_chunks = 0
+        self.skipped_chunks = 0
+        self.batches = 0
+
+    # ---- checkpoint ----
+
+    def _load_checkpoint(self) -> Dict[str, Dict[str, Any]]:
+        if not self.checkpoint_path:
+            return {}
+        try:
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        if data.get("settings") != self.settings:
+            return {}
+        files = data.get("files", {})
+        if files:
+            print(f"Resuming ingest from checkpoint ({len(files)} file(s) in progress).")
+        return files
+
+    def _save_checkpoint(self) -> None:
+        if not self.checkpoint_path:
+            return
+        tmp = self.checkpoint_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"settings": self.settings, "files": self.files}, f)
+        os.replace(tmp, self.checkpoint_path)
+
+    # ---- writing ----
+
+    def add_file(self, key: str, sha256: str, chunks: List, ids: List[str]) -> None:
+        """Queue one file's chunks; full batches are embedded and upserted immediately."""
+        state = self.files.get(key)
+        if state is None or state.get("sha256") != sha256 or state.get("total") != len(chunks):
+            state = {"sha256": sha256, "total": len(chunks), "committed": 0}
+            self.files[key] = state
+
+        start = state["committed"]
+        self.skipped_chunks += start
+        self._ids[key] = ids
+
+        if start >= len(chunks):
+            self._file_done(key)
+            return
+
+        for chunk, cid in zip(chunks[start:], ids[start:]):
+            self._buffer.append((key, cid, chunk.page_content, dict(chunk.metadata)))
+            if len(self._buffer) >= self.batch_size:
+                self.flush()
+
+    def flush(self) -> None:
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+
+        self.vectordb.add_texts(
+            texts=[text for _, _, text, _ in batch],
+            metadatas=[meta for _, _, _, meta in batch],
+            ids=[cid for _, cid, _, _ in batch],
+        )
+        self.batches += 1
+        self.committed_chunks += len(batch)
+
+        finished = []
+        for key, _, _, _ in batch:
+            state = self.files[key]
+            state["committed"] += 1
+            if state["committed"] >= state["total"]:
+                finished.append(key)
+        self._save_checkpoint()
+
+        for key in dict.fromkeys(finished):
+            self._file_done(key)
+
+    def _file_done(self, key: str) -> None:
+        state = self.files[key]
+        ids = self._ids.pop(key, [])
+        if self.on_file_done:
+            self.on_file_done(key, state["sha256"], ids)
+
+    def finish(self) -> None:
+        """Flush the last partial batch and drop the checkpoint."""
+        self.flush()
+        self.files = {}
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
@@ -1,86 +1,362 @@
 # ingest_quiz.py
-# Build a local vector database for the Quiz Agent using files in data/
+# Build a local vector database for the Quiz Agent using the course files in
+# the shared data folder (the repository's data/, or CORPUS_DATA_DIR)
+#
+# Files are parsed in parallel and streamed into the splitter and the
+# embedder (see ingest_pipeline.py).
+#
+# Ingestion is incremental: a manifest in db/ records the content hash of
+# every ingested file and the IDs of its chunks, so a re-run only embeds new
+# or changed files and deletes the chunks of removed ones. Pass --rebuild to
+# start from an empty collection.
+#
+# Chunks are embedded and upserted in batches of --batch-size. Progress is
+# checkpointed after every batch, so a crashed run resumes where it stopped.
+#
+# A BM25 index of the same chunks (db/bm25_index.npz, see bm25_quiz.py) is
+# updated alongside, by chunk ID, for hybrid retrieval. After each change
+# the chunks are also clustered into a topic catalog (db/topic_catalog.npz,
+# see catalog_quiz.py) that random quizzes sample from.
+#
+# The collection is the shared corpus of both apps (see corpus_store.py):
+# Q-A Bot/src/ingest.py runs this ingest too, and every chunk is tagged
+# with its file type so each app can read its own view of it. The manifest
+# records which data folder each file came from; an ingest only removes
+# the missing files of the folder it reads, never another folder's.
 
+import argparse
+import json
 import os
 from pathlib import Path
-
-from tqdm import tqdm
-from langchain_community.document_loaders import (
-    PyPDFLoader,
-    Docx2txtLoader,
-    UnstructuredPowerPointLoader,
-)
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import HuggingFaceEmbeddings
+from typing import Any, Dict, List, Tuple
 
 from config_quiz import (
-    DATA_DIR,
-    DB_DIR,
     COLLECTION_NAME,
     EMBEDDING_MODEL_NAME,
     CHUNK_SIZE,
     CHUNK_OVERLAP,
+    INGEST_WORKERS,
+    INGEST_BATCH_SIZE,
+    EMBEDDING_CACHE_MAX_ENTRIES,
 )
+from bm25_quiz import BM25Builder, bm25_index_path
+from catalog_quiz import build_catalog_from_store, topic_catalog_path, update_catalog_from_store
+from corpus_store import (
+    CORPUS_DATA_DIR,
+    CORPUS_DIR,
+    CORPUS_SCHEMA,
+    EMBEDDING_CACHE_FILE,
+    REPO_ROOT,
+    file_type,
+    open_corpus,
+)
+from embedding_cache import cached_embeddings
+from resource_registry import write_ingest_stamp
+import ingest_pipeline
+from ingest_pipeline import BatchedVectorWriter, chunk_ids_for, file_sha256
+
+# The LangChain loaders, splitter, Chroma and the embedder are imported inside
+# the functions that need them, so checking an unchanged corpus stays fast.
+
+MANIFEST_FILE = "ingest_manifest.json"
+CHECKPOINT_FILE = "ingest_checkpoint.json"
+MANIFEST_VERSION = 1
+
+
+# ============ FILES ============
 
+def list_data_files(data_dir: str = CORPUS_DATA_DIR) -> List[Path]:
+    return ingest_pipeline.list_data_files(data_dir)
 
-def load_docs_from_data_dir():
+
+def file_key(path: Path, data_dir: str = CORPUS_DATA_DIR) -> str:
+    """Manifest key of a file: its path inside the data folder, wherever that is."""
+    try:
+        return path.relative_to(data_dir).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+def data_dir_id(data_dir: str = CORPUS_DATA_DIR) -> str:
+    """How the manifest names a data folder: relative to the repository if inside it."""
+    path = Path(data_dir).resolve()
+    try:
+        return path.relative_to(REPO_ROOT).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+def load_docs_from_data_dir(data_dir: str = CORPUS_DATA_DIR):
     docs = []
-    data_path = Path(DATA_DIR)
-    if not data_path.exists():
-        print(f"Data directory '{DATA_DIR}' does not exist.")
-        return docs
-
-    for path in data_path.glob("**/*"):
-        if path.is_dir():
-            continue
-        suffix = path.suffix.lower()
-
-        if suffix == ".pdf":
-            loader = PyPDFLoader(str(path))
-        elif suffix in [".docx", ".doc"]:
-            loader = Docx2txtLoader(str(path))
-        elif suffix in [".pptx", ".ppt"]:
-            loader = UnstructuredPowerPointLoader(str(path))
-        else:
-            print(f"Skipping unsupported file type: {path.name}")
-            continue
-
-        print(f"Loading {path}...")
-        docs.extend(loader.load())
+    for path in list_data_files(data_dir):
+        docs.extend(ingest_pipeline.load_file(str(path)))
     return docs
 
 
-def main():
-    print("Loading documents from data/ ...")
-    docs = load_docs_from_data_dir()
-    if not docs:
-        print("No documents found in data/. Add PDFs/PPTX/DOCX and try again.")
-        return
+# ============ MANIFEST ============
+
+def _current_settings(
+    chunk_size: int = CHUNK_SIZE,
+    chunk_overlap: int = CHUNK_OVERLAP,
+    max_docs: int = 0,
+) -> Dict[str, Any]:
+    settings = {
+        "collection": COLLECTION_NAME,
+        "embedding_model": EMBEDDING_MODEL_NAME,
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+        "schema": CORPUS_SCHEMA,
+    }
+    if max_docs:
+        # A capped test ingest must not pass for a full one later.
+        settings["max_docs"] = max_docs
+    return settings
+
+
+def _manifest_path(db_dir: str = CORPUS_DIR) -> str:
+    return os.path.join(db_dir, MANIFEST_FILE)
+
+
+def load_manifest(db_dir: str = CORPUS_DIR) -> Dict[str, Any]:
+    try:
+        with open(_manifest_path(db_dir), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {}
+    return manifest
+
+
+def save_manifest(manifest: Dict[str, Any], db_dir: str = CORPUS_DIR) -> None:
+    os.makedirs(db_dir, exist_ok=True)
+    path = _manifest_path(db_dir)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def plan_ingest(
+    files: List[Path],
+    manifest_files: Dict[str, Dict[str, Any]],
+    data_dir: str = CORPUS_DATA_DIR,
+) -> Tuple[List[Tuple[Path, str]], List[str]]:
+    """
+    Compare the files on disk with the manifest.
+    Returns ([(path, sha256) to (re-)embed], [manifest keys to drop]).
+    Only files ingested from `data_dir` (or of unknown origin) are dropped
+    when missing; files of other data folders are left alone.
+    """
+    to_embed: List[Tuple[Path, str]] = []
+    seen = set()
+    folder = data_dir_id(data_dir)
+
+    for path in files:
+        key = file_key(path, data_dir)
+        seen.add(key)
+        sha = file_sha256(path)
+        entry = manifest_files.get(key)
+        if entry is None or entry.get("sha256") != sha:
+            to_embed.append((path, sha))
+
+    to_drop = [
+        key
+        for key, entry in manifest_files.items()
+        if key not in seen and entry.get("data_dir", folder) == folder
+    ]
+    to_drop.extend(key for key in (file_key(p, data_dir) for p, _ in to_embed) if key in manifest_files)
+    return to_embed, to_drop
+
+
+def sync_bm25(bm25: BM25Builder, vectordb, manifest_files: Dict[str, Dict[str, Any]], batch_size: int = 256) -> None:
+    """
+    Make the BM25 index cover exactly the chunks in the manifest. Chunks it
+    is missing (first run with an existing DB, or a crashed ingest) are read
+    back from Chroma.
+    """
+    expected = {cid for entry in manifest_files.values() for cid in entry.get("chunk_ids", [])}
+    bm25.remove([cid for cid in bm25.ids() if cid not in expected])
+
+    missing = [cid for cid in expected if cid not in bm25]
+    if missing:
+        print(f"Adding {len(missing)} existing chunks to the BM25 index...")
+    for i in range(0, len(missing), batch_size):
+        got = vectordb.get(ids=missing[i:i + batch_size], include=["documents"])
+        bm25.add(got.get("ids", []), [text or "" for text in got.get("documents", [])])
+
 
-    print(f"Loaded {len(docs)} documents. Splitting into chunks...")
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=CHUNK_SIZE,
-        chunk_overlap=CHUNK_OVERLAP,
+def _remove_checkpoint(db_dir: str = CORPUS_DIR) -> None:
+    path = os.path.join(db_dir, CHECKPOINT_FILE)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+# ============ MAIN ============
+
+def _open_vectorstore(embeddings=None, db_dir: str = CORPUS_DIR):
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+
+    if embeddings is None:
+        print("Loading embedding model (this may take a while the first time)...")
+        embeddings = cached_embeddings(
+            HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME),
+            EMBEDDING_MODEL_NAME,
+            EMBEDDING_CACHE_FILE,
+            max_entries=EMBEDDING_CACHE_MAX_ENTRIES,
+        )
+    return open_corpus(embeddings, db_dir, COLLECTION_NAME)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Build/update the shared vector DB (Quiz Agent + Q-A Bot).")
+    ap.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Drop the collection and re-embed every file.",
+    )
+    ap.add_argument(
+        "--workers",
+        type=int,
+        default=INGEST_WORKERS,
+        help="Parser processes (0 = one per spare CPU core).",
     )
-    chunks = splitter.split_documents(docs)
-    print(f"Created {len(chunks)} chunks.")
-
-    print("Creating embeddings (this may take a while the first time)...")
-    embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME)
-
-    print("Building Chroma DB...")
-    os.makedirs(DB_DIR, exist_ok=True)
-    Chroma.from_documents(
-        documents=chunks,
-        embedding=embeddings,
-        persist_directory=DB_DIR,
-        collection_name=COLLECTION_NAME,
+    ap.add_argument(
+        "--batch-size",
+        type=int,
+        default=INGEST_BATCH_SIZE,
+        help="Chunks embedded and upserted per batch.",
+    )
+    ap.add_argument("--data-dir", default=CORPUS_DATA_DIR, help="Course files to ingest.")
+    ap.add_argument("--db-dir", default=CORPUS_DIR, help="Corpus directory (vector DB, BM25 index, topic catalog).")
+    ap.add_argument(
+        "--chunk-size",
+        type=int,
+        default=CHUNK_SIZE,
+        help="Characters per chunk. Changing it rebuilds the shared collection (for both apps).",
+    )
+    ap.add_argument(
+        "--chunk-overlap",
+        type=int,
+        default=CHUNK_OVERLAP,
+        help="Characters shared by consecutive chunks. Changing it rebuilds the shared collection.",
+    )
+    ap.add_argument(
+        "--max-docs",
+        type=int,
+        default=0,
+        help="Embed at most this many parsed pages (0 = all), for quick tests.",
+    )
+    args = ap.parse_args(argv)
+    data_dir, db_dir = args.data_dir, args.db_dir
+    settings = _current_settings(args.chunk_size, args.chunk_overlap, args.max_docs)
+
+    print(f"Scanning documents in {data_dir}/ ...")
+    files = list_data_files(data_dir)
+    manifest = load_manifest(db_dir)
+    rebuild = args.rebuild or manifest.get("settings") != settings
+    manifest_files: Dict[str, Dict[str, Any]] = {} if rebuild else manifest.get("files", {})
+
+    to_embed, to_drop = plan_ingest(files, manifest_files, data_dir)
+    if not files:
+        if not to_drop:
+            print(f"No documents found in {data_dir}/. Add PDFs/PPTX/DOCX and try again.")
+            return
+        # Every file of this folder was removed: still drop their chunks and stamp the DB.
+        print(f"No documents found in {data_dir}/; removing the {len(to_drop)} file(s) ingested from it.")
+    bm25_path = bm25_index_path(db_dir)
+    catalog_path = topic_catalog_path(db_dir)
+    if not rebuild and not to_embed and not to_drop:
+        if os.path.exists(bm25_path) and os.path.exists(catalog_path):
+            print(f"All {len(files)} files unchanged. Shared vector DB is up to date.")
+            return
+        print("All files unchanged, but the BM25 index or topic catalog is missing; building it.")
+
+    vectordb = _open_vectorstore(db_dir=db_dir)
+    if rebuild:
+        print("Rebuilding collection from scratch...")
+        _remove_checkpoint(db_dir)
+        vectordb.delete_collection()
+        vectordb = _open_vectorstore(vectordb.embeddings, db_dir)
+
+    bm25 = BM25Builder() if rebuild else BM25Builder.load(bm25_path)
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "settings": settings,
+        "files": manifest_files,
+    }
+
+    for key in to_drop:
+        ids = manifest_files.pop(key).get("chunk_ids", [])
+        if ids:
+            print(f"Removing {len(ids)} stale chunks from {key}...")
+            vectordb.delete(ids=ids)
+            bm25.remove(ids)
+    save_manifest(manifest, db_dir)
+
+    folder = data_dir_id(data_dir)
+
+    def on_file_done(key: str, sha: str, ids: List[str]) -> None:
+        manifest_files[key] = {"sha256": sha, "chunk_ids": ids, "data_dir": folder}
+        save_manifest(manifest, db_dir)
+        print(f"Embedded {len(ids)} chunks from {key}.")
+
+    writer = BatchedVectorWriter(
+        vectordb,
+        batch_size=args.batch_size,
+        checkpoint_path=os.path.join(db_dir, CHECKPOINT_FILE),
+        settings=settings,
+        on_file_done=on_file_done,
     )
 
-    print("Done! Quiz vector DB created in 'db/'.")
+    shas = {path: sha for path, sha in to_embed}
+    for path, chunks in ingest_pipeline.iter_file_chunks(
+        shas,
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+        workers=args.workers or None,
+        max_docs=args.max_docs,
+    ):
+        sha = shas[path]
+        key = file_key(path, data_dir)
+        ids = chunk_ids_for(key, sha, len(chunks))
+        kind = file_type(path)
+        for c, cid in zip(chunks, ids):
+            c.metadata["file_sha256"] = sha
+            c.metadata["chunk_id"] = cid
+            c.metadata["file_type"] = kind
+        writer.add_file(key, sha, chunks, ids)
+        bm25.add(ids, [c.page_content for c in chunks])
+    writer.finish()
+    total_chunks = writer.committed_chunks
+
+    sync_bm25(bm25, vectordb, manifest_files)
+    bm25.save(bm25_path)
+    print(f"BM25 index: {len(bm25)} chunks.")
+
+    if rebuild:
+        print("Clustering chunks into topics...")
+        catalog = build_catalog_from_store(vectordb, catalog_path)
+    else:
+        print("Updating the topic catalog...")
+        chunk_ids = {cid for entry in manifest_files.values() for cid in entry.get("chunk_ids", [])}
+        catalog = update_catalog_from_store(vectordb, catalog_path, chunk_ids)
+    print(f"Topic catalog: {len(catalog)} chunks in {catalog.num_topics} topics.")
+
+    if hasattr(vectordb.embeddings, "stats"):
+        stats = vectordb.embeddings.stats()
+        print(
+            f"Embedding cache: {stats['hits']} hits, {stats['misses']} misses "
+            f"({stats['hit_rate']:.0%} hit rate)."
+        )
+
+    write_ingest_stamp(db_dir)
+    print(
+        f"Done! {len(to_embed)} file(s) embedded ({total_chunks} chunks), "
+        f"{len(files) - len(to_embed)} unchanged. Shared vector DB in '{db_dir}/'."
+    )
 
 
 if __name__ == "__main__":
     main()
-
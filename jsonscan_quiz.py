@@ -0,0 +1,308 @@
+# jsonscan_quiz.py
+# Linear-time JSON scanning for LLM quiz output
+#
+# The LLM answers with something like  'Sure! {"questions": [{...}, {...}]}',
+# sometimes wrapped in prose or markdown fences, sometimes cut off. One pass
+# over the structural characters tracks bracket depth plus string/escape
+# state and records where JSON values start and end, without copying. Only
+# plausible candidates are decoded, each exactly once and bounded by its own
+# span, so the total work stays linear in the length of the output.
+#
+# The same state machine drives the incremental scanner used for streaming,
+# which decodes every question object the moment its closing brace arrives.
+
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+Span = Tuple[int, int]
+
+_decoder = json.JSONDecoder()
+
+
+_SPECIAL_RE = re.compile(r'[{}\[\]"\\]')
+# What may follow an opening bracket in real JSON ("{a, b}" in prose may not)
+_OBJECT_START_RE = re.compile(r'\{\s*["}]')
+_ARRAY_START_RE = re.compile(r'\[\s*[\]"{\[\-0-9tfn]')
+# Payload starts tried directly when the scan finds no complete value
+_PAYLOAD_START_RE = re.compile(r'\{\s*"|\[\s*\{')
+# At most this many of them are decoded (keeps garbage input cheap)
+MAX_FALLBACK_STARTS = 64
+
+
+class _ScanState:
+    """
+    Bracket/string state of a partially scanned text.
+
+    `advance()` reports every bracket pair closed in the new text as
+    (start, end, parent_start, parent_char), where the parent is the
+    enclosing open bracket (-1 / "" at depth 0). Positions are `offset`
+    plus the index in `text`, so a stream can be scanned chunk by chunk
+    without joining it. Only the structural characters are visited (regex
+    jump), so prose costs almost nothing.
+
+    Text outside any bracket (prose, fences) is skipped, and a quote outside
+    brackets does not start a string, so apostrophes in a chatty preamble
+    don't confuse the scan. A mismatched closer resets the state.
+    """
+
+    __slots__ = ("stack", "starts", "in_string", "escape_at")
+
+    def __init__(self):
+        self.stack: List[str] = []
+        self.starts: List[int] = []
+        self.in_string = False
+        self.escape_at = -1
+
+    def advance(self, text: str, pos: int, offset: int = 0) -> List[Tuple[int, int, int, str]]:
+        closed: List[Tuple[int, int, int, str]] = []
+        stack = self.stack
+        starts = self.starts
+        in_string = self.in_string
+        escape_at = self.escape_at
+
+        for m in _SPECIAL_RE.finditer(text, pos):
+            j = m.start()
+            ch = text[j]
+            i = offset + j
+            if in_string:
+                if i == escape_at:
+                    continue
+                if ch == "\\":
+                    escape_at = i + 1
+                elif ch == '"':
+                    in_string = False
+            elif ch == '"':
+                if stack:
+                    in_string = True
+            elif ch == "{" or ch == "[":
+                stack.append(ch)
+                starts.append(i)
+            elif ch == "}" or ch == "]":
+                if not stack:
+                    continue
+                if (ch == "}") != (stack[-1] == "{"):
+                    # Mismatched closer: not JSON after all, start over.
+                    stack.clear()
+                    starts.clear()
+                    continue
+                stack.pop()
+                start = starts.pop()
+                if stack:
+                    closed.append((start, i + 1, starts[-1], stack[-1]))
+                else:
+                    closed.append((start, i + 1, -1, ""))
+
+        self.in_string = in_string
+        self.escape_at = escape_at
+        return closed
+
+    def truncated_item(self, text: str) -> Optional[str]:
+        """
+        If the text stops inside an array item object, return that object
+        with the open string and brackets closed, e.g.
+        '{"answer": "abc'  ->  '{"answer": "abc"}'.
+        """
+        for level in range(len(self.stack) - 1, 0, -1):
+            if self.stack[level] == "{" and self.stack[level - 1] == "[":
+                closers = "".join("}" if c == "{" else "]" for c in reversed(self.stack[level:]))
+                tail = '"' if self.in_string else ""
+                return text[self.starts[level]:].rstrip(" \n\t,") + tail + closers
+        return None
+
+
+def _decode_span(text: str, span: Span) -> Any:
+    """Decode one balanced span, or return None if it isn't JSON."""
+    start, end = span
+    pattern = _OBJECT_START_RE if text[start] == "{" else _ARRAY_START_RE
+    if not pattern.match(text, start):
+        return None
+    try:
+        return _decoder.decode(text[start:end])
+    except json.JSONDecodeError:
+        return None
+
+
+def _looks_like_quiz(obj: Any) -> bool:
+    if isinstance(obj, dict):
+        return True
+    return isinstance(obj, list) and any(isinstance(x, dict) for x in obj)
+
+
+# ============ WHOLE-TEXT EXTRACTION ============
+
+def find_json_spans(text: str) -> Tuple[List[Span], List[Span], _ScanState]:
+    """
+    Single pass over `text`. Returns
+      - candidate spans: values that are not nested inside a closed value
+        (depth 0, or inside a bracket that never closes, e.g. a stray "{"
+        in the preamble), in text order;
+      - item spans: objects directly inside an array (question objects);
+      - the final scan state (still-open brackets if the text is truncated).
+    """
+    state = _ScanState()
+    closed = state.advance(text, 0)
+    still_open = set(state.starts)
+
+    candidates: List[Span] = []
+    items: List[Span] = []
+    for start, end, parent, parent_char in closed:
+        # Items of a still-open array belong to a truncated payload; they
+        # are recovered together below rather than returned one by one.
+        if parent == -1 or (parent in still_open and parent_char == "{"):
+            candidates.append((start, end))
+        if parent_char == "[" and text[start] == "{":
+            items.append((start, end))
+    candidates.sort()
+    return candidates, items, state
+
+
+def _decode_from_starts(text: str, end: int) -> Any:
+    """
+    First quiz-shaped value decoded from a '{"' / '[{' position before
+    `end`, in text order. Catches what the bracket scan misses: a stray
+    quote inside an unclosed bracket in the preamble flips its string state
+    for the rest of the text, and a stray opener closed by a stray closer
+    after the payload hides the payload inside one non-JSON span.
+    """
+    for n, m in enumerate(_PAYLOAD_START_RE.finditer(text, 0, end)):
+        if n >= MAX_FALLBACK_STARTS:
+            break
+        try:
+            obj, _ = _decoder.raw_decode(text, m.start())
+        except json.JSONDecodeError:
+            continue
+        if _looks_like_quiz(obj):
+            return obj
+    return None
+
+
+def _question_count(obj: Any) -> int:
+    if isinstance(obj, dict):
+        questions = obj.get("questions")
+        return len(questions) if isinstance(questions, list) else 1
+    return sum(1 for x in obj if isinstance(x, dict))
+
+
+def _first_bracket(text: str) -> int:
+    positions = [p for p in (text.find("{"), text.find("[")) if p >= 0]
+    return min(positions) if positions else -1
+
+
+def extract_json(text: str) -> Any:
+    """
+    Return the first JSON object (or list of objects) in `text`.
+
+    If no complete value decodes - typically because the LLM output was
+    cut off - the complete question objects inside it are returned as a
+    list, plus the trailing partial object if closing it yields valid JSON.
+    """
+    # Fast path: the output starts with the payload.
+    first = _first_bracket(text)
+    if first >= 0:
+        try:
+            obj, _ = _decoder.raw_decode(text, first)
+            if _looks_like_quiz(obj):
+                return obj
+        except json.JSONDecodeError:
+            pass
+
+    candidates, items, state = find_json_spans(text)
+
+    found: Optional[Tuple[int, Any]] = None
+    for span in candidates:
+        obj = _decode_span(text, span)
+        if _looks_like_quiz(obj):
+            found = (span[0], obj)
+            break
+
+    # Anything decodable before the first candidate (normally nothing)
+    # wins only if it holds more questions.
+    early = _decode_from_starts(text, found[0] if found else len(text))
+    if found:
+        if early is not None and _question_count(early) > _question_count(found[1]):
+            return early
+        return found[1]
+
+    recovered: List[Dict[str, Any]] = []
+    for span in items:
+        obj = _decode_span(text, span)
+        if isinstance(obj, dict):
+            recovered.append(obj)
+
+    partial = state.truncated_item(text)
+    if partial:
+        try:
+            obj = json.loads(partial)
+            if isinstance(obj, dict):
+                recovered.append(obj)
+        except json.JSONDecodeError:
+            pass
+
+    # In truncated output the first decodable start is a single question
+    # object; prefer the recovered items unless `early` has more.
+    if early is not None and _question_count(early) > len(recovered):
+        return early
+    if recovered:
+        return recovered
+    if early is not None:
+        return early
+    raise ValueError("No valid JSON found in LLM response")
+
+
+# ============ STREAMING ============
+
+class IncrementalJSONScanner:
+    """
+    Feed LLM text chunk by chunk; `feed()` returns the JSON objects that
+    were completed by that chunk and sit directly inside an array
+    (i.e. the items of `{"questions": [...]}` or of a bare `[...]`).
+    Each character is scanned exactly once, and only the chunks of a
+    still-open item are kept; they are joined once, when the item closes.
+    """
+
+    def __init__(self):
+        self._chunks: List[str] = []
+        self._base = 0          # stream offset of self._chunks[0]
+        self._end = 0           # stream offset after the last chunk
+        self._state = _ScanState()
+
+    def _open_item_start(self) -> int:
+        """Stream offset of the outermost open array item, or -1."""
+        stack = self._state.stack
+        for level in range(1, len(stack)):
+            if stack[level] == "{" and stack[level - 1] == "[":
+                return self._state.starts[level]
+        return -1
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        if not chunk:
+            return []
+        closed = self._state.advance(chunk, 0, self._end)
+        self._chunks.append(chunk)
+        self._end += len(chunk)
+        out: List[Dict[str, Any]] = []
+
+        items = [(start, end) for start, end, _, parent_char in closed if parent_char == "["]
+        if items:
+            text = "".join(self._chunks)
+            base = self._base
+            for start, end in items:
+                # Only "{" items are kept; a nested "[" may start before base.
+                if start < base or text[start - base] != "{":
+                    continue
+                obj = _decode_span(text, (start - base, end - base))
+                if isinstance(obj, dict):
+                    out.append(obj)
+            self._chunks = [text]
+
+        # Keep only the text of an item that is still open.
+        keep = self._open_item_start()
+        if keep < 0:
+            self._chunks = []
+            self._base = self._end
+        elif keep > self._base:
+            text = "".join(self._chunks)[keep - self._base:]
+            self._chunks = [text]
+            self._base = keep
+        return out
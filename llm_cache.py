@@ -0,0 +1,302 @@
+# llm_cache.py
+# Persistent LLM response cache shared by the Quiz Agent and the Q-A Bot
+#
+# Responses are stored in SQLite keyed by sha256(model, settings, prompt),
+# next to the embedding cache. Two policies:
+#
+#   always    a stored response is always reused (for deterministic output,
+#             e.g. temperature 0)
+#   variants  up to N different responses are generated per prompt; after
+#             that a stored one is picked at random, so repeated prompts
+#             (same topic, same retrieved context) still give some variety
+#
+# "auto" picks "always" when the model's temperature is 0 and "variants"
+# otherwise. The table is bounded by an LRU policy (sqlite_lru.py).
+#
+# Callers pass `cache_if` (text -> bool) to `invoke` / `stream` so only
+# responses they can actually use are stored; a stored response that fails
+# the check is dropped instead of being replayed.
+
+import hashlib
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlite_lru import SQLiteLRUStore
+
+POLICIES = ("auto", "always", "variants", "off")
+
+
+def _key(model_id: str, prompt: str) -> bytes:
+    h = hashlib.sha256()
+    h.update(model_id.encode("utf-8"))
+    h.update(b"\0")
+    h.update(prompt.encode("utf-8"))
+    return h.digest()
+
+
+def _text_of(result: Any) -> Tuple[str, str]:
+    """(text, kind) of an LLM result: chat models return messages, LLMs strings."""
+    if hasattr(result, "content"):
+        return str(result.content), "message"
+    if isinstance(result, dict) and "content" in result:
+        return str(result["content"]), "message"
+    return str(result), "text"
+
+
+def _as_result(text: str, kind: str, chunk: bool = False) -> Any:
+    if kind != "message":
+        return text
+    from langchain_core.messages import AIMessage, AIMessageChunk
+
+    return AIMessageChunk(content=text) if chunk else AIMessage(content=text)
+
+
+def _prompt_text(prompt: Any) -> str:
+    if isinstance(prompt, str):
+        return prompt
+    if hasattr(prompt, "to_string"):
+        return prompt.to_string()
+    return str(prompt)
+
+
+# ============ STORE ============
+
+class LLMResponseCache:
+    """
+    SQLite table of (key, variant) -> response text, shared by every
+    CachedLLM of the process that uses the same path (thread-safe).
+    `hits` / `misses` / `saved_seconds` (generation time hits avoided)
+    count cache traffic for this process.
+    """
+
+    def __init__(self, path: str, max_entries: int = 5000):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+
+        self._db = SQLiteLRUStore(
+            path,
+            "responses",
+            "key BLOB NOT NULL,"
+            " variant INTEGER NOT NULL,"
+            " kind TEXT NOT NULL,"
+            " response TEXT NOT NULL,"
+            " seconds REAL NOT NULL,"
+            " last_used REAL NOT NULL,"
+            " PRIMARY KEY (key, variant)",
+            max_entries,
+        )
+
+    def variants(self, key: bytes) -> List[Tuple[int, str, str, float]]:
+        """Stored (variant, kind, response, generation seconds) for `key`."""
+        with self._db.lock:
+            return self._db.conn.execute(
+                "SELECT variant, kind, response, seconds FROM responses WHERE key = ? ORDER BY variant",
+                (key,),
+            ).fetchall()
+
+    def record_miss(self) -> None:
+        with self._db.lock:
+            self.misses += 1
+
+    def discard(self, key: bytes, variant: int) -> None:
+        db = self._db
+        with db.lock:
+            cur = db.conn.execute(
+                "DELETE FROM responses WHERE key = ? AND variant = ?", (key, variant)
+            )
+            db.deleted(cur.rowcount)
+            db.conn.commit()
+
+    def record_hit(self, key: bytes, variant: int, seconds: float) -> None:
+        db = self._db
+        with db.lock:
+            self.hits += 1
+            self.saved_seconds += seconds
+            db.conn.execute(
+                "UPDATE responses SET last_used = ? WHERE key = ? AND variant = ?",
+                (time.time(), key, variant),
+            )
+            db.conn.commit()
+
+    def add(self, key: bytes, kind: str, response: str, seconds: float, max_variants: int) -> None:
+        """Store another variant for `key` unless it already has `max_variants`."""
+        now = time.time()
+        db = self._db
+        with db.lock:
+            n = db.conn.execute("SELECT COUNT(*) FROM responses WHERE key = ?", (key,)).fetchone()[0]
+            if n >= max_variants or not response:
+                return
+            db.conn.execute(
+                "INSERT INTO responses (key, variant, kind, response, seconds, last_used)"
+                " VALUES (?, (SELECT COALESCE(MAX(variant) + 1, 0) FROM responses WHERE key = ?), ?, ?, ?, ?)",
+                (key, key, kind, response, seconds, now),
+            )
+            db.inserted(1)
+            db.conn.commit()
+
+    def clear(self) -> None:
+        self._db.clear()
+
+    def __len__(self) -> int:
+        return len(self._db)
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self._db.evictions,
+            "entries": len(self._db),
+            "saved_seconds": round(self.saved_seconds, 1),
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
+
+    def close(self) -> None:
+        self._db.close()
+
+
+_stores: Dict[str, LLMResponseCache] = {}
+_stores_lock = threading.Lock()
+
+
+def get_response_cache(path: str, max_entries: int = 5000) -> LLMResponseCache:
+    """One store (one SQLite connection) per path and process."""
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = LLMResponseCache(path, max_entries=max_entries)
+        return store
+
+
+# ============ WRAPPER ============
+
+class CachedLLM:
+    """
+    Wraps a LangChain chat model or LLM (`invoke`, `stream`, and the legacy
+    `llm(prompt)` call) with the response cache. Results have the wrapped
+    model's type: messages for chat models, strings for LLMs.
+    """
+
+    def __init__(
+        self,
+        base: Any,
+        model_name: str,
+        cache: LLMResponseCache,
+        policy: str = "auto",
+        max_variants: int = 4,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown LLM cache policy '{policy}' (expected one of {POLICIES})")
+        self.base = base
+        self.cache = cache
+        temperature = getattr(base, "temperature", None)
+        self.model_id = f"{type(base).__name__}\0{model_name}\0{temperature}"
+        if policy == "auto":
+            policy = "always" if temperature == 0 else "variants"
+        self.policy = policy
+        self.max_variants = 1 if policy == "always" else max(1, max_variants)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.base, name)
+
+    def _lookup(
+        self,
+        prompt: str,
+        cache_if: Optional[Callable[[str], bool]] = None,
+    ) -> Tuple[bytes, Optional[Tuple[int, str, str, float]]]:
+        key = _key(self.model_id, prompt)
+        if self.policy == "off":
+            return key, None
+        stored = self.cache.variants(key)
+        if stored and len(stored) >= self.max_variants:
+            hit = random.choice(stored)
+            if cache_if is None or cache_if(hit[2]):
+                self.cache.record_hit(key, hit[0], hit[3])
+                return key, hit
+            self.cache.discard(key, hit[0])
+        self.cache.record_miss()
+        return key, None
+
+    def _store(
+        self,
+        key: bytes,
+        kind: str,
+        text: str,
+        seconds: float,
+        cache_if: Optional[Callable[[str], bool]] = None,
+    ) -> None:
+        if self.policy == "off" or (cache_if is not None and not cache_if(text)):
+            return
+        self.cache.add(key, kind, text, seconds, self.max_variants)
+
+    def invoke(self, prompt: Any, cache_if: Optional[Callable[[str], bool]] = None, **kwargs) -> Any:
+        """
+        `cache_if(text)` decides whether the response may be stored (and
+        whether a stored one may be reused); default: any non-empty text.
+        """
+        prompt = _prompt_text(prompt)
+        key, hit = self._lookup(prompt, cache_if)
+        if hit is not None:
+            return _as_result(hit[2], hit[1])
+        start = time.perf_counter()
+        result = self.base.invoke(prompt, **kwargs)
+        text, kind = _text_of(result)
+        self._store(key, kind, text, time.perf_counter() - start, cache_if)
+        return result
+
+    __call__ = invoke
+
+    def stream(self, prompt: Any, cache_if: Optional[Callable[[str], bool]] = None, **kwargs) -> Iterator[Any]:
+        """
+        Stream from the model on a miss (the response is stored once it
+        completes and passes `cache_if`); a hit yields the stored response
+        as a single chunk.
+        """
+        prompt = _prompt_text(prompt)
+        key, hit = self._lookup(prompt, cache_if)
+        if hit is not None:
+            yield _as_result(hit[2], hit[1], chunk=True)
+            return
+        start = time.perf_counter()
+        parts: List[str] = []
+        kind = "text"
+        for chunk in self.base.stream(prompt, **kwargs):
+            text, kind = _text_of(chunk)
+            parts.append(text)
+            yield chunk
+        self._store(key, kind, "".join(parts), time.perf_counter() - start, cache_if)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"policy": self.policy, **self.cache.stats()}
+
+
+def cached_llm(
+    base: Any,
+    model_name: str,
+    path: Optional[str],
+    policy: str = "auto",
+    max_variants: int = 4,
+    max_entries: int = 5000,
+) -> Any:
+    """Wrap `base` with the response cache, or return it unchanged if `path` is empty or policy is "off"."""
+    if not path or policy == "off":
+        return base
+    return CachedLLM(base, model_name, get_response_cache(path, max_entries), policy, max_variants)
+
+
+def invoke_cached(llm: Any, prompt: Any, cache_if: Optional[Callable[[str], bool]] = None) -> Any:
+    """`llm.invoke(prompt)`, passing `cache_if` when `llm` is a CachedLLM."""
+    if isinstance(llm, CachedLLM):
+        return llm.invoke(prompt, cache_if=cache_if)
+    return llm.invoke(prompt)
+
+
+def stream_cached(llm: Any, prompt: Any, cache_if: Optional[Callable[[str], bool]] = None) -> Iterator[Any]:
+    """`llm.stream(prompt)`, passing `cache_if` when `llm` is a CachedLLM."""
+    if isinstance(llm, CachedLLM):
+        return llm.stream(prompt, cache_if=cache_if)
+    return llm.stream(prompt)
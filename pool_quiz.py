@@ -0,0 +1,301 @@
+# pool_quiz.py
+# Pre-generated quiz pool for the QUIZ AGENT
+#
+# Generating a quiz with llama3 takes tens of seconds. The pool keeps a few
+# ready-made quizzes per (topic, mcq/tf/open mix) on disk under pool/, serves
+# them instantly, and a background worker thread tops the pool back up.
+# Entries are stored in the compact binary quiz encoding (store_quiz.py) and
+# only decoded when served.
+
+import asyncio
+import hashlib
+import os
+import queue
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from cache_quiz import normalize_query
+from config_quiz import (
+    QUIZ_POOL_DIR,
+    QUIZ_POOL_SIZE,
+    QUIZ_POOL_MAX_AGE_SECONDS,
+    QUIZ_POOL_MAX_SLOTS,
+    QUIZ_POOL_PREFILL_TOPICS,
+    QUIZ_POOL_PREFILL_MIX,
+)
+from quiz_core import (
+    Quiz,
+    agenerate_random_quiz,
+    agenerate_topic_quiz,
+    generate_random_quiz,
+    generate_topic_quiz,
+    run_generation,
+)
+from retrieval_quiz import current_generation, on_invalidate
+from store_quiz import decode_quiz, encode_quiz, iter_records, pack_record
+
+Mix = Tuple[int, int, int]
+Entry = Tuple[float, bytes]  # (created, encoded quiz)
+
+
+def _pool_key(topic: Optional[str], mix: Mix) -> str:
+    mix_part = "-".join(str(n) for n in mix)
+    if topic is None:
+        return f"random__{mix_part}"
+    norm = normalize_query(topic)
+    slug = re.sub(r"[^a-z0-9]+", "_", norm).strip("_")[:40] or "topic"
+    digest = hashlib.sha1(norm.encode("utf-8")).hexdigest()[:8]
+    return f"topic_{slug}_{digest}__{mix_part}"
+
+
+class QuizPool:
+    """
+    Disk-backed pool of pre-generated quizzes (one binary file per slot).
+
+    `take()` pops the oldest fresh quiz for a topic/mix (or returns None on
+    a miss) and asks the worker to refill that slot. Entries older than
+    `max_age` seconds are discarded. At most `max_slots` topic/mix slots are
+    kept (least recently used ones are dropped, with their file). The pool
+    is emptied when the vector store is re-ingested, since its quizzes were
+    built from the old material.
+    """
+
+    def __init__(
+        self,
+        pool_dir: str = QUIZ_POOL_DIR,
+        size: int = QUIZ_POOL_SIZE,
+        max_age: float = QUIZ_POOL_MAX_AGE_SECONDS,
+        max_slots: int = QUIZ_POOL_MAX_SLOTS,
+    ):
+        self.pool_dir = pool_dir
+        self.size = size
+        self.max_age = max_age
+        self.max_slots = max(1, max_slots)
+
+        self._lock = threading.Lock()
+        # key -> (topic, mix), least recently used first
+        self._specs: "OrderedDict[str, Tuple[Optional[str], Mix]]" = OrderedDict()
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._queued: set = set()
+        self._worker: Optional[threading.Thread] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.generated = 0
+        self.failures = 0
+
+        os.makedirs(pool_dir, exist_ok=True)
+        # Vector store generation the pooled quizzes were built from
+        self._generation = current_generation()
+        on_invalidate(self.clear)
+
+    # ---- disk ----
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.pool_dir, key + ".qz")
+
+    def _read(self, key: str) -> List[Entry]:
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return []
+        return [(created, payload) for _, _, created, payload in iter_records(data)]
+
+    def _write(self, key: str, entries: List[Entry]) -> None:
+        path = self._path(key)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(b"".join(pack_record(payload, created) for created, payload in entries))
+        os.replace(tmp, path)
+
+    def _fresh(self, entries: List[Entry]) -> List[Entry]:
+        if self.max_age <= 0:
+            return entries
+        cutoff = time.time() - self.max_age
+        fresh = [e for e in entries if e[0] >= cutoff]
+        self.stale += len(entries) - len(fresh)
+        return fresh
+
+    def _remember(self, key: str, topic: Optional[str], mix: Mix) -> None:
+        """Record a slot as recently used; call with the lock held."""
+        self._specs[key] = (topic, mix)
+        self._specs.move_to_end(key)
+        while len(self._specs) > self.max_slots:
+            old, _ = self._specs.popitem(last=False)
+            try:
+                os.remove(self._path(old))
+            except FileNotFoundError:
+                pass
+
+    # ---- public API ----
+
+    def take(self, topic: Optional[str], mix: Mix) -> Optional[Quiz]:
+        key = _pool_key(topic, mix)
+
+        with self._lock:
+            self._remember(key, topic, mix)
+            entries = self._fresh(self._read(key))
+            entry = entries.pop(0) if entries else None
+            self._write(key, entries)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        self.request_refill(topic, mix)
+        return decode_quiz(entry[1]) if entry else None
+
+    def put(self, topic: Optional[str], mix: Mix, quiz: Quiz, generation: Optional[int] = None) -> None:
+        """Add a quiz; one generated before the last re-ingest (`generation`) is dropped."""
+        if not quiz.questions:
+            return
+        key = _pool_key(topic, mix)
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            entries = self._fresh(self._read(key))
+            entries.append((time.time(), encode_quiz(quiz)))
+            self._write(key, entries[-self.size:])
+
+    def count(self, topic: Optional[str], mix: Mix) -> int:
+        with self._lock:
+            return len(self._fresh(self._read(_pool_key(topic, mix))))
+
+    def request_refill(self, topic: Optional[str], mix: Mix) -> None:
+        key = _pool_key(topic, mix)
+        with self._lock:
+            self._remember(key, topic, mix)
+            if key in self._queued:
+                return
+            self._queued.add(key)
+        self._queue.put(key)
+
+    def clear(self, generation: Optional[int] = None) -> None:
+        with self._lock:
+            if generation is not None:
+                self._generation = generation
+            for name in os.listdir(self.pool_dir):
+                if name.endswith((".qz", ".json")):
+                    os.remove(os.path.join(self.pool_dir, name))
+            specs = list(self._specs.values())
+        for topic, mix in specs:
+            self.request_refill(topic, mix)
+
+    def stats(self) -> Dict[str, float]:
+        served = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / served) if served else 0.0,
+            "stale_dropped": self.stale,
+            "generated": self.generated,
+            "failures": self.failures,
+            "refills_queued": self._queue.qsize(),
+        }
+
+    # ---- background worker ----
+
+    def start(self, prefill_topics=QUIZ_POOL_PREFILL_TOPICS, mix: Mix = QUIZ_POOL_PREFILL_MIX) -> None:
+        if self._worker is not None:
+            return
+        self._worker = threading.Thread(target=self._run, name="quiz-pool-refill", daemon=True)
+        self._worker.start()
+        self.request_refill(None, mix)
+        for topic in prefill_topics:
+            self.request_refill(topic, mix)
+
+    def _run(self) -> None:
+        while True:
+            key = self._queue.get()
+            with self._lock:
+                self._queued.discard(key)
+                spec = self._specs.get(key)
+            if spec is None:
+                continue
+            # Disk or decoding errors must not end the worker thread.
+            try:
+                self._refill(key, *spec)
+            except Exception as e:
+                self.failures += 1
+                print(f"Quiz pool refill failed for {key}: {e}")
+
+    def _refill(self, key: str, topic: Optional[str], mix: Mix) -> None:
+        # Bounded: a prompt that keeps producing unusable quizzes (possibly
+        # replayed from the LLM cache) must not loop forever.
+        for _ in range(self.size * 2):
+            if self.count(topic, mix) >= self.size:
+                return
+            generation = current_generation()
+            try:
+                quiz = _generate(topic, mix)
+            except Exception as e:
+                self.failures += 1
+                print(f"Quiz pool refill failed for {key}: {e}")
+                return
+            if current_generation() != generation:
+                # Re-ingested meanwhile: the quiz is from the old material,
+                # and clear() has queued a fresh refill.
+                return
+            if not quiz.questions:
+                self.failures += 1
+                continue
+            self.put(topic, mix, quiz, generation)
+            self.generated += 1
+        if self.count(topic, mix) < self.size:
+            print(f"Quiz pool refill for {key} gave up after {self.size * 2} attempts.")
+
+
+def _generate(topic: Optional[str], mix: Mix) -> Quiz:
+    # Same generation slots as interactive requests: refills never push
+    # Ollama past GENERATION_CONCURRENCY.
+    num_mcq, num_tf, num_open = mix
+    if topic is None:
+        return run_generation(generate_random_quiz, num_mcq, num_tf, num_open)
+    return run_generation(generate_topic_quiz, topic, num_mcq, num_tf, num_open)
+
+
+# ============ SHARED POOL ============
+
+_pool: Optional[QuizPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_quiz_pool() -> QuizPool:
+    """Process-wide pool with its refill worker running."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = QuizPool()
+            _pool.start()
+        return _pool
+
+
+def get_random_quiz(num_mcq: int, num_tf: int, num_open: int) -> Quiz:
+    """Serve a pooled random quiz, generating one synchronously on a miss."""
+    mix = (num_mcq, num_tf, num_open)
+    return get_quiz_pool().take(None, mix) or _generate(None, mix)
+
+
+def get_topic_quiz(topic: str, num_mcq: int, num_tf: int, num_open: int) -> Quiz:
+    """Serve a pooled topic quiz, generating one synchronously on a miss."""
+    mix = (num_mcq, num_tf, num_open)
+    return get_quiz_pool().take(topic, mix) or _generate(topic, mix)
+
+
+async def aget_random_quiz(num_mcq: int, num_tf: int, num_open: int) -> Quiz:
+    """Async `get_random_quiz`: pool lookup off the event loop, queued generation on a miss."""
+    mix = (num_mcq, num_tf, num_open)
+    quiz = await asyncio.to_thread(get_quiz_pool().take, None, mix)
+    return quiz or await agenerate_random_quiz(num_mcq, num_tf, num_open)
+
+
+async def aget_topic_quiz(topic: str, num_mcq: int, num_tf: int, num_open: int) -> Quiz:
+    """Async `get_topic_quiz`: pool lookup off the event loop, queued generation on a miss."""
+    mix = (num_mcq, num_tf, num_open)
+    quiz = await asyncio.to_thread(get_quiz_pool().take, topic, mix)
+    return quiz or await agenerate_topic_quiz(topic, num_mcq, num_tf, num_open)
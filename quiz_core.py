@@ -1,24 +1,52 @@
 # quiz_core.py
 # Core logic for quiz generation & grading for the QUIZ AGENT
 
-from dataclasses import dataclass
-from typing import List, Optional, Literal, Dict, Any
-import json
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, asdict, field
+from typing import List, Optional, Literal, Dict, Any, AsyncIterator, Iterator, Sequence, Tuple
+import asyncio
+import os
 import random
-
-from retrieval_quiz import get_retriever
+import sys
+import time
+import threading
+
+from corpus_store import LLM_CACHE_FILE
+from retrieval_quiz import get_retriever, get_topic_catalog, get_documents, current_generation, on_invalidate
+from cache_quiz import LRUTTLCache, normalize_query
+from jsonscan_quiz import IncrementalJSONScanner, extract_json
+from llm_cache import cached_llm, get_response_cache, invoke_cached, stream_cached
 from config_quiz import (
     DEFAULT_NUM_MCQ,
     DEFAULT_NUM_TF,
     DEFAULT_NUM_OPEN,
+    QUERY_CACHE_SIZE,
+    QUERY_CACHE_TTL_SECONDS,
+    GENERATION_CONCURRENCY,
+    GENERATION_SPLIT,
+    SUBPROMPT_CONCURRENCY,
+    RAW_LLM_LOG_DIR,
+    ECHO_RAW_LLM_RESPONSE,
+    OPEN_GRADING_MODE,
+    TOPIC_CONTEXT_K,
+    CHUNK_OVERLAP,
+    CONTEXT_PACKING,
+    LLM_MODEL,
+    LLM_CACHE_POLICY,
+    LLM_CACHE_VARIANTS,
+    LLM_CACHE_MAX_ENTRIES,
 )
 
-from langchain_community.chat_models import ChatOllama
+# LangChain (chat model, embedder, Chroma) and numpy are imported on first
+# use, so `import quiz_core` stays cheap for the CLI and the Chainlit app.
 
 QuestionType = Literal["mcq", "tf", "open"]
 
+# Pooled/stored quizzes are kept in large numbers: no per-instance __dict__.
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
 
-@dataclass
+@dataclass(**_SLOTS)
 class Question:
     id: int
     qtype: QuestionType
@@ -26,29 +54,107 @@ class Question:
     options: Optional[List[str]]
     correct_answer: str
     explanation: str
-    sources: List[str]
+    # Shared, interned tuple: every question built from the same retrieval
+    # holds a reference to the same source table entry, not its own copy.
+    sources: Sequence[str]
 
 
-@dataclass
+@dataclass(**_SLOTS)
 class Quiz:
     questions: List[Question]
+    # Model-answer embeddings for semantic grading (question id -> vector),
+    # filled on first use; not serialized.
+    answer_vectors: Dict[int, Any] = field(default_factory=dict, repr=False, compare=False)
+
+    def source_table(self) -> List[str]:
+        """Distinct sources of all questions, in first-seen order."""
+        return list(dict.fromkeys(s for q in self.questions for s in q.sources))
+
+
+def intern_sources(sources: Sequence[str]) -> Tuple[str, ...]:
+    return tuple(sys.intern(str(s)) for s in sources)
+
+
+def quiz_to_dict(quiz: Quiz) -> Dict[str, Any]:
+    """
+    JSON-friendly form. Sources are written once in a quiz-level table and
+    questions refer to them by index.
+    """
+    table = quiz.source_table()
+    index = {s: i for i, s in enumerate(table)}
+    questions = []
+    for q in quiz.questions:
+        qd = asdict(q)
+        qd["sources"] = [index[s] for s in q.sources]
+        questions.append(qd)
+    return {"sources": table, "questions": questions}
+
+
+def quiz_from_dict(data: Dict[str, Any]) -> Quiz:
+    """Inverse of quiz_to_dict (also reads the older per-question source lists)."""
+    table = data.get("sources") or []
+    shared: Dict[Tuple, Tuple[str, ...]] = {}
+    questions = []
+    for qd in data.get("questions", []):
+        refs = tuple(qd.get("sources") or ())
+        if refs not in shared:
+            shared[refs] = intern_sources(table[r] if isinstance(r, int) else r for r in refs)
+        questions.append(Question(**{**qd, "sources": shared[refs]}))
+    return Quiz(questions=questions)
 
 
 # ============ LLM ============
 
 def get_llm():
-    """Ollama local model."""
-    return ChatOllama(model="llama3")
+    """Ollama local model, behind the persistent response cache (llm_cache.py)."""
+    from langchain_community.chat_models import ChatOllama
+
+    return cached_llm(
+        ChatOllama(model=LLM_MODEL),
+        LLM_MODEL,
+        LLM_CACHE_FILE,
+        policy=LLM_CACHE_POLICY,
+        max_variants=LLM_CACHE_VARIANTS,
+        max_entries=LLM_CACHE_MAX_ENTRIES,
+    )
+
+
+def llm_cache_stats() -> Dict[str, Any]:
+    """Response cache counters of this process (no model client needed)."""
+    if not LLM_CACHE_FILE or LLM_CACHE_POLICY == "off":
+        return {}
+    return get_response_cache(LLM_CACHE_FILE, LLM_CACHE_MAX_ENTRIES).stats()
 
 
 # ============ RETRIEVAL HELPERS ============
 
-def _docs_to_context(docs) -> (str, List[str]):
+def _pack_docs(docs, query: str) -> List[tuple]:
+    """(doc, text) pairs to put in the prompt; see context_quiz.py."""
+    texts = [d.page_content or "" for d in docs]
+    try:
+        from context_quiz import pack_context
+        packed = pack_context(query, texts, max_overlap=CHUNK_OVERLAP)
+    except Exception as e:
+        print(f"Context packing failed, using all retrieved chunks: {e}")
+        return list(zip(docs, texts))
+    return [(docs[i], text) for i, text in packed]
+
+
+def _docs_to_context(docs, query: Optional[str] = None) -> (str, List[str]):
+    """
+    Join retrieved chunks into the prompt context. With a query (and
+    CONTEXT_PACKING on) the chunks are deduplicated, MMR-ordered and cut
+    to the token budget first; sources only list the chunks that were used.
+    """
     parts: List[str] = []
     sources: List[str] = []
 
-    for d in docs:
-        text = d.page_content or ""
+    if query is not None and CONTEXT_PACKING:
+        pairs = _pack_docs(docs, query)
+    else:
+        pairs = [(d, d.page_content or "") for d in docs]
+
+    for d, text in pairs:
         if text:
             parts.append(text)
 
@@ -71,8 +177,51 @@ def _docs_to_context(docs) -> (str, List[str]):
     return "\n\n".join(parts), unique_sources
 
 
+# (generation, normalized query, k) -> (chunk_ids, context, sources).
+# Keys carry the vector store generation, and the cache is also cleared on
+# reload, so results never outlive a re-ingest.
+_context_cache = LRUTTLCache(maxsize=QUERY_CACHE_SIZE, ttl=QUERY_CACHE_TTL_SECONDS)
+on_invalidate(lambda generation: _context_cache.clear())
+
+
+def _doc_id(d) -> Optional[str]:
+    doc_id = getattr(d, "id", None)
+    if doc_id:
+        return str(doc_id)
+    meta = getattr(d, "metadata", {}) or {}
+    return meta.get("chunk_id") or meta.get("id")
+
+
+def _cached_context(query: str, k: int) -> (str, List[str]):
+    key = (current_generation(), normalize_query(query), k)
+    hit = _context_cache.get(key)
+    if hit is not None:
+        _, context, sources = hit
+        return context, list(sources)
+
+    docs = get_retriever(k=k).invoke(query)
+    context, sources = _docs_to_context(docs, query)
+    chunk_ids = tuple(i for i in (_doc_id(d) for d in docs) if i)
+    _context_cache.put(key, (chunk_ids, context, tuple(sources)))
+    return context, sources
+
+
+def context_cache_stats() -> Dict[str, float]:
+    return _context_cache.stats()
+
+
 def _get_random_context(num_docs: int = 6) -> (str, List[str]):
-    retriever = get_retriever(k=num_docs)
+    """
+    Context for a random quiz: chunks sampled from the topic catalog built
+    at ingest (see catalog_quiz.py), fetched by ID without any search.
+    Falls back to a fixed overview query if there is no catalog yet.
+    """
+    ids = get_topic_catalog().sample(num_docs)
+    if ids:
+        docs = get_documents(ids)
+        if docs:
+            return _docs_to_context(docs)
+
     queries = [
         "network security overview",
         "security services and mechanisms",
@@ -81,14 +230,11 @@ def _get_random_context(num_docs: int = 6) -> (str, List[str]):
         "CIA triad confidentiality integrity availability",
     ]
     q = random.choice(queries)
-    docs = retriever.invoke(q)
-    return _docs_to_context(docs)
+    return _cached_context(q, num_docs)
 
 
-def _get_topic_context(topic: str, k: int = 8) -> (str, List[str]):
-    retriever = get_retriever(k=k)
-    docs = retriever.invoke(topic)
-    return _docs_to_context(docs)
+def _get_topic_context(topic: str, k: int = TOPIC_CONTEXT_K) -> (str, List[str]):
+    return _cached_context(topic, k)
 
 
 # ============ QUIZ GENERATION ============
@@ -96,28 +242,13 @@ def _get_topic_context(topic: str, k: int = 8) -> (str, List[str]):
 def _parse_quiz_json(text: str) -> List[Dict[str, Any]]:
     """
     Robust JSON extraction: find the first valid JSON object/array
-    in the LLM output.
+    in the LLM output (single linear pass, see jsonscan_quiz.py).
+    Truncated output yields the questions that were complete.
     """
     if not text:
         raise ValueError("Empty LLM response for quiz generation")
 
-    decoder = json.JSONDecoder()
-    s = text.strip()
-    data = None
-
-    for i in range(len(s)):
-        ch = s[i]
-        if ch not in ("{", "["):
-            continue
-        try:
-            obj, end = decoder.raw_decode(s[i:])
-            data = obj
-            break
-        except json.JSONDecodeError:
-            continue
-
-    if data is None:
-        raise ValueError("No valid JSON found in LLM response")
+    data = extract_json(text)
 
     if isinstance(data, dict):
         if "questions" in data and isinstance(data["questions"], list):
@@ -132,32 +263,28 @@ def _parse_quiz_json(text: str) -> List[Dict[str, Any]]:
     raise ValueError("Unexpected JSON structure from LLM for quiz generation")
 
 
-def _call_quiz_generation_llm(
+def _build_generation_prompt(
     context: str,
     topic: Optional[str],
     num_mcq: int,
     num_tf: int,
     num_open: int,
-) -> List[Dict[str, Any]]:
-    llm = get_llm()
-    topic_part = f"Focus on the topic: {topic}.\n" if topic else ""
-
-    prompt = f"""
+    focus: Optional[str] = None,
+) -> str:
+    # Everything a quiz's sub-prompts share comes first and the per-prompt
+    # part (topic, focus excerpt, counts) last, so Ollama can reuse the
+    # evaluated prefix (KV cache) instead of re-reading the whole context.
+    task = f"Focus on the topic: {topic}.\n" if topic else ""
+    if focus:
+        task += f'Base the questions mainly on this excerpt of the material above:\n"""{focus}"""\n'
+
+    return f"""
 You are a helpful network security tutor.
 
-{topic_part}
 You are given the following local study materials (lecture slides, textbook excerpts, and quizzes):
 
 \"\"\"{context}\"\"\"
 
-From ONLY this material, generate exactly {num_mcq + num_tf + num_open} quiz questions
-for a university-level network security course.
-
-Use exactly this distribution:
-- {num_mcq} multiple-choice (mcq)
-- {num_tf} true/false (tf)
-- {num_open} open-ended (open)
-
 For each question, output:
 - id: integer starting from 1
 - qtype: "mcq", "tf", or "open"
@@ -196,64 +323,222 @@ OR
   }},
   ...
 ]
+
+{task}
+From ONLY this material, generate exactly {num_mcq + num_tf + num_open} quiz questions
+for a university-level network security course.
+
+Use exactly this distribution:
+- {num_mcq} multiple-choice (mcq)
+- {num_tf} true/false (tf)
+- {num_open} open-ended (open)
 """
 
-    resp = llm.invoke(prompt)
+
+def _call_quiz_generation_llm(
+    context: str,
+    topic: Optional[str],
+    num_mcq: int,
+    num_tf: int,
+    num_open: int,
+    focus: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    llm = get_llm()
+    prompt = _build_generation_prompt(context, topic, num_mcq, num_tf, num_open, focus)
+
+    resp = invoke_cached(llm, prompt, cache_if=_usable_quiz_response)
     text = resp.content if hasattr(resp, "content") else str(resp)
 
     # 📌 DEBUG STEP 2: Print Raw LLM Response
-    print("\n--- RAW LLM RESPONSE START ---\n")
-    print(text)
-    print("\n--- RAW LLM RESPONSE END ---\n")
+    if ECHO_RAW_LLM_RESPONSE:
+        print("\n--- RAW LLM RESPONSE START ---\n")
+        print(text)
+        print("\n--- RAW LLM RESPONSE END ---\n")
+    _record_raw_response(text)
 
     return _parse_quiz_json(text)
 
 
+def _record_raw_response(text: str) -> None:
+    """Keep raw LLM outputs (for bench_parse_quiz.py) when RAW_LLM_LOG_DIR is set."""
+    if not RAW_LLM_LOG_DIR:
+        return
+    os.makedirs(RAW_LLM_LOG_DIR, exist_ok=True)
+    name = f"raw_{time.strftime('%Y%m%d_%H%M%S')}_{random.randrange(1 << 16):04x}.txt"
+    with open(os.path.join(RAW_LLM_LOG_DIR, name), "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def _question_from_dict(
+    qd: Dict[str, Any],
+    sources: Tuple[str, ...],
+    default_id: int,
+) -> Optional[Question]:
+    try:
+        # The error is caught here when trying to convert "5\"" to int
+        qid = int(qd.get("id", default_id))
+        qtype_raw = (qd.get("qtype") or "").lower()
+        if qtype_raw not in ("mcq", "tf", "open"):
+            return None
+
+        question_text = qd.get("question") or ""
+        options = qd.get("options") if qtype_raw == "mcq" else None
+        answer = qd.get("answer") or ""
+        explanation = qd.get("explanation") or ""
+
+        return Question(
+            id=qid,
+            qtype=qtype_raw,  # type: ignore[arg-type]
+            question_text=question_text,
+            options=options,
+            correct_answer=answer,
+            explanation=explanation,
+            sources=sources,
+        )
+    except Exception as e:
+        # THIS IS THE CRUCIAL DEBUGGING CHANGE:
+        print(f"DEBUG: ❌ Skipping question due to parsing error: {e}")
+        print(f"  Problematic Data: {qd.get('id', 'N/A')}. JSON: {qd}")
+        return None
+
+
+def _usable_quiz_response(text: str) -> bool:
+    """Whether an LLM response yields at least one valid question (only those are cached)."""
+    try:
+        qdicts = _parse_quiz_json(text)
+    except ValueError:
+        return False
+    return any(
+        isinstance(qd, dict)
+        and (qd.get("qtype") or "").lower() in ("mcq", "tf", "open")
+        and qd.get("question")
+        for qd in qdicts
+    )
+
 
 def _build_quiz_from_llm(
     question_dicts: List[Dict[str, Any]],
     sources: List[str],
 ) -> Quiz:
     questions: List[Question] = []
+    shared_sources = intern_sources(sources)
 
     for qd in question_dicts:
-        try:
-            # The error is caught here when trying to convert "5\"" to int
-            qid = int(qd.get("id", len(questions) + 1))
-            qtype_raw = (qd.get("qtype") or "").lower()
-            if qtype_raw not in ("mcq", "tf", "open"):
-                continue
-
-            question_text = qd.get("question") or ""
-            options = qd.get("options") if qtype_raw == "mcq" else None
-            answer = qd.get("answer") or ""
-            explanation = qd.get("explanation") or ""
-
-            q = Question(
-                id=qid,
-                qtype=qtype_raw,  # type: ignore[arg-type]
-                question_text=question_text,
-                options=options,
-                correct_answer=answer,
-                explanation=explanation,
-                sources=list(sources),
-            )
+        q = _question_from_dict(qd, shared_sources, len(questions) + 1)
+        if q is not None:
             questions.append(q)
-        except Exception as e:
-            # THIS IS THE CRUCIAL DEBUGGING CHANGE:
-            print(f"DEBUG: ❌ Skipping question due to parsing error: {e}")
-            print(f"  Problematic Data: {qd.get('id', 'N/A')}. JSON: {qd}")
-            continue
 
     return Quiz(questions=questions)
 
+# ============ SPLIT GENERATION ============
+
+# Sub-prompts of split generation (GENERATION_SPLIT); separate from the
+# quiz-level generation slots, which wait on these.
+_subprompt_executor = ThreadPoolExecutor(
+    max_workers=max(1, SUBPROMPT_CONCURRENCY),
+    thread_name_prefix="quiz-subprompt",
+)
+
+_QTYPE_ORDER = ("mcq", "tf", "open")
+
+
+def _split_context(context: str, parts: int) -> List[str]:
+    """Cut the context at paragraph breaks into `parts` pieces of similar length."""
+    paragraphs = [p for p in context.split("\n\n") if p.strip()]
+    if parts <= 1 or len(paragraphs) <= 1:
+        return [context] * max(parts, 1)
+    target = sum(len(p) for p in paragraphs) / parts
+    pieces: List[str] = []
+    current: List[str] = []
+    size = 0
+    for p in paragraphs:
+        current.append(p)
+        size += len(p)
+        if size >= target * (len(pieces) + 1) and len(pieces) < parts - 1:
+            pieces.append("\n\n".join(current))
+            current = []
+    if current:
+        pieces.append("\n\n".join(current))
+    return [pieces[i % len(pieces)] for i in range(parts)]
+
+
+def _plan_subprompts(
+    context: str,
+    num_mcq: int,
+    num_tf: int,
+    num_open: int,
+    split: str = GENERATION_SPLIT,
+) -> List[Tuple[str, int, Optional[str]]]:
+    """
+    (qtype, count, focus excerpt) per sub-prompt. Per-question sub-prompts
+    each get a different excerpt of the shared context to focus on, so
+    questions of the same type don't all come out alike.
+    """
+    counts = dict(zip(_QTYPE_ORDER, (num_mcq, num_tf, num_open)))
+    if split == "type":
+        return [(t, n, None) for t, n in counts.items() if n > 0]
+    slots = [t for t in _QTYPE_ORDER for _ in range(counts[t])]
+    focus = _split_context(context, len(slots))
+    return [(t, 1, focus[i]) for i, t in enumerate(slots)]
+
+
+def _run_subprompt(context: str, topic: Optional[str], qtype: str, count: int, focus: Optional[str]) -> List[Dict[str, Any]]:
+    mix = [count if t == qtype else 0 for t in _QTYPE_ORDER]
+    try:
+        qdicts = _call_quiz_generation_llm(context, topic, *mix, focus=focus)
+    except Exception as e:
+        print(f"Sub-prompt for {count} {qtype} question(s) failed: {e}")
+        return []
+    # Keep the distribution exact: only the requested type, at most `count`.
+    return [qd for qd in qdicts if isinstance(qd, dict) and (qd.get("qtype") or "").lower() == qtype][:count]
+
+
+def _submit_subprompts(context: str, topic: Optional[str], num_mcq: int, num_tf: int, num_open: int) -> list:
+    return [
+        _subprompt_executor.submit(_run_subprompt, context, topic, qtype, count, focus)
+        for qtype, count, focus in _plan_subprompts(context, num_mcq, num_tf, num_open)
+    ]
+
+
+def _merge_question_dicts(groups: List[List[Dict[str, Any]]], seen: Optional[set] = None) -> List[Dict[str, Any]]:
+    """Concatenate sub-prompt results, drop repeated questions, renumber from 1."""
+    seen = set() if seen is None else seen
+    merged: List[Dict[str, Any]] = []
+    for group in groups:
+        for qd in group:
+            key = normalize_query(str(qd.get("question") or ""))
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            merged.append(qd)
+    for i, qd in enumerate(merged, 1):
+        qd["id"] = i
+    return merged
+
+
+def _generate_question_dicts(
+    context: str,
+    topic: Optional[str],
+    num_mcq: int,
+    num_tf: int,
+    num_open: int,
+) -> List[Dict[str, Any]]:
+    if GENERATION_SPLIT not in ("type", "question"):
+        return _call_quiz_generation_llm(context, topic=topic, num_mcq=num_mcq, num_tf=num_tf, num_open=num_open)
+    futures = _submit_subprompts(context, topic, num_mcq, num_tf, num_open)
+    merged = _merge_question_dicts([f.result() for f in futures])
+    if not merged:
+        raise ValueError("No valid quiz questions from any sub-prompt")
+    return merged
+
+
 def generate_random_quiz(
     num_mcq: int = DEFAULT_NUM_MCQ,
     num_tf: int = DEFAULT_NUM_TF,
     num_open: int = DEFAULT_NUM_OPEN,
 ) -> Quiz:
     context, sources = _get_random_context()
-    qdicts = _call_quiz_generation_llm(context, topic=None, num_mcq=num_mcq, num_tf=num_tf, num_open=num_open)
+    qdicts = _generate_question_dicts(context, None, num_mcq, num_tf, num_open)
     return _build_quiz_from_llm(qdicts, sources)
 
 
@@ -264,16 +549,102 @@ def generate_topic_quiz(
     num_open: int = DEFAULT_NUM_OPEN,
 ) -> Quiz:
     context, sources = _get_topic_context(topic)
-    qdicts = _call_quiz_generation_llm(context, topic=topic, num_mcq=num_mcq, num_tf=num_tf, num_open=num_open)
+    qdicts = _generate_question_dicts(context, topic, num_mcq, num_tf, num_open)
     return _build_quiz_from_llm(qdicts, sources)
 
 
+# ============ STREAMING GENERATION ============
+
+def stream_quiz_questions(
+    topic: Optional[str] = None,
+    num_mcq: int = DEFAULT_NUM_MCQ,
+    num_tf: int = DEFAULT_NUM_TF,
+    num_open: int = DEFAULT_NUM_OPEN,
+) -> Iterator[Question]:
+    """
+    Generate a quiz (random if `topic` is None) and yield each Question as
+    soon as the LLM has finished writing its JSON object, instead of
+    waiting for the whole response.
+    """
+    if topic:
+        context, sources = _get_topic_context(topic)
+    else:
+        context, sources = _get_random_context()
+    shared_sources = intern_sources(sources)
+
+    if GENERATION_SPLIT in ("type", "question"):
+        yield from _stream_split_questions(context, topic, shared_sources, num_mcq, num_tf, num_open)
+        return
+
+    prompt = _build_generation_prompt(context, topic, num_mcq, num_tf, num_open)
+    scanner = IncrementalJSONScanner()
+    n_yielded = 0
+    parts: List[str] = []
+    for chunk in stream_cached(get_llm(), prompt, cache_if=_usable_quiz_response):
+        text = chunk.content if hasattr(chunk, "content") else str(chunk)
+        parts.append(text)
+        for qd in scanner.feed(text):
+            q = _question_from_dict(qd, shared_sources, n_yielded + 1)
+            if q is not None:
+                n_yielded += 1
+                yield q
+
+    if n_yielded == 0:
+        # The incremental scan can be thrown off by stray brackets/quotes in
+        # a preamble; the whole-text parser has fallbacks for that.
+        for qd in _parse_quiz_json("".join(parts)):
+            q = _question_from_dict(qd, shared_sources, n_yielded + 1)
+            if q is not None:
+                n_yielded += 1
+                yield q
+
+    if n_yielded == 0:
+        raise ValueError("No valid quiz questions found in streamed LLM response")
+
+
+def _stream_split_questions(
+    context: str,
+    topic: Optional[str],
+    sources: Tuple[str, ...],
+    num_mcq: int,
+    num_tf: int,
+    num_open: int,
+) -> Iterator[Question]:
+    """Split generation, yielding each sub-prompt's questions as soon as it finishes."""
+    seen: set = set()
+    n_yielded = 0
+    for fut in as_completed(_submit_subprompts(context, topic, num_mcq, num_tf, num_open)):
+        for qd in _merge_question_dicts([fut.result()], seen):
+            q = _question_from_dict({**qd, "id": n_yielded + 1}, sources, n_yielded + 1)
+            if q is not None:
+                n_yielded += 1
+                yield q
+
+    if n_yielded == 0:
+        raise ValueError("No valid quiz questions from any sub-prompt")
+
+
 # ============ GRADING ============
 
+def _semantic_similarities(quiz: Quiz, user_answers: Dict[int, str]) -> Optional[Dict[int, float]]:
+    try:
+        from semantic_grade_quiz import open_answer_similarities
+        return open_answer_similarities(quiz, user_answers)
+    except Exception as e:
+        print(f"Semantic grading unavailable, falling back to token overlap: {e}")
+        return None
+
+
+def _semantic_score(similarity: float) -> (float, str):
+    from semantic_grade_quiz import score_similarity
+    return score_similarity(similarity)
+
+
 def grade_quiz(quiz: Quiz, user_answers: Dict[int, str]) -> Dict[str, Any]:
     """
     Grade the quiz using simple rules for MCQ/TF and
-    token-overlap similarity for open-ended questions.
+    token-overlap similarity for open-ended questions
+    (embedding similarity when OPEN_GRADING_MODE == "semantic").
     Returns:
       {
         "total_score": float,
@@ -295,6 +666,10 @@ def grade_quiz(quiz: Quiz, user_answers: Dict[int, str]) -> Dict[str, Any]:
     total_score = 0.0
     max_score = 0.0
 
+    semantic = None
+    if OPEN_GRADING_MODE == "semantic":
+        semantic = _semantic_similarities(quiz, user_answers)
+
     for q in quiz.questions:
         user_answer = (user_answers.get(q.id) or "").strip()
         qtype = q.qtype
@@ -337,6 +712,8 @@ def grade_quiz(quiz: Quiz, user_answers: Dict[int, str]) -> Dict[str, Any]:
             ca = q_correct.lower()
             if not ua:
                 comment = "No answer given."
+            elif semantic is not None:
+                score, comment = _semantic_score(semantic[q.id])
             else:
                 ua_tokens = set(ua.replace(",", " ").split())
                 ca_tokens = set(ca.replace(",", " ").split())
@@ -373,3 +750,131 @@ def grade_quiz(quiz: Quiz, user_answers: Dict[int, str]) -> Dict[str, Any]:
         "percentage": percentage,
         "results": results,
     }
+
+
+
+# ============ ASYNC API ============
+#
+# Generation blocks on retrieval + Ollama for tens of seconds. The async
+# variants run it on a small shared thread pool so Chainlit's event loop
+# stays responsive. At most GENERATION_CONCURRENCY quizzes are generated at
+# once per process, including quiz pool refills; further requests wait in
+# the pool's FIFO queue, so concurrent sessions are served in arrival order.
+
+_generation_executor = ThreadPoolExecutor(
+    max_workers=GENERATION_CONCURRENCY,
+    thread_name_prefix="quiz-gen",
+)
+_generation_lock = threading.Lock()
+_generation_waiting = 0
+_generation_running = 0
+
+
+def submit_generation(fn, *args) -> "Future":
+    """
+    Run `fn(*args)` in a generation slot (thread-safe, any thread). The
+    waiting count drops when the job starts or when it is cancelled while
+    still queued (e.g. the session disconnected), whichever comes first.
+    """
+    global _generation_waiting
+    state = {"started": False}
+
+    def job():
+        global _generation_waiting, _generation_running
+        with _generation_lock:
+            state["started"] = True
+            _generation_waiting -= 1
+            _generation_running += 1
+        try:
+            return fn(*args)
+        finally:
+            with _generation_lock:
+                _generation_running -= 1
+
+    def on_done(_fut) -> None:
+        global _generation_waiting
+        with _generation_lock:
+            if not state["started"]:
+                _generation_waiting -= 1
+
+    with _generation_lock:
+        _generation_waiting += 1
+    fut = _generation_executor.submit(job)
+    fut.add_done_callback(on_done)
+    return fut
+
+
+def run_generation(fn, *args):
+    """Blocking `submit_generation` for worker threads (e.g. the quiz pool)."""
+    return submit_generation(fn, *args).result()
+
+
+def _submit_generation(fn, *args) -> "asyncio.Future":
+    # Cancelling the asyncio future cancels the queued job too.
+    return asyncio.wrap_future(submit_generation(fn, *args))
+
+
+async def _run_generation(fn, *args):
+    return await _submit_generation(fn, *args)
+
+
+def generation_queue_stats() -> Dict[str, int]:
+    """Quizzes currently being generated / waiting for a generation slot."""
+    return {
+        "running": _generation_running,
+        "waiting": _generation_waiting,
+        "limit": GENERATION_CONCURRENCY,
+    }
+
+
+async def agenerate_random_quiz(
+    num_mcq: int = DEFAULT_NUM_MCQ,
+    num_tf: int = DEFAULT_NUM_TF,
+    num_open: int = DEFAULT_NUM_OPEN,
+) -> Quiz:
+    return await _run_generation(generate_random_quiz, num_mcq, num_tf, num_open)
+
+
+async def agenerate_topic_quiz(
+    topic: str,
+    num_mcq: int = DEFAULT_NUM_MCQ,
+    num_tf: int = DEFAULT_NUM_TF,
+    num_open: int = DEFAULT_NUM_OPEN,
+) -> Quiz:
+    return await _run_generation(generate_topic_quiz, topic, num_mcq, num_tf, num_open)
+
+
+async def agrade_quiz(quiz: Quiz, user_answers: Dict[int, str]) -> Dict[str, Any]:
+    # Grading is cheap, so it skips the generation queue.
+    return await asyncio.to_thread(grade_quiz, quiz, user_answers)
+
+
+async def astream_quiz_questions(
+    topic: Optional[str] = None,
+    num_mcq: int = DEFAULT_NUM_MCQ,
+    num_tf: int = DEFAULT_NUM_TF,
+    num_open: int = DEFAULT_NUM_OPEN,
+) -> AsyncIterator[Question]:
+    """
+    Async `stream_quiz_questions`. The blocking stream runs in a generation
+    slot (same limit/queue as the other async variants) and questions are
+    handed to the event loop as they are parsed.
+    """
+    loop = asyncio.get_running_loop()
+    items: "asyncio.Queue" = asyncio.Queue()
+    done = object()
+
+    def pump():
+        try:
+            for q in stream_quiz_questions(topic, num_mcq, num_tf, num_open):
+                loop.call_soon_threadsafe(items.put_nowait, q)
+        finally:
+            loop.call_soon_threadsafe(items.put_nowait, done)
+
+    fut = _submit_generation(pump)
+    while True:
+        item = await items.get()
+        if item is done:
+            break
+        yield item
+    await fut  # re-raise generation errors
@@ -0,0 +1,66 @@
+# report_quiz.py
+# HTML quiz reports (standard library only: importing this loads no models)
+
+import os
+from datetime import datetime
+
+
+def save_report(grade_info):
+    """
+    Save an HTML report with all questions, answers, scores, and LOCAL citations only.
+    You can open this in a browser or print to PDF.
+    """
+    os.makedirs("reports", exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = f"reports/quiz_report_{timestamp}.html"
+
+    html_parts = []
+    html_parts.append("<html><head><meta charset='utf-8'>")
+    html_parts.append("<title>Network Security Quiz Report</title>")
+    html_parts.append(
+        "<style>body{font-family:sans-serif;margin:20px;} "
+        "h1{color:#333;} table{border-collapse:collapse;width:100%;} "
+        "th,td{border:1px solid #ccc;padding:8px;vertical-align:top;} "
+        "th{background:#f0f0f0;} .correct{color:green;} .incorrect{color:red;}</style>"
+    )
+    html_parts.append("</head><body>")
+
+    html_parts.append("<h1>Network Security Quiz Report</h1>")
+    html_parts.append(
+        f"<p><b>Score:</b> {grade_info['total_score']:.2f}/"
+        f"{grade_info['max_score']:.2f} ({grade_info['percentage']:.1f}%)</p>"
+    )
+
+    html_parts.append("<table>")
+    html_parts.append(
+        "<tr><th>#</th><th>Question</th><th>Your answer</th>"
+        "<th>Score</th><th>Correct answer</th><th>Explanation</th>"
+        "<th>Local sources</th></tr>"
+    )
+
+    for res in grade_info["results"]:
+        q = res["question"]
+
+        score_class = "correct" if res["score"] >= 1.0 else "incorrect"
+        local_sources_html = "<br>".join(res["question"].sources)
+
+        html_parts.append("<tr>")
+        html_parts.append(f"<td>{q.id}</td>")
+        html_parts.append(f"<td>{q.question_text}</td>")
+        html_parts.append(f"<td>{res['user_answer']}</td>")
+        html_parts.append(
+            f"<td class='{score_class}'>{res['score']}/{res['max_score']}</td>"
+        )
+        html_parts.append(f"<td>{q.correct_answer}</td>")
+        html_parts.append(f"<td>{q.explanation}</td>")
+        html_parts.append(f"<td>{local_sources_html}</td>")
+        html_parts.append("</tr>")
+
+    html_parts.append("</table>")
+    html_parts.append("</body></html>")
+
+    with open(filename, "w", encoding="utf-8") as f:
+        f.write("\n".join(html_parts))
+
+    print(f"\nHTML report saved to: {filename}")
+    print("(Local-only: no internet sources used.)\n")
@@ -0,0 +1,159 @@
+# resource_registry.py
+# Process-wide registry for heavy, long-lived resources (embedder, vector store, LLM)
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+INGEST_STAMP_FILE = ".ingest_stamp"
+
+
+# ============ INGEST STAMP ============
+
+def write_ingest_stamp(db_dir: str) -> None:
+    """
+    Mark `db_dir` as freshly (re-)ingested. Running apps watching the
+    directory notice the new stamp and reload their vector store handles.
+    """
+    os.makedirs(db_dir, exist_ok=True)
+    path = os.path.join(db_dir, INGEST_STAMP_FILE)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"{time.time():.6f}\n")
+
+
+def read_ingest_stamp(db_dir: str) -> Optional[Tuple[int, int]]:
+    path = os.path.join(db_dir, INGEST_STAMP_FILE)
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+# ============ REGISTRY ============
+
+class ResourceRegistry:
+    """
+    Lazily builds named resources once per process and hands out the same
+    instance to every caller (thread-safe).
+
+    Resources registered with `reload_on_ingest=True` are dropped when the
+    watched DB directory gets a new ingest stamp or when `invalidate()` is
+    called, and rebuilt on next access. Listeners registered through
+    `add_listener` are called with the new generation number after each
+    invalidation so dependent caches can clear themselves.
+
+    A resource registered with its own `watch_dir` (e.g. a derived index
+    rebuilt from the same data) is also reopened when that directory gets a
+    new stamp, on its own: no generation bump, no listeners.
+    """
+
+    def __init__(self, watch_dir: Optional[str] = None, check_interval: float = 2.0):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._reload_on_ingest: Dict[str, bool] = {}
+        self._resource_stamps: Dict[str, Tuple[str, Optional[Tuple[int, int]]]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._listeners: List[Callable[[int], None]] = []
+        self._lock = threading.RLock()
+
+        self._watch_dir = watch_dir
+        self._check_interval = check_interval
+        self._stamp = read_ingest_stamp(watch_dir) if watch_dir else None
+        self._last_check = time.monotonic()
+
+        self.generation = 0
+
+    def register(
+        self,
+        name: str,
+        factory: Callable[[], Any],
+        reload_on_ingest: bool = False,
+        watch_dir: Optional[str] = None,
+    ) -> None:
+        with self._lock:
+            self._factories[name] = factory
+            self._reload_on_ingest[name] = reload_on_ingest
+            self._instances.pop(name, None)
+            if watch_dir:
+                self._resource_stamps[name] = (watch_dir, read_ingest_stamp(watch_dir))
+            else:
+                self._resource_stamps.pop(name, None)
+
+    def get(self, name: str) -> Any:
+        self.check_for_reingest()
+
+        inst = self._instances.get(name)
+        if inst is not None:
+            return inst
+
+        with self._lock:
+            inst = self._instances.get(name)
+            if inst is None:
+                if name not in self._factories:
+                    raise KeyError(f"Unknown resource '{name}'")
+                inst = self._factories[name]()
+                self._instances[name] = inst
+            return inst
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._instances
+
+    def warm_up(self, names: Optional[List[str]] = None) -> None:
+        """Eagerly build resources (all registered ones by default)."""
+        for name in names or list(self._factories):
+            self.get(name)
+
+    def invalidate(self, names: Optional[List[str]] = None) -> int:
+        """
+        Drop cached instances so they are rebuilt on next access.
+        With no names, drops every resource marked `reload_on_ingest`.
+        Returns the new generation number.
+        """
+        with self._lock:
+            if names is None:
+                names = [n for n, flag in self._reload_on_ingest.items() if flag]
+            for name in names:
+                self._instances.pop(name, None)
+            self.generation += 1
+            generation = self.generation
+            listeners = list(self._listeners)
+
+        for cb in listeners:
+            try:
+                cb(generation)
+            except Exception as e:
+                print(f"Resource invalidation listener failed: {e}")
+        return generation
+
+    def add_listener(self, cb: Callable[[int], None]) -> None:
+        with self._lock:
+            self._listeners.append(cb)
+
+    def check_for_reingest(self) -> None:
+        """Invalidate if the watched DB got a new ingest stamp (throttled stat)."""
+        if not self._watch_dir and not self._resource_stamps:
+            return
+        now = time.monotonic()
+        if now - self._last_check < self._check_interval:
+            return
+
+        with self._lock:
+            if now - self._last_check < self._check_interval:
+                return
+            self._last_check = now
+            for name, (watch_dir, old) in list(self._resource_stamps.items()):
+                stamp = read_ingest_stamp(watch_dir)
+                if stamp != old:
+                    self._resource_stamps[name] = (watch_dir, stamp)
+                    if self._instances.pop(name, None) is not None:
+                        print(f"Detected rebuild of '{watch_dir}', reloading {name}.")
+            if not self._watch_dir:
+                return
+            stamp = read_ingest_stamp(self._watch_dir)
+            if stamp == self._stamp:
+                return
+            self._stamp = stamp
+
+        print(f"Detected re-ingest of '{self._watch_dir}', reloading vector store.")
+        self.invalidate()
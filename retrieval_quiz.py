@@ -1,24 +1,215 @@
 # retrieval_quiz.py
 # Helper to load the Quiz Agent's own vector database
 
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.vectorstores import Chroma
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
 
-from config_quiz import DB_DIR, COLLECTION_NAME, EMBEDDING_MODEL_NAME
+from config_quiz import (
+    COLLECTION_NAME,
+    EMBEDDING_MODEL_NAME,
+    EMBEDDING_CACHE_MAX_ENTRIES,
+    INGEST_CHECK_INTERVAL_SECONDS,
+    RETRIEVAL_MODE,
+    HYBRID_ALPHA,
+    HYBRID_FETCH_K,
+    VECTOR_BACKEND,
+)
+from corpus_store import CORPUS_DIR, CORPUS_FAISS_DIR, EMBEDDING_CACHE_FILE, open_corpus
+from resource_registry import ResourceRegistry
 
+# LangChain, Chroma and numpy (BM25 index, topic catalog) are imported by the
+# factories below, on first use or in warm_up(), not when this module loads.
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
+    from bm25_quiz import BM25Index
+    from catalog_quiz import TopicCatalog
 
-def get_vectorstore():
-    embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME)
-    vectordb = Chroma(
-        collection_name=COLLECTION_NAME,
-        embedding_function=embeddings,
-        persist_directory=DB_DIR,
+# One embedder + one Chroma handle per process. The vector store is
+# reloaded automatically when ingest_quiz.py writes a new stamp to CORPUS_DIR
+# (and, with the FAISS backend, when faiss_quiz.py rebuilds the index).
+_registry = ResourceRegistry(
+    watch_dir=CORPUS_DIR,
+    check_interval=INGEST_CHECK_INTERVAL_SECONDS,
+)
+
+
+def _build_embeddings():
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    from embedding_cache import cached_embeddings
+
+    return cached_embeddings(
+        HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME),
+        EMBEDDING_MODEL_NAME,
+        EMBEDDING_CACHE_FILE,
+        max_entries=EMBEDDING_CACHE_MAX_ENTRIES,
     )
-    return vectordb
+
+
+def _build_vectorstore():
+    if VECTOR_BACKEND == "faiss":
+        try:
+            from faiss_quiz import FaissVectorStore
+            return FaissVectorStore(CORPUS_FAISS_DIR, get_embeddings())
+        except (ImportError, FileNotFoundError) as e:
+            print(f"FAISS backend unavailable, using Chroma: {e}")
+    return open_corpus(get_embeddings(), CORPUS_DIR, COLLECTION_NAME)
+
+
+def _build_bm25():
+    from bm25_quiz import BM25Index, bm25_index_path
+
+    index = BM25Index.load(bm25_index_path(CORPUS_DIR))
+    if not len(index):
+        print("No BM25 index found (run ingest_quiz.py); using dense retrieval only.")
+    return index
+
+
+def _build_topic_catalog():
+    from catalog_quiz import TopicCatalog, topic_catalog_path
+
+    catalog = TopicCatalog.load(topic_catalog_path(CORPUS_DIR))
+    if not len(catalog):
+        print("No topic catalog found (run ingest_quiz.py); random quizzes use fixed queries.")
+    return catalog
+
+
+_registry.register("embeddings", _build_embeddings)
+_registry.register(
+    "vectorstore",
+    _build_vectorstore,
+    reload_on_ingest=True,
+    watch_dir=CORPUS_FAISS_DIR if VECTOR_BACKEND == "faiss" else None,
+)
+_registry.register("bm25", _build_bm25, reload_on_ingest=True)
+_registry.register("topic_catalog", _build_topic_catalog, reload_on_ingest=True)
+
+
+def get_embeddings():
+    return _registry.get("embeddings")
+
+
+def get_vectorstore():
+    return _registry.get("vectorstore")
+
+
+def get_bm25_index() -> "BM25Index":
+    return _registry.get("bm25")
+
+
+def get_topic_catalog() -> "TopicCatalog":
+    return _registry.get("topic_catalog")
+
+
+def get_documents(ids: List[str]) -> List["Document"]:
+    """Chunks by ID, in the order given (unknown IDs are skipped)."""
+    found = fetch_documents(get_vectorstore(), ids)
+    return [found[cid] for cid in ids if cid in found]
+
+
+def fetch_documents(vectordb, ids: List[str]) -> Dict[str, "Document"]:
+    from langchain_core.documents import Document
+
+    got = vectordb.get(ids=ids, include=["documents", "metadatas"])
+    return {
+        cid: Document(page_content=text or "", metadata=meta or {})
+        for cid, text, meta in zip(got.get("ids", []), got.get("documents", []), got.get("metadatas", []))
+    }
 
 
 def get_retriever(k: int = 5):
     vectordb = get_vectorstore()
+    if RETRIEVAL_MODE == "hybrid":
+        bm25 = get_bm25_index()
+        if len(bm25):
+            return HybridRetriever(vectordb, bm25, k=k)
     retriever = vectordb.as_retriever(search_kwargs={"k": k})
     return retriever
 
+
+# ============ HYBRID RETRIEVAL ============
+
+class HybridRetriever:
+    """
+    Dense + BM25 retrieval with score fusion:
+
+        score = alpha * dense_relevance + (1 - alpha) * bm25 / max_bm25
+
+    Dense candidates come from Chroma (HYBRID_FETCH_K of them); the BM25
+    score of every chunk is computed from the inverted index, so dense hits
+    also get their lexical score. Chunks are matched across the two by
+    content hash. Lexical-only winners are fetched from Chroma by ID.
+    """
+
+    def __init__(
+        self,
+        vectordb,
+        bm25: "BM25Index",
+        k: int = 5,
+        alpha: float = HYBRID_ALPHA,
+        fetch_k: int = HYBRID_FETCH_K,
+    ):
+        self.vectordb = vectordb
+        self.bm25 = bm25
+        self.k = k
+        self.alpha = alpha
+        self.fetch_k = max(fetch_k, k)
+
+    def invoke(self, query: str) -> List["Document"]:
+        from bm25_quiz import content_key
+
+        dense = self.vectordb.similarity_search_with_relevance_scores(query, k=self.fetch_k)
+        lexical = self.bm25.scores(query)
+        max_lexical = float(lexical.max()) if len(lexical) else 0.0
+
+        def lexical_norm(i: Optional[int]) -> float:
+            if i is None or max_lexical <= 0:
+                return 0.0
+            return float(lexical[i]) / max_lexical
+
+        # content key -> (fused score, document or None, chunk id or None)
+        fused: Dict[str, tuple] = {}
+        for doc, relevance in dense:
+            key = content_key(doc.page_content)
+            score = self.alpha * float(relevance) + (1 - self.alpha) * lexical_norm(self.bm25.doc_for_key(key))
+            if key not in fused or fused[key][0] < score:
+                fused[key] = (score, doc, None)
+
+        for i in self.bm25.top(lexical, self.fetch_k):
+            key = self.bm25.doc_keys[i]
+            if key not in fused:
+                fused[key] = ((1 - self.alpha) * lexical_norm(i), None, self.bm25.doc_ids[i])
+
+        best = sorted(fused.values(), key=lambda item: item[0], reverse=True)[: self.k]
+        missing = [cid for _, doc, cid in best if doc is None]
+        fetched = fetch_documents(self.vectordb, missing) if missing else {}
+
+        docs: List["Document"] = []
+        for _, doc, cid in best:
+            doc = doc if doc is not None else fetched.get(cid)
+            if doc is not None:
+                docs.append(doc)
+        return docs
+
+    get_relevant_documents = invoke
+
+
+# ============ LIFECYCLE ============
+
+def warm_up(names: Optional[List[str]] = None) -> None:
+    """Load the embedding model and open the vector store ahead of the first quiz."""
+    _registry.warm_up(names)
+
+
+def invalidate() -> int:
+    """Drop the cached vector store (e.g. after an in-process re-ingest)."""
+    return _registry.invalidate()
+
+
+def on_invalidate(cb: Callable[[int], None]) -> None:
+    """Register a callback fired with the new generation after each reload."""
+    _registry.add_listener(cb)
+
+
+def current_generation() -> int:
+    """Bumped on every reload; lets caches tell whether the collection changed."""
+    _registry.check_for_reingest()
+    return _registry.generation
@@ -0,0 +1,67 @@
+# semantic_grade_quiz.py
+# Embedding-based scoring of open-ended answers (OPEN_GRADING_MODE = "semantic")
+#
+# Word overlap misses paraphrases ("keeps data secret" vs "confidentiality"),
+# and asking llama3 to grade is far too slow for a class. Instead, each model
+# answer is embedded once with the local all-MiniLM-L6-v2 embedder and kept
+# on the Quiz (Quiz.answer_vectors); student answers are embedded in one
+# batch per grading call and scored by cosine similarity.
+
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from config_quiz import SEMANTIC_FULL_THRESHOLD, SEMANTIC_PARTIAL_THRESHOLD
+from quiz_core import Quiz
+from retrieval_quiz import get_embeddings
+from vectors_quiz import unit_rows
+
+
+def reference_vectors(quiz: Quiz) -> Dict[int, np.ndarray]:
+    """Unit vectors of the open questions' model answers, embedded once per quiz."""
+    cached = quiz.answer_vectors
+    missing = [q for q in quiz.questions if q.qtype not in ("mcq", "tf") and q.id not in cached]
+    if missing:
+        vecs = unit_rows(get_embeddings().embed_documents([q.correct_answer or "" for q in missing]))
+        for q, vec in zip(missing, vecs):
+            cached[q.id] = vec
+    return cached
+
+
+def answer_similarities(quiz: Quiz, answers: Sequence[Tuple[int, str]]) -> np.ndarray:
+    """
+    Cosine similarity of each (question id, student answer) pair to that
+    question's model answer. Distinct answer texts are embedded once, in a
+    single batch.
+    """
+    if not answers:
+        return np.zeros(0, dtype=np.float32)
+
+    refs = reference_vectors(quiz)
+    texts: Dict[str, int] = {}
+    rows = [texts.setdefault(text, len(texts)) for _, text in answers]
+
+    embedded = unit_rows(get_embeddings().embed_documents(list(texts)))
+    given = embedded[rows]
+    expected = np.stack([refs[qid] for qid, _ in answers])
+    return np.einsum("ij,ij->i", given, expected)
+
+
+def score_similarity(similarity: float) -> Tuple[float, str]:
+    """(score, comment) for an open answer with the given cosine similarity."""
+    if similarity >= SEMANTIC_FULL_THRESHOLD:
+        return 1.0, f"Same meaning as model answer (semantic similarity {similarity:.2f})."
+    if similarity >= SEMANTIC_PARTIAL_THRESHOLD:
+        return 0.5, f"Partially correct (semantic similarity {similarity:.2f})."
+    return 0.0, f"Not very close to model answer (semantic similarity {similarity:.2f})."
+
+
+def open_answer_similarities(quiz: Quiz, user_answers: Dict[int, str]) -> Dict[int, float]:
+    """Semantic similarity per open question id, for the non-blank answers of one user."""
+    pairs: List[Tuple[int, str]] = []
+    for q in quiz.questions:
+        answer = (user_answers.get(q.id) or "").strip()
+        if q.qtype not in ("mcq", "tf") and answer:
+            pairs.append((q.id, answer))
+    sims = answer_similarities(quiz, pairs)
+    return {qid: float(s) for (qid, _), s in zip(pairs, sims)}
@@ -0,0 +1,70 @@
+# sqlite_lru.py
+# SQLite table bounded by least-recently-used eviction
+#
+# The storage under embedding_cache.py and llm_cache.py: one WAL-mode
+# connection per store, shared by the threads of a process behind one lock,
+# and a row count kept in memory so inserts only touch the table's
+# `last_used` index when the table is over its limit.
+
+import os
+import sqlite3
+import threading
+
+
+class SQLiteLRUStore:
+    """
+    One table, created from `columns` (which must include a
+    `last_used REAL NOT NULL` column), capped at `max_entries` rows.
+    Callers run their statements on `conn` while holding `lock`, report
+    the rows they inserted / deleted with `inserted()` / `deleted()`, and
+    commit. `evictions` counts rows evicted by this process.
+    """
+
+    def __init__(self, path: str, table: str, columns: str, max_entries: int):
+        self.path = path
+        self.table = table
+        self.max_entries = max_entries
+        self.evictions = 0
+
+        self.lock = threading.Lock()
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({columns})")
+        self.conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_last_used ON {table}(last_used)")
+        self.conn.commit()
+        self._count = self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def inserted(self, n: int) -> None:
+        """Count `n` new rows and evict the least recently used if over the limit (hold `lock`)."""
+        self._count += max(n, 0)
+        if self._count > self.max_entries:
+            # Evict down to 90% so we don't evict on every insert.
+            excess = self._count - int(self.max_entries * 0.9)
+            cur = self.conn.execute(
+                f"DELETE FROM {self.table} WHERE rowid IN ("
+                f" SELECT rowid FROM {self.table} ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+            self._count -= max(cur.rowcount, 0)
+            self.evictions += max(cur.rowcount, 0)
+
+    def deleted(self, n: int) -> None:
+        """Count `n` removed rows (hold `lock`)."""
+        self._count -= max(n, 0)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.conn.execute(f"DELETE FROM {self.table}")
+            self.conn.commit()
+            self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
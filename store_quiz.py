@@ -0,0 +1,242 @@
+# store_quiz.py
+# Compact binary encoding for quizzes + an append-only quiz store
+#
+# A quiz is encoded as one string table (every distinct text, option,
+# answer and source stored once) followed by fixed-size question records
+# that refer to strings by index:
+#
+#   payload  = <HI n_questions, n_strings>
+#              <n_strings * I  utf-8 byte lengths> <string bytes...>
+#              question records
+#   question = <iBIIIhH id, qtype, text, answer, explanation, n_options|-1, n_sources>
+#              <(n_options + n_sources) * I  string indexes>
+#
+# Question IDs come from the LLM; a quiz with an ID outside int32 is stored
+# renumbered 1..n.
+#
+# QuizStore appends (header, payload) records to a single file and keeps an
+# in-memory id -> offset index, so quizzes can be saved, loaded by ID and
+# replayed in insertion order. Quiz IDs are content hashes.
+
+import hashlib
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from quiz_core import Question, Quiz, intern_sources
+
+_QTYPES = ("mcq", "tf", "open")
+_QTYPE_CODES = {t: i for i, t in enumerate(_QTYPES)}
+
+_PAYLOAD_HEADER = struct.Struct("<HI")
+_QUESTION = struct.Struct("<iBIIIhH")
+_ID_MIN, _ID_MAX = -(1 << 31), (1 << 31) - 1
+
+FILE_MAGIC = b"QZSTORE1"
+# quiz id (16 bytes), created (unix time), payload length, payload crc32
+_RECORD = struct.Struct("<16sdII")
+
+
+# ============ ENCODING ============
+
+def _question_ids(quiz: Quiz) -> List[int]:
+    ids = [q.id for q in quiz.questions]
+    if all(_ID_MIN <= i <= _ID_MAX for i in ids):
+        return ids
+    return list(range(1, len(ids) + 1))
+
+
+def encode_quiz(quiz: Quiz) -> bytes:
+    strings: Dict[str, int] = {}
+
+    def ref(text: Optional[str]) -> int:
+        return strings.setdefault(text or "", len(strings))
+
+    records: List[bytes] = []
+    for qid, q in zip(_question_ids(quiz), quiz.questions):
+        option_refs = [ref(str(o)) for o in q.options] if q.options is not None else []
+        source_refs = [ref(s) for s in q.sources]
+        refs = option_refs + source_refs
+        records.append(
+            _QUESTION.pack(
+                qid,
+                _QTYPE_CODES.get(q.qtype, _QTYPE_CODES["open"]),
+                ref(q.question_text),
+                ref(q.correct_answer),
+                ref(q.explanation),
+                len(option_refs) if q.options is not None else -1,
+                len(source_refs),
+            )
+            + struct.pack(f"<{len(refs)}I", *refs)
+        )
+
+    encoded = [s.encode("utf-8") for s in strings]
+    return b"".join(
+        [
+            _PAYLOAD_HEADER.pack(len(records), len(encoded)),
+            struct.pack(f"<{len(encoded)}I", *(len(b) for b in encoded)),
+            *encoded,
+            *records,
+        ]
+    )
+
+
+def decode_quiz(payload: bytes) -> Quiz:
+    view = memoryview(payload)
+    n_questions, n_strings = _PAYLOAD_HEADER.unpack_from(view, 0)
+    pos = _PAYLOAD_HEADER.size
+
+    lengths = struct.unpack_from(f"<{n_strings}I", view, pos)
+    pos += 4 * n_strings
+    strings: List[str] = []
+    for n in lengths:
+        strings.append(bytes(view[pos:pos + n]).decode("utf-8"))
+        pos += n
+
+    shared: Dict[Tuple[int, ...], Tuple[str, ...]] = {}
+    questions: List[Question] = []
+    for _ in range(n_questions):
+        qid, qtype, text, answer, expl, n_opts, n_srcs = _QUESTION.unpack_from(view, pos)
+        pos += _QUESTION.size
+        n_refs = max(n_opts, 0) + n_srcs
+        refs = struct.unpack_from(f"<{n_refs}I", view, pos)
+        pos += 4 * n_refs
+
+        source_refs = refs[max(n_opts, 0):]
+        if source_refs not in shared:
+            shared[source_refs] = intern_sources(strings[i] for i in source_refs)
+
+        questions.append(
+            Question(
+                id=qid,
+                qtype=_QTYPES[qtype],  # type: ignore[arg-type]
+                question_text=strings[text],
+                options=[strings[i] for i in refs[:n_opts]] if n_opts >= 0 else None,
+                correct_answer=strings[answer],
+                explanation=strings[expl],
+                sources=shared[source_refs],
+            )
+        )
+    return Quiz(questions=questions)
+
+
+def quiz_id_for(payload: bytes) -> str:
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+# ============ RECORD FRAMING ============
+
+def pack_record(payload: bytes, created: Optional[float] = None, quiz_id: Optional[str] = None) -> bytes:
+    header = _RECORD.pack(
+        bytes.fromhex(quiz_id or quiz_id_for(payload)),
+        time.time() if created is None else created,
+        len(payload),
+        zlib.crc32(payload),
+    )
+    return header + payload
+
+
+def iter_records(data: bytes, start: int = 0) -> Iterator[Tuple[int, str, float, bytes]]:
+    """
+    Yield (offset, quiz_id, created, payload) for each intact record in
+    `data`. Stops at the first torn or corrupt record (e.g. after a crash).
+    """
+    pos = start
+    while pos + _RECORD.size <= len(data):
+        raw_id, created, length, crc = _RECORD.unpack_from(data, pos)
+        body_start = pos + _RECORD.size
+        payload = data[body_start:body_start + length]
+        if len(payload) != length or zlib.crc32(payload) != crc:
+            return
+        yield pos, raw_id.hex(), created, payload
+        pos = body_start + length
+
+
+# ============ STORE ============
+
+class QuizStore:
+    """
+    Append-only binary quiz store in a single file.
+
+    `put()` returns the quiz's content-hash ID (storing the same quiz twice
+    is a no-op), `get(quiz_id)` loads one quiz, and `replay()` yields every
+    stored quiz in insertion order. A torn record at the end of the file
+    (crash mid-write) is dropped when the store is opened.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        # quiz id -> (payload offset, payload length, created)
+        self._index: Dict[str, Tuple[int, int, float]] = {}
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(FILE_MAGIC)
+
+        self._file = open(path, "r+b")
+        data = self._file.read()
+        if not data.startswith(FILE_MAGIC):
+            self._file.close()
+            raise ValueError(f"{path} is not a quiz store")
+
+        end = len(FILE_MAGIC)
+        for offset, quiz_id, created, payload in iter_records(data, end):
+            body = offset + _RECORD.size
+            self._index[quiz_id] = (body, len(payload), created)
+            end = body + len(payload)
+        if end < len(data):
+            print(f"Quiz store {path}: dropping {len(data) - end} bytes of incomplete data.")
+            self._file.truncate(end)
+
+    def put(self, quiz: Quiz, created: Optional[float] = None) -> str:
+        payload = encode_quiz(quiz)
+        quiz_id = quiz_id_for(payload)
+        record = pack_record(payload, created, quiz_id)
+        with self._lock:
+            if quiz_id in self._index:
+                return quiz_id
+            offset = self._file.seek(0, os.SEEK_END)
+            self._file.write(record)
+            self._file.flush()
+            _, created_at, _, _ = _RECORD.unpack_from(record, 0)
+            self._index[quiz_id] = (offset + _RECORD.size, len(payload), created_at)
+        return quiz_id
+
+    def _payload(self, quiz_id: str) -> bytes:
+        offset, length, _ = self._index[quiz_id]
+        self._file.seek(offset)
+        return self._file.read(length)
+
+    def get(self, quiz_id: str) -> Quiz:
+        with self._lock:
+            if quiz_id not in self._index:
+                raise KeyError(f"Unknown quiz id '{quiz_id}'")
+            payload = self._payload(quiz_id)
+        return decode_quiz(payload)
+
+    def created(self, quiz_id: str) -> float:
+        return self._index[quiz_id][2]
+
+    def ids(self) -> List[str]:
+        with self._lock:
+            return list(self._index)
+
+    def replay(self) -> Iterator[Tuple[str, Quiz]]:
+        """Every stored quiz as (quiz_id, Quiz), oldest first."""
+        for quiz_id in self.ids():
+            yield quiz_id, self.get(quiz_id)
+
+    def __contains__(self, quiz_id: str) -> bool:
+        return quiz_id in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
@@ -0,0 +1,104 @@
+# test_jsonscan_quiz.py
+# Regression tests for the quiz JSON scanner (jsonscan_quiz.py)
+#
+#   python -m pytest -q test_jsonscan_quiz.py
+
+import json
+
+import pytest
+
+from jsonscan_quiz import IncrementalJSONScanner, extract_json
+
+
+def _question(i: int) -> dict:
+    return {
+        "id": i,
+        "qtype": "tf",
+        "question": f"Statement {i} about {{TLS}} and [IPsec] is true?",
+        "answer": "True",
+        "explanation": "See slide \"12\".",
+    }
+
+
+PAYLOAD = {"questions": [_question(i) for i in range(1, 6)]}
+TEXT = json.dumps(PAYLOAD, indent=2)
+
+
+def _count(obj) -> int:
+    if isinstance(obj, dict):
+        return len(obj.get("questions", [obj]))
+    return sum(1 for x in obj if isinstance(x, dict) and "question" in x)
+
+
+# ============ WHOLE-TEXT EXTRACTION ============
+
+def test_clean_payload():
+    assert extract_json(TEXT) == PAYLOAD
+
+
+def test_markdown_fence_and_prose():
+    text = "Sure! Here is your quiz:\n```json\n" + TEXT + "\n```\nGood luck, it's easy."
+    assert extract_json(text) == PAYLOAD
+
+
+@pytest.mark.parametrize(
+    "preamble",
+    [
+        "Recall sets like {a, b} and lists like [x, y]. " * 20,
+        "Note: {this brace never closes " * 10,
+        "Stray closers ] } ) first. ",
+        "An unclosed list [ with a \"quote inside. ",
+        "note {\"",
+        "'{\"' then [[x]\" (",
+    ],
+)
+def test_stray_bracket_preambles(preamble):
+    assert _count(extract_json(preamble + TEXT)) == 5
+
+
+def test_stray_opener_closed_after_payload():
+    # "{" in the preamble closed by a "}" after the payload hides the payload
+    # inside one non-JSON span; a later small object must not win.
+    text = "note {" + TEXT + "} and {\"k\": 1}"
+    assert _count(extract_json(text)) == 5
+
+
+def test_truncated_output_keeps_complete_questions():
+    cut = TEXT[: TEXT.index('"id": 4')]
+    result = extract_json("Here you go:\n" + cut)
+    assert [q["id"] for q in result if "question" in q] == [1, 2, 3]
+
+
+def test_truncated_inside_string_recovers_partial_item():
+    cut = TEXT[: TEXT.index("See slide", TEXT.index('"id": 5'))] + "See sli"
+    result = extract_json(cut)
+    assert [q["id"] for q in result] == [1, 2, 3, 4, 5]
+    assert result[-1]["explanation"] == "See sli"
+
+
+def test_no_json_raises():
+    with pytest.raises(ValueError):
+        extract_json("I cannot write a quiz about that {sorry}.")
+
+
+# ============ STREAMING ============
+
+def test_incremental_scanner_across_chunk_boundaries():
+    text = "Sure! ```json\n" + TEXT + "\n```"
+    scanner = IncrementalJSONScanner()
+    got = []
+    for i in range(0, len(text), 7):
+        got.extend(scanner.feed(text[i:i + 7]))
+    assert got == PAYLOAD["questions"]
+
+
+def test_incremental_scanner_nested_arrays_one_char_at_a_time():
+    items = [{"id": i, "options": ["A", "B", [i, {"k": i}]]} for i in range(3)]
+    text = "[[1, 2], " + json.dumps(items)[1:]
+    scanner = IncrementalJSONScanner()
+    got = []
+    for ch in text:
+        got.extend(scanner.feed(ch))
+    # {"k": i} sits directly inside an array too, and closes before its item
+    expected = [obj for i, item in enumerate(items) for obj in ({"k": i}, item)]
+    assert got == expected
@@ -0,0 +1,44 @@
+# vectors_quiz.py
+# NumPy helpers shared by the retrieval, packing, grading and index modules
+#
+# unit_rows() is the one place embeddings are L2-normalised (cosine
+# similarity then becomes a dot product); load_npz() / save_npz() read and
+# atomically write the versioned .npz files kept next to the corpus
+# (BM25 index, topic catalog).
+
+import os
+from typing import Dict, Optional
+
+import numpy as np
+
+
+def unit_rows(vectors) -> np.ndarray:
+    """
+    `vectors` (one per row, or a single vector) scaled to unit length, as a
+    contiguous float32 array. An empty list gives a (0, 0) array.
+    """
+    mat = np.ascontiguousarray(vectors, dtype=np.float32)
+    if mat.ndim == 1 and not mat.size:
+        return mat.reshape(0, 0)
+    norms = np.linalg.norm(mat, axis=-1, keepdims=True)
+    return mat / np.maximum(norms, 1e-12)
+
+
+def load_npz(path: str, version: int) -> Optional[Dict[str, np.ndarray]]:
+    """All arrays of `path`, or None if it is missing, unreadable or another version."""
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["version"]) != version:
+                return None
+            return {name: data[name] for name in data.files}
+    except (FileNotFoundError, OSError, KeyError, ValueError):
+        return None
+
+
+def save_npz(path: str, arrays: Dict[str, np.ndarray]) -> None:
+    """Write `arrays` to `path` via a temp file, so readers never see half a file."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp, path)